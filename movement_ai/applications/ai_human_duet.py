@@ -38,7 +38,10 @@ from PyQt4 import QtGui, QtCore
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))+"/..")
-from application import Application, Avatar, BaseUiWindow, Memory, Recall
+import startup_profiler
+startup_profiler.start_if_requested()
+from application import Application, Avatar, Memory, Recall
+from application_ui import BaseUiWindow
 from entities.hierarchical import Entity
 from bvh.bvh_reader import BvhReader
 from dimensionality_reduction.behavior import Behavior
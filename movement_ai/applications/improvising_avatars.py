@@ -23,15 +23,20 @@ import threading
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))+"/..")
+import startup_profiler
+startup_profiler.start_if_requested()
 from application import Application, Avatar
 from entities.hierarchical import Entity
 from bvh.bvh_reader import BvhReader
 from dimensionality_reduction.behaviors.improvise import ImproviseParameters, Improvise
+from dimensionality_reduction.behaviors.improvise_crowd import ImproviseCrowd, ImproviseCrowdMember
 from dimensionality_reduction.factory import DimensionalityReductionFactory
 import tracking.pn.receiver
 
 parser = ArgumentParser()
 parser.add_argument("--num-avatars", type=int, default=1)
+parser.add_argument("--crowd", action="store_true",
+                    help="Let all avatars share one vectorized improvisation engine, e.g. for large numbers of avatars")
 parser.add_argument("--pn-host", default="localhost")
 parser.add_argument("--pn-port", type=int, default=tracking.pn.receiver.SERVER_PORT_BVH)
 Application.add_parser_arguments(parser)
@@ -44,6 +49,7 @@ entity_args_strings = ENTITY_ARGS.split()
 entity_args = parser.parse_args(entity_args_strings)
 
 student = None
+crowd = None
 
 avatars = []
 for index in range(args.num_avatars):
@@ -56,15 +62,25 @@ for index in range(args.num_avatars):
             DIMENSIONALITY_REDUCTION_TYPE, num_input_dimensions, NUM_REDUCED_DIMENSIONS, DIMENSIONALITY_REDUCTION_ARGS)
         student.load(STUDENT_MODEL_PATH)
 
-    improvise_params = ImproviseParameters()
     preferred_location = None
-    improvise = Improvise(
-        student,
-        student.num_reduced_dimensions,
-        improvise_params,
-        preferred_location,
-        MAX_NOVELTY)
-    avatar = Avatar(index, entity, improvise)
+    if args.crowd:
+        if crowd is None:
+            crowd = ImproviseCrowd(
+                student,
+                args.num_avatars,
+                ImproviseParameters(),
+                preferred_location,
+                MAX_NOVELTY)
+        behavior = ImproviseCrowdMember(crowd, index)
+    else:
+        improvise_params = ImproviseParameters()
+        behavior = Improvise(
+            student,
+            student.num_reduced_dimensions,
+            improvise_params,
+            preferred_location,
+            MAX_NOVELTY)
+    avatar = Avatar(index, entity, behavior)
     avatars.append(avatar)
 
 application = Application(student, avatars, args)
@@ -51,7 +51,10 @@ from PyQt4 import QtGui, QtCore
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))+"/..")
-from application import Application, Avatar, BaseUiWindow, Memory, Recall, set_up_logging
+import startup_profiler
+startup_profiler.start_if_requested()
+from application import Application, Avatar, Memory, Recall, set_up_logging
+from application_ui import BaseUiWindow
 from entities.hierarchical import Entity
 from bvh.bvh_reader import BvhReader
 from dimensionality_reduction.behavior import Behavior
@@ -180,7 +183,7 @@ class UiWindow(BaseUiWindow):
     def _add_reload_model_action(self):
         def load_model():
             model_info = MODELS_INFO[current_model]
-            student.load(model_info["path"])
+            student.load(model_info["path"], verify_hash=False)
 
         action = QtGui.QAction("Reload model", self)
         action.triggered.connect(load_model)
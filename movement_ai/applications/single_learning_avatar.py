@@ -16,6 +16,8 @@ from argparse import ArgumentParser
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__))+"/..")
+import startup_profiler
+startup_profiler.start_if_requested()
 from application import Application, Avatar
 from entities.hierarchical import Entity
 from bvh.bvh_reader import BvhReader
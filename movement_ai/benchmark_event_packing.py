@@ -0,0 +1,45 @@
+# Compares the size and encoding time of events packed as JSON and as binary, for
+# typical per-frame outputs and broadcasts of observed reductions.
+#
+# Example usage:
+# python benchmark_event_packing.py --num-joints 72 --num-avatars 8 --num-observations 10000
+
+from argparse import ArgumentParser
+import time
+import numpy
+
+from event import Event
+from connectivity.event_packing import EventPacker, BinaryEventPacker
+
+def measure(packer, event, num_repetitions):
+    time_before = time.time()
+    for n in range(num_repetitions):
+        packed_event = packer.pack(event)
+    return len(packed_event), (time.time() - time_before) / num_repetitions
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--num-joints", type=int, default=72)
+    parser.add_argument("--num-avatars", type=int, default=8)
+    parser.add_argument("--num-observations", type=int, default=10000)
+    parser.add_argument("--num-dimensions", type=int, default=7)
+    parser.add_argument("--num-repetitions", type=int, default=20)
+    args = parser.parse_args()
+
+    random_state = numpy.random.RandomState(0)
+    events = [
+        ("output", Event(Event.OUTPUT, random_state.uniform(-1, 1, (args.num_joints, 4)))),
+        ("multi-avatar output", Event(Event.OUTPUT, random_state.uniform(
+                    -1, 1, (args.num_avatars, args.num_joints, 4)))),
+        ("observed reductions", Event(Event.NORMALIZED_OBSERVED_REDUCTIONS, random_state.uniform(
+                    0, 1, (args.num_observations, args.num_dimensions)))),
+        ]
+
+    print("%-22s%12s%12s%10s%14s%14s%10s" % (
+        "event", "JSON bytes", "binary", "ratio", "JSON (ms)", "binary (ms)", "ratio"))
+    for name, event in events:
+        json_size, json_duration = measure(EventPacker, event, args.num_repetitions)
+        binary_size, binary_duration = measure(BinaryEventPacker, event, args.num_repetitions)
+        print("%-22s%12d%12d%10.1f%14.3f%14.3f%10.1f" % (
+            name, json_size, binary_size, float(json_size) / binary_size,
+            json_duration * 1000, binary_duration * 1000, json_duration / binary_duration))
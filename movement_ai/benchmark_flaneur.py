@@ -0,0 +1,67 @@
+# Compares the per-step cost of Flaneur with the previous sklearn-based neighbor search,
+# and checks that all variants follow the same trajectory from the same random seed.
+#
+# Example usage:
+# python benchmark_flaneur.py --num-map-points 20000 --num-dimensions 7 --num-steps 500
+
+from argparse import ArgumentParser
+import time
+import numpy
+import sklearn.neighbors
+
+from flaneur import Flaneur, NUM_NEIGHBORS, DEFAULT_NEIGHBOR_CACHE_SIZE
+
+class SklearnFlaneur(Flaneur):
+    # Flaneur as it was before it used a spatial index, fitting its own
+    # KNeighborsClassifier and querying it for every step.
+    def __init__(self, map_points, **kwargs):
+        self._nearest_neighbor_classifier = sklearn.neighbors.KNeighborsClassifier(
+            n_neighbors=NUM_NEIGHBORS, weights='uniform')
+        self._nearest_neighbor_classifier.fit(map_points, list(range(len(map_points))))
+        Flaneur.__init__(self, map_points, **kwargs)
+
+    def _get_nearest_neighbor_indices(self, position):
+        distances_list, points_indices_list = self._nearest_neighbor_classifier.kneighbors(
+            [position])
+        return points_indices_list[0]
+
+def run(flaneur_class, map_points, args, **kwargs):
+    numpy.random.seed(args.random_seed)
+    flaneur = flaneur_class(map_points=map_points, **kwargs)
+    time_before = time.time()
+    if args.precomputed_steps > 1 and flaneur_class is Flaneur:
+        positions = []
+        while len(positions) < args.num_steps:
+            step_positions, _neighbors_centers = flaneur.proceed_steps(
+                args.time_increment, min(args.precomputed_steps, args.num_steps - len(positions)))
+            positions += step_positions
+    else:
+        positions = []
+        for n in range(args.num_steps):
+            flaneur.proceed(args.time_increment)
+            positions.append(numpy.array(flaneur.get_position()))
+    return (time.time() - time_before) / args.num_steps, numpy.array(positions)
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--num-map-points", type=int, default=10000)
+    parser.add_argument("--num-dimensions", type=int, default=7)
+    parser.add_argument("--num-steps", type=int, default=500)
+    parser.add_argument("--time-increment", type=float, default=1./50)
+    parser.add_argument("--neighbor-cache-size", type=int, default=DEFAULT_NEIGHBOR_CACHE_SIZE)
+    parser.add_argument("--precomputed-steps", type=int, default=10)
+    parser.add_argument("--random-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    map_points = numpy.random.RandomState(args.random_seed).uniform(
+        0, 1, (args.num_map_points, args.num_dimensions))
+
+    reference_step_time, reference_positions = run(SklearnFlaneur, map_points, args)
+    print("%-30s%10.3f ms/step" % ("sklearn", reference_step_time * 1000))
+    for name, kwargs in [
+            ("spatial index", {"neighbor_cache_size": None}),
+            ("spatial index + cache", {"neighbor_cache_size": args.neighbor_cache_size})]:
+        step_time, positions = run(Flaneur, map_points, args, **kwargs)
+        max_deviation = numpy.abs(positions - reference_positions).max()
+        print("%-30s%10.3f ms/step  speedup %6.1fx  max deviation from sklearn %g" % (
+            name, step_time * 1000, reference_step_time / step_time, max_deviation))
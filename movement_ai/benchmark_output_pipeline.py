@@ -0,0 +1,98 @@
+# Compares the time and memory taken to process output parameters into a BVH frame by
+# Entity.parameters_to_processed_pose followed by BvhWriter, and by the fused
+# OutputPipeline. Memory is given as the peak of memory allocated while processing a
+# frame, as traced by tracemalloc, and as the number of garbage collections and the total
+# time spent in them.
+#
+# Example usage:
+# python benchmark_output_pipeline.py --skeleton scenes/pn-01.22_skeleton.bvh \
+#   --entity-args "-r quaternion --friction --translate" --num-frames 10000
+
+from argparse import ArgumentParser
+import gc
+import time
+import tracemalloc
+import numpy
+
+from bvh.bvh_reader import BvhReader
+from bvh.bvh_writer import BvhWriter
+from entities.hierarchical import Entity
+
+class GcMeter:
+    def __init__(self):
+        self.num_collections = 0
+        self.duration = 0.
+        gc.callbacks.append(self._callback)
+
+    def stop(self):
+        gc.callbacks.remove(self._callback)
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._start_time = time.time()
+        else:
+            self.num_collections += 1
+            self.duration += time.time() - self._start_time
+
+def create_entity(args, bvh_reader):
+    entity_parser = ArgumentParser()
+    Entity.add_parser_arguments(entity_parser)
+    entity_args = entity_parser.parse_args(args.entity_args.split())
+    pose = bvh_reader.get_hierarchy().create_pose()
+    return Entity(bvh_reader, pose, True, args.z_up, entity_args)
+
+def process_with_pose(entity, bvh_writer, parameters):
+    entity.parameters_to_processed_pose(parameters, entity.pose)
+    return bvh_writer._pose_to_bvh_frame(entity.pose)
+
+def process_with_pipeline(pipeline, parameters):
+    pipeline.process(parameters)
+    return pipeline.bvh_frame
+
+def measure(process, all_parameters, num_traced_frames):
+    tracemalloc.start()
+    peak_sizes = []
+    for parameters in all_parameters[:num_traced_frames]:
+        tracemalloc.reset_peak()
+        size_before, _ = tracemalloc.get_traced_memory()
+        process(parameters)
+        _, peak_size = tracemalloc.get_traced_memory()
+        peak_sizes.append(peak_size - size_before)
+    tracemalloc.stop()
+
+    gc_meter = GcMeter()
+    time_before = time.time()
+    for parameters in all_parameters:
+        process(parameters)
+    duration = time.time() - time_before
+    gc_meter.stop()
+    return duration / len(all_parameters), numpy.mean(peak_sizes), \
+        gc_meter.num_collections, gc_meter.duration
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--skeleton", default="scenes/pn-01.22_skeleton.bvh")
+    parser.add_argument("--entity-args", default="-r quaternion --friction --translate")
+    parser.add_argument("--z-up", action="store_true")
+    parser.add_argument("--num-frames", type=int, default=10000)
+    parser.add_argument("--num-traced-frames", type=int, default=100)
+    parser.add_argument("--random-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bvh_reader = BvhReader(args.skeleton)
+    bvh_reader.read()
+    entity = create_entity(args, bvh_reader)
+    bvh_writer = BvhWriter(bvh_reader.get_hierarchy(), 1. / 30)
+    pipeline = create_entity(args, bvh_reader).get_output_pipeline()
+    all_parameters = numpy.random.RandomState(args.random_seed).uniform(
+        -1, 1, (args.num_frames, entity.get_value_length()))
+
+    print("%-10s%15s%12s%15s%15s" % (
+        "method", "us per frame", "peak KB", "collections", "GC time (ms)"))
+    for name, process in [
+            ("pose", lambda parameters: process_with_pose(entity, bvh_writer, parameters)),
+            ("pipeline", lambda parameters: process_with_pipeline(pipeline, parameters))]:
+        frame_duration, peak_size, num_collections, gc_duration = measure(
+            process, all_parameters, args.num_traced_frames)
+        print("%-10s%15.1f%12.1f%15d%15.1f" % (
+            name, frame_duration * 1e6, peak_size / 1024., num_collections, gc_duration * 1000))
@@ -0,0 +1,58 @@
+# Reports the time taken by each sampler and how well its samples cover synthetic point
+# clouds of various sizes. Coverage is given as the mean and max distance from a point to
+# its nearest sample.
+#
+# Example usage:
+# python benchmark_sampling.py --num-points 10000 100000 1000000 --num-dimensions 7 \
+#   --samplers FarthestPoint PoissonDisk MiniBatchKMeans
+
+from argparse import ArgumentParser, Namespace
+import time
+import numpy
+from scipy.spatial import cKDTree
+
+import sampling
+
+def create_point_cloud(num_points, num_dimensions, num_clusters, random_state):
+    # Gaussian clusters of varying density within the unit hypercube, like normalized
+    # reductions
+    centers = random_state.uniform(0.2, 0.8, (num_clusters, num_dimensions))
+    deviations = random_state.uniform(0.01, 0.1, num_clusters)
+    cluster_indices = random_state.randint(num_clusters, size=num_points)
+    points = centers[cluster_indices] + random_state.normal(size=(num_points, num_dimensions)) * \
+        deviations[cluster_indices,numpy.newaxis]
+    return numpy.clip(points, 0, 1)
+
+def get_coverage(points, samples):
+    distances, _ = cKDTree(samples).query(points)
+    return distances.mean(), distances.max()
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--num-points", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--num-dimensions", type=int, default=7)
+    parser.add_argument("--num-clusters", type=int, default=20)
+    parser.add_argument("--samplers", nargs="+", default=[
+            "FarthestPoint", "PoissonDisk", "DistanceDistributionEqualization",
+            "MinDistance", "MiniBatchKMeans", "KMeans"])
+    parser.add_argument("--num-samples", type=int, default=500)
+    parser.add_argument("--min-distance", type=float, default=0.05)
+    parser.add_argument("--random-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sampler_args = Namespace(num_samples=args.num_samples, min_distance=args.min_distance)
+    print("%10s  %-35s%10s%10s%12s%12s" % (
+        "points", "sampler", "time (s)", "samples", "mean dist", "max dist"))
+    for num_points in args.num_points:
+        points = create_point_cloud(
+            num_points, args.num_dimensions, args.num_clusters,
+            numpy.random.RandomState(args.random_seed))
+        for sampler_name in args.samplers:
+            numpy.random.seed(args.random_seed)
+            sampler = getattr(sampling, "%sSampler" % sampler_name)(points, sampler_args)
+            time_before = time.time()
+            samples = numpy.array(sampler.sample())
+            sampling_time = time.time() - time_before
+            mean_distance, max_distance = get_coverage(points, samples)
+            print("%10d  %-35s%10.2f%10d%12.4f%12.4f" % (
+                num_points, sampler_name, sampling_time, len(samples), mean_distance, max_distance))
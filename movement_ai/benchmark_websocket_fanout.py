@@ -0,0 +1,76 @@
+# Reports the server CPU time taken to send an OUTPUT event to a growing number of
+# websocket clients, when the event is packed once for all subscribers and, for
+# comparison, when it is packed again for each client. The clients run in the same
+# process, but only the time spent sending is measured.
+#
+# Example usage:
+# python benchmark_websocket_fanout.py --num-clients 1 10 50 --num-joints 72 --wire-format binary
+
+from argparse import ArgumentParser
+import asyncio
+import time
+import numpy
+import tornado.websocket
+
+from event import Event
+from connectivity.event_packing import EventPacker, WIRE_FORMATS
+from connectivity.websocket_server import WebsocketServer, WEBSOCKET_PORT, WEBSOCKET_APPLICATION
+
+def send_packing_once(server, event):
+    server.send_event_to_subscribers(event)
+
+def send_packing_per_client(server, event):
+    for handler in list(server.client_handlers):
+        if event.type in handler.subscribed_events:
+            handler.write_message(EventPacker.pack(event))
+
+async def connect_clients(server, num_clients, wire_format):
+    address = "ws://localhost:%d%s" % (WEBSOCKET_PORT, WEBSOCKET_APPLICATION)
+    clients = []
+    for n in range(num_clients):
+        client = await tornado.websocket.websocket_connect(address)
+        await client.write_message(EventPacker.pack(Event(Event.SET_WIRE_FORMAT, wire_format)))
+        await client.write_message(EventPacker.pack(Event(Event.SUBSCRIBE, [Event.OUTPUT])))
+        clients.append(client)
+    while len(server.client_handlers) < num_clients or \
+          any(Event.OUTPUT not in handler.subscribed_events for handler in server.client_handlers):
+        await asyncio.sleep(0.01)
+    return clients
+
+async def disconnect_clients(server, clients):
+    for client in clients:
+        client.close()
+    while len(server.client_handlers) > 0:
+        await asyncio.sleep(0.01)
+
+async def measure(server, clients, send, events):
+    duration = 0.
+    for event in events:
+        time_before = time.process_time()
+        send(server, event)
+        duration += time.process_time() - time_before
+        for client in clients:
+            await client.read_message()
+    return duration / len(events)
+
+async def main(args):
+    server = WebsocketServer()
+    random_state = numpy.random.RandomState(0)
+    events = [Event(Event.OUTPUT, random_state.uniform(-1, 1, (args.num_joints, 4)))
+              for n in range(args.num_events)]
+    print("%10s%18s%24s" % ("clients", "once (us/event)", "per client (us/event)"))
+    for num_clients in args.num_clients:
+        clients = await connect_clients(server, num_clients, args.wire_format)
+        once_duration = await measure(server, clients, send_packing_once, events)
+        per_client_duration = await measure(server, clients, send_packing_per_client, events)
+        await disconnect_clients(server, clients)
+        print("%10d%18.1f%24.1f" % (num_clients, once_duration * 1e6, per_client_duration * 1e6))
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--num-clients", type=int, nargs="+", default=[1, 2, 5, 10, 20, 50])
+    parser.add_argument("--num-joints", type=int, default=72)
+    parser.add_argument("--num-events", type=int, default=100)
+    parser.add_argument("--wire-format", choices=WIRE_FORMATS, default="json")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -11,6 +11,7 @@ from collections import defaultdict
 from .bvh import Hierarchy, ScaleInfo, JointDefinition
 from .geo import make_translation_matrix
 from numpy import array
+from startup_profiler import profiler as startup_profiler
 
 CHANNEL_TO_AXIS = {
     "Xrotation": "x",
@@ -36,11 +37,12 @@ class BvhReader(cgkit.bvh.BVHReader):
     def _load_from_cache(self):
         cache_filename = self._cache_filename()
         # print "loading BVH cache from %s ..." % cache_filename
-        f = open(cache_filename, 'rb')
-        self._scale_info = ScaleInfo()
-        self._scale_info.__dict__ = pickle.load(f)
-        self._unique_rotations = pickle.load(f)
-        f.close()
+        with startup_profiler.phase("BVH cache load"):
+            f = open(cache_filename, 'rb')
+            self._scale_info = ScaleInfo()
+            self._scale_info.__dict__ = pickle.load(f)
+            self._unique_rotations = pickle.load(f)
+            f.close()
         # print "ok"
 
     def _save_to_cache(self):
@@ -56,7 +58,8 @@ class BvhReader(cgkit.bvh.BVHReader):
         return "%s.cache" % self.filename
 
     def _read(self, read_frames):
-        cgkit.bvh.BVHReader.read(self, read_frames)
+        with startup_profiler.phase("BVH load"):
+            cgkit.bvh.BVHReader.read(self, read_frames)
         self.hierarchy = self._create_hierarchy()
         self._num_joints = self.hierarchy.get_num_joints()
         self._duration = self._num_frames * self._frame_time
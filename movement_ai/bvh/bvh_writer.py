@@ -64,9 +64,7 @@ class BvhWriter:
         self._write("\t" * self._indent)
 
     def _write_frame(self, frame):
-        for value in frame:
-            self._write("%s " % value)
-        self._write("\n")
+        self._write("".join("%s " % value for value in frame) + "\n")
 
     def _write(self, string):
         self._output.write(string)
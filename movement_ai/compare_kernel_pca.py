@@ -0,0 +1,64 @@
+# Compares NystroemKernelPCA against exact KernelPCA with respect to reconstruction error
+# and fit/transform/inverse-transform time.
+#
+# Example usage:
+# python compare_kernel_pca.py profiles/dimensionality_reduction/valencia_pn.data -n 7 --num-landmarks 100 300 1000
+
+from argparse import ArgumentParser
+import numpy
+import time
+
+import storage
+from dimensionality_reduction.factory import DimensionalityReductionFactory
+
+parser = ArgumentParser()
+parser.add_argument("training_data", help="Training data file, e.g. profiles/dimensionality_reduction/<profile>.data")
+parser.add_argument("--num-components", "-n", type=int, default=7)
+parser.add_argument("--pca-kernel", default="poly")
+parser.add_argument("--num-landmarks", type=int, nargs="+", default=[100, 300, 1000])
+parser.add_argument("--max-exact-samples", type=int,
+                    help="Subsample the training data for exact KernelPCA, which fits in O(N^3)")
+parser.add_argument("--random-seed", type=int, default=0)
+args = parser.parse_args()
+
+training_data = numpy.array(storage.load(args.training_data))
+num_input_dimensions = training_data.shape[1]
+random_state = numpy.random.RandomState(args.random_seed)
+
+def measure(type_name, args_string, fitting_data):
+    student = DimensionalityReductionFactory.create(
+        type_name, num_input_dimensions, args.num_components, args_string)
+    time_before_fit = time.time()
+    student.fit(fitting_data)
+    time_before_transform = time.time()
+    reductions = student.transform(training_data)
+    time_before_inverse = time.time()
+    reconstructions = student.inverse_transform(reductions)
+    time_after_inverse = time.time()
+    mean_squared_error = ((training_data - reconstructions) ** 2).mean(axis=None)
+    return (len(fitting_data),
+            time_before_transform - time_before_fit,
+            time_before_inverse - time_before_transform,
+            time_after_inverse - time_before_inverse,
+            mean_squared_error)
+
+if args.max_exact_samples and args.max_exact_samples < len(training_data):
+    exact_fitting_data = training_data[
+        random_state.choice(len(training_data), args.max_exact_samples, replace=False)]
+else:
+    exact_fitting_data = training_data
+
+results = [("KernelPCA", measure(
+    "KernelPCA", "--pca-kernel=%s" % args.pca_kernel, exact_fitting_data))]
+for num_landmarks in args.num_landmarks:
+    results.append(("Nystroem %d" % num_landmarks, measure(
+        "NystroemKernelPCA",
+        "--pca-kernel=%s --num-landmarks=%d" % (args.pca_kernel, num_landmarks),
+        training_data)))
+
+format = "%-16s%-10s%-12s%-14s%-12s%-12s"
+print(format % ("model", "N", "fit (s)", "transform (s)", "inverse (s)", "MSE"))
+for name, (num_samples, fit_time, transform_time, inverse_time, mean_squared_error) in results:
+    print(format % (
+        name, num_samples, "%.3f" % fit_time, "%.3f" % transform_time, "%.3f" % inverse_time,
+        "%.5f" % mean_squared_error))
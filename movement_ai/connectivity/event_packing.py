@@ -1,7 +1,12 @@
 import json
+import struct
 from event import Event
 import numpy
 
+JSON = "json"
+BINARY = "binary"
+WIRE_FORMATS = [JSON, BINARY]
+
 class EventPacker:
     @classmethod
     def pack(cls, event):
@@ -57,3 +62,64 @@ class EventPacker:
             pass
 
         return obj
+
+# Compact alternative to the JSON format for events whose content is a numeric array,
+# such as per-frame outputs and observed reductions. An event is packed as a header of
+# little-endian bytes, followed by the array's values as float32 or int32:
+#
+#   uint8   format version
+#   uint8   event type id, i.e. index in BINARY_EVENT_TYPES
+#   uint8   dtype id, i.e. index in BINARY_DTYPES
+#   uint8   number of dimensions
+#   uint32  size of each dimension
+#
+# The header is a multiple of 4 bytes long, so that the values can be viewed as a typed
+# array in the browser without copying. See html5/event_packing.js for the decoder.
+#
+# BINARY_EVENT_TYPES must only be appended to, and kept in sync with the decoder.
+
+BINARY_FORMAT_VERSION = 1
+BINARY_EVENT_TYPES = [
+    Event.INPUT,
+    Event.OUTPUT,
+    Event.REDUCTION,
+    Event.NORMALIZED_OBSERVED_REDUCTIONS,
+    Event.FEATURES,
+    Event.TARGET_FEATURES,
+    Event.TARGET_REDUCTION,
+    Event.FEATURE_MATCH_OUTPUT,
+    Event.IO_BLEND,
+    Event.NEIGHBORS_CENTER,
+    ]
+BINARY_DTYPES = [numpy.dtype("<f4"), numpy.dtype("<i4")]
+
+class BinaryEventPacker:
+    _type_ids = dict((event_type, index) for index, event_type in enumerate(BINARY_EVENT_TYPES))
+
+    @classmethod
+    def can_pack(cls, event):
+        return event.type in cls._type_ids and \
+            isinstance(event.content, numpy.ndarray) and \
+            event.content.dtype.kind in "fi"
+
+    @classmethod
+    def pack(cls, event):
+        if not cls.can_pack(event):
+            raise TypeError("Event %s cannot be packed as binary" % event.type)
+        array = event.content
+        dtype_id = 0 if array.dtype.kind == "f" else 1
+        header = struct.pack(
+            "<BBBB%dI" % array.ndim,
+            BINARY_FORMAT_VERSION, cls._type_ids[event.type], dtype_id, array.ndim,
+            *array.shape)
+        return header + array.astype(BINARY_DTYPES[dtype_id], copy=False).tobytes()
+
+    @classmethod
+    def unpack(cls, data):
+        version, type_id, dtype_id, num_dimensions = struct.unpack_from("<BBBB", data)
+        if version != BINARY_FORMAT_VERSION:
+            raise Exception("unsupported binary event format version %d" % version)
+        shape = struct.unpack_from("<%dI" % num_dimensions, data, 4)
+        content = numpy.frombuffer(
+            data, dtype=BINARY_DTYPES[dtype_id], offset=4 + 4 * num_dimensions).reshape(shape)
+        return Event(BINARY_EVENT_TYPES[type_id], content.copy())
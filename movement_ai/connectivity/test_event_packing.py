@@ -3,7 +3,7 @@ import numpy
 
 import sys
 sys.path.insert(0, ".")
-from .event_packing import EventPacker
+from .event_packing import EventPacker, BinaryEventPacker
 from event import Event
 
 class EventPackerTestCase(unittest.TestCase):
@@ -31,3 +31,30 @@ class EventPackerTestCase(unittest.TestCase):
     def _test_roundtrip(self, content):
         event = Event("some type", content)
         self.assertEqual(event, EventPacker.unpack(EventPacker.pack(event)))
+
+class BinaryEventPackerTestCase(unittest.TestCase):
+    def test_float_array_is_packed_as_float32(self):
+        content = numpy.random.RandomState(0).uniform(-1, 1, (72, 4))
+        unpacked_event = BinaryEventPacker.unpack(
+            BinaryEventPacker.pack(Event(Event.OUTPUT, content)))
+        self.assertEqual(Event.OUTPUT, unpacked_event.type)
+        self.assertEqual(numpy.float32, unpacked_event.content.dtype)
+        numpy.testing.assert_array_equal(content.astype(numpy.float32), unpacked_event.content)
+
+    def test_int_array(self):
+        content = numpy.arange(6).reshape(2, 3)
+        unpacked_event = BinaryEventPacker.unpack(
+            BinaryEventPacker.pack(Event(Event.REDUCTION, content)))
+        numpy.testing.assert_array_equal(content, unpacked_event.content)
+
+    def test_header_is_aligned_for_float32_values(self):
+        content = numpy.zeros((2, 3, 4))
+        packed_event = BinaryEventPacker.pack(Event(Event.OUTPUT, content))
+        self.assertEqual(4 + 3 * 4 + content.size * 4, len(packed_event))
+
+    def test_only_arrays_of_binary_event_types_can_be_packed(self):
+        self.assertTrue(BinaryEventPacker.can_pack(Event(Event.INPUT, numpy.zeros(3))))
+        self.assertFalse(BinaryEventPacker.can_pack(Event(Event.INPUT, [0., 0., 0.])))
+        self.assertFalse(BinaryEventPacker.can_pack(Event(Event.FRAME_COUNT, numpy.zeros(3))))
+        self.assertFalse(BinaryEventPacker.can_pack(Event(Event.INPUT, numpy.array(["a"]))))
+        self.assertRaises(TypeError, BinaryEventPacker.pack, Event(Event.FRAME_COUNT, 1))
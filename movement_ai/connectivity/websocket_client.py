@@ -1,19 +1,22 @@
 import ws4py.client.threadedclient
 from connectivity.websocket_server import WEBSOCKET_PORT, WEBSOCKET_APPLICATION
 from event import Event
-from connectivity.event_packing import EventPacker
+from connectivity.event_packing import EventPacker, BinaryEventPacker, BINARY
 import contextlib
 from tornado.stack_context import StackContext
 import time
 
 class WebsocketClient(ws4py.client.threadedclient.WebSocketClient):
-    def __init__(self, host):
+    def __init__(self, host, binary=False):
         address = "ws://%s:%s%s" % (host, WEBSOCKET_PORT, WEBSOCKET_APPLICATION)
         ws4py.client.threadedclient.WebSocketClient.__init__(self, address)
         self._event_listener = self
+        self._binary = binary
 
     def opened(self):
         print("connected to server")
+        if self._binary:
+            self.send_event(Event(Event.SET_WIRE_FORMAT, BINARY))
         self.send_event(Event(Event.SUBSCRIBE, self._event_listener.get_handled_events()))
 
     def closed(self, code, reason=None):
@@ -38,7 +41,10 @@ class WebsocketClient(ws4py.client.threadedclient.WebSocketClient):
 
     def received_message(self, message):
         with StackContext(self._print_exception):
-            event = EventPacker.unpack(str(message))
+            if message.is_binary:
+                event = BinaryEventPacker.unpack(message.data)
+            else:
+                event = EventPacker.unpack(str(message))
             self._event_listener.received_event(event)
 
     def received_event(self, event):
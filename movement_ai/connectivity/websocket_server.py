@@ -1,9 +1,10 @@
+import threading
 import tornado.web
 import tornado.ioloop
 import tornado.websocket
 from tornado.httpserver import HTTPServer
 from event import Event
-from connectivity.event_packing import EventPacker
+from connectivity.event_packing import EventPacker, BinaryEventPacker, JSON, BINARY, WIRE_FORMATS
 
 WEBSOCKET_APPLICATION = "/aiam"
 WEBSOCKET_PORT = 15001
@@ -11,12 +12,14 @@ WEBSOCKET_PORT = 15001
 class ClientHandler(tornado.websocket.WebSocketHandler):
     def __init__(self, server, request, **kwargs):
         super(ClientHandler, self).__init__(server, request, **kwargs)
-        self.subscribed_events = []
+        self.subscribed_events = set()
+        self.wire_format = JSON
         self._server = server
         server.client_handlers.add(self)
 
     def on_close(self):
         self._server.client_handlers.remove(self)
+        self._server.set_subscriptions(self, [])
         
     def on_message(self, message):
         event = EventPacker.unpack(str(message))
@@ -24,14 +27,20 @@ class ClientHandler(tornado.websocket.WebSocketHandler):
 
     def _handle_event(self, event):
         if event.type == Event.SUBSCRIBE:
-            self.subscribed_events = event.content
+            self.subscribed_events = set(event.content)
+            self._server.set_subscriptions(self, self.subscribed_events)
             self.registered()
+        elif event.type == Event.SET_WIRE_FORMAT:
+            if event.content not in WIRE_FORMATS:
+                raise Exception("unknown wire format %r" % event.content)
+            self.wire_format = event.content
         else:
             self.received_event(event, self)
         
     def send_event(self, event):
         if event.type in self.subscribed_events:
-            self.write_message(EventPacker.pack(event))
+            message, is_binary = self._server.pack_event(event, self.wire_format)
+            self.write_message(message, binary=is_binary)
 
     def registered(self):
         pass
@@ -51,6 +60,10 @@ class WebsocketServer(tornado.web.Application):
         self._loop = tornado.ioloop.IOLoop.instance()
         self._listen(WEBSOCKET_PORT)
         self.client_handlers = set()
+        self._subscribers = {}
+        self._packing_lock = threading.Lock()
+        self._last_packed_event = None
+        self._packed_messages = {}
 
     def _listen(self, port, address="", **kwargs):
         self._server = HTTPServer(self, **kwargs)
@@ -67,7 +80,30 @@ class WebsocketServer(tornado.web.Application):
         periodic_callback = tornado.ioloop.PeriodicCallback(callback, callback_time, self._loop)
         periodic_callback.start()
 
+    def set_subscriptions(self, handler, event_types):
+        for subscribers in self._subscribers.values():
+            subscribers.discard(handler)
+        for event_type in event_types:
+            self._subscribers.setdefault(event_type, set()).add(handler)
+
     def client_subscribes_to(self, event_type):
-        for handler in self.client_handlers:
-            if event_type in handler.subscribed_events:
-                return True
+        return len(self._subscribers.get(event_type, ())) > 0
+
+    def send_event_to_subscribers(self, event):
+        for handler in list(self._subscribers.get(event.type, ())):
+            handler.send_event(event)
+
+    def pack_event(self, event, wire_format):
+        # An event is typically sent to each subscriber in turn, so the messages of the
+        # last packed event are kept, encoded as bytes, to write the same ones to all.
+        with self._packing_lock:
+            if event is not self._last_packed_event:
+                self._last_packed_event = event
+                self._packed_messages = {}
+            if wire_format not in self._packed_messages:
+                if wire_format == BINARY and BinaryEventPacker.can_pack(event):
+                    self._packed_messages[wire_format] = (BinaryEventPacker.pack(event), True)
+                else:
+                    self._packed_messages[wire_format] = (
+                        EventPacker.pack(event).encode("utf-8"), False)
+            return self._packed_messages[wire_format]
@@ -1,3 +1,6 @@
+import startup_profiler
+startup_profiler.start_if_requested()
+
 from dimensionality_reduction.dimensionality_reduction_experiment import *
 
 parser = ArgumentParser()
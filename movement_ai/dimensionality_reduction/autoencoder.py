@@ -165,6 +165,16 @@ class AutoEncoder(DimensionalityReduction):
         with self._graph.as_default():
             return self._sess.run(self._reconstructed_input, feed_dict={self._encoded_x: reductions})
     
+    def get_model_state(self):
+        with self._graph.as_default():
+            variables = tf.global_variables()
+            return dict(zip([variable.name for variable in variables], self._sess.run(variables)))
+
+    def set_model_state(self, state):
+        with self._graph.as_default():
+            for variable in tf.global_variables():
+                variable.load(state[variable.name], self._sess)
+
     def save_model(self, path):
         with self._graph.as_default():
             with tempfile.TemporaryDirectory() as tempdir:
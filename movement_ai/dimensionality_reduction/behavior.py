@@ -33,4 +33,6 @@ class Behavior:
 
     def set_normalized_observed_reductions(self, normalized_observed_reductions):
         pass
-    
+
+    def tear_down(self):
+        pass
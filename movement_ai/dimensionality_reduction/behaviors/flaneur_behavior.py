@@ -14,13 +14,17 @@ class FlaneurParameters(Parameters):
                            choices=ParameterFloatRange(0., 1.))
 
 class FlaneurBehavior(Behavior):
-    def __init__(self, student, parameters, normalized_observed_reductions):
+    def __init__(self, student, parameters, num_precomputed_steps=1):
         Behavior.__init__(self)
         self._student = student
         self._parameters = parameters
         parameters.add_listener(self._parameter_changed)
-        self._flaneur = Flaneur(normalized_observed_reductions)
+        self._flaneur = Flaneur(spatial_index=student.get_spatial_index())
         self._update_flaneur_from_parameters()
+        self._num_precomputed_steps = num_precomputed_steps
+        self._precomputed_positions = []
+        self._precomputed_neighbors_centers = []
+        self._position = self._flaneur.get_position()
 
     def _update_flaneur_from_parameters(self):
         for parameter in self._parameters:
@@ -33,12 +37,16 @@ class FlaneurBehavior(Behavior):
         setattr(self._flaneur, parameter.name, parameter.value())
 
     def proceed(self, time_increment):
-        self._flaneur.proceed(time_increment)
-        self.notify(Event(Event.NEIGHBORS_CENTER, self._flaneur.get_neighbors_center()))
+        # Steps are computed in batches of num_precomputed_steps, so parameter and map
+        # changes take effect with a delay of up to that many steps.
+        if len(self._precomputed_positions) == 0:
+            self._precomputed_positions, self._precomputed_neighbors_centers = \
+                self._flaneur.proceed_steps(time_increment, self._num_precomputed_steps)
+        self._position = self._precomputed_positions.pop(0)
+        self.notify(Event(Event.NEIGHBORS_CENTER, self._precomputed_neighbors_centers.pop(0)))
 
     def get_reduction(self):
-        normalized_position = self._flaneur.get_position()
-        return self._student.unnormalize_reduction(normalized_position)
+        return self._student.unnormalize_reduction(self._position)
 
     def set_reduction(self, reduction):
         pass
@@ -68,7 +68,6 @@ class Hybrid(Behavior):
                  feature_matcher,
                  sampled_reductions,
                  num_components,
-                 normalized_observed_reductions,
                  parameters,
                  show_all_feature_matches):
         Behavior.__init__(self)
@@ -78,16 +77,15 @@ class Hybrid(Behavior):
         self._show_all_feature_matches = show_all_feature_matches
         self._parameters = parameters
         parameters.add_listener(self._parameter_changed)
-        self._create_flaneur(normalized_observed_reductions)
+        self._create_flaneur()
         self._create_imitate(feature_matcher, sampled_reductions)
-        n_dimensions = len(normalized_observed_reductions[0])
         self._position = None
         self._direction = None
         self._orientation_state = None
         self.handle_user_intensity(None)
 
     def set_normalized_observed_reductions(self, normalized_observed_reductions):
-        self._flaneur.set_normalized_observed_reductions(normalized_observed_reductions)
+        self._flaneur.set_map_points(normalized_observed_reductions)
 
     def _parameter_changed(self, hybrid_parameter):
         if hasattr(hybrid_parameter, "flaneur_parameter_name"):
@@ -99,10 +97,10 @@ class Hybrid(Behavior):
                 hybrid_parameter.imitate_parameter_name)
             imitate_parameter.set_value(hybrid_parameter.value())
 
-    def _create_flaneur(self, map_points):
+    def _create_flaneur(self):
         self._flaneur_parameters = FlaneurParameters()
         self._flaneur_parameters.add_listener(self._flaneur_parameter_changed)
-        self._flaneur = Flaneur(map_points)
+        self._flaneur = Flaneur(spatial_index=self._student.get_spatial_index())
 
     def _flaneur_parameter_changed(self, parameter):
         self._update_flaneur_from_parameter(parameter)
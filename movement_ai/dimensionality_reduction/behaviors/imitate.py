@@ -20,7 +20,7 @@ class ImitateParameters(Parameters):
             choices=ParameterFloatRange(0., 1.))
 
 THRESHOLD_DISTANCE_TO_TARGET = 0.01
-TARGET_FEATURE_PROCESSING_RATE = 10
+TARGET_FEATURE_PROCESSING_RATE = None # None: process new target features in every frame
 
 class Imitate(Behavior):
     def __init__(self,
@@ -43,7 +43,10 @@ class Imitate(Behavior):
         self._direction = None
         self._max_normalized_distance = math.sqrt(num_components)
         self._last_target_feature_processing_time = None
-        self._max_time_between_target_feature_processing = 1.0 / TARGET_FEATURE_PROCESSING_RATE
+        if TARGET_FEATURE_PROCESSING_RATE is None:
+            self._max_time_between_target_feature_processing = None
+        else:
+            self._max_time_between_target_feature_processing = 1.0 / TARGET_FEATURE_PROCESSING_RATE
 
     def proceed(self, time_increment):
         self._potentially_process_new_target_features()
@@ -72,17 +75,15 @@ class Imitate(Behavior):
             self._last_target_feature_processing_time = time.time()
 
     def _target_feature_processing_is_timely(self):
-        if self._last_target_feature_processing_time is None:
+        if self._last_target_feature_processing_time is None or \
+           self._max_time_between_target_feature_processing is None:
             return True
         else:
             time_since_last_processing = time.time() - self._last_target_feature_processing_time
             return time_since_last_processing > self._max_time_between_target_feature_processing
 
     def _process_target_features(self, target_features):
-        distances_list, sampled_reductions_indices_list = self._feature_matcher.kneighbors(
-            target_features, return_distance=True)
-        distances = distances_list[0]
-        sampled_reductions_indices = sampled_reductions_indices_list[0]
+        distances, sampled_reductions_indices = self._feature_matcher.match_one(target_features)
         matched_reductions = [
             self._sampled_reductions[index]
             for index in sampled_reductions_indices]
@@ -3,6 +3,9 @@ from navigator import Navigator, PathFollower
 import interpolation
 import dynamics as dynamics_module
 import numpy
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dimensionality_reduction.behavior import Behavior
 
 # WAITING_PARAMETERS = {
@@ -22,6 +25,10 @@ PASSIVE_PARAMETERS = {
 
 WAITING_PARAMETERS = PASSIVE_PARAMETERS
 
+# A path planned in the background is only used if it departs from within this distance
+# of the actual departure when the next move starts
+PLANNED_DEPARTURE_TOLERANCE = 0.05
+
 INTENSE_PARAMETERS = {
     "velocity": 1.0,
     "novelty": 1.0,
@@ -48,9 +55,22 @@ class ImproviseParameters(Parameters):
                            choices=ParameterFloatRange(0., 1.))
         self.add_parameter("factor", type=float, default=1,
                            choices=ParameterFloatRange(1., 10.))
+        self.add_parameter("num_destination_candidates", type=int, default=50)
+
+class PlannedMove:
+    # A path being planned on the planning thread, and what it is planned from, so that
+    # the same path can be planned synchronously if it is not ready in time.
+    def __init__(self, departure, spatial_index, random_seed, planning_parameters):
+        self.departure = departure
+        self.spatial_index = spatial_index
+        self.random_seed = random_seed
+        self.planning_parameters = planning_parameters
+        self.stop_planning = threading.Event()
+        self.future = None
 
 class Improvise(Behavior):
-    def __init__(self, student, num_components, params, preferred_location, max_novelty, on_changed_path=None):
+    def __init__(self, student, num_components, params, preferred_location, max_novelty, on_changed_path=None,
+                 plan_in_background=True):
         Behavior.__init__(self)
         self._student = student
         self._num_components = num_components
@@ -60,40 +80,117 @@ class Improvise(Behavior):
         self._path = None
         self._path_follower = None
         self._on_changed_path = on_changed_path
-        self._navigator = Navigator(
-            map_points=student.normalized_observed_reductions)
-        if preferred_location is not None:
-            self._navigator.set_preferred_location(preferred_location)
+        self._navigator = self._create_navigator(student.get_spatial_index())
         self._unadjusted_reduction = None
         self._reduction = None
+        self._plan_in_background = plan_in_background
+        self._planning_executor = None
+        self._planned_move = None
+        self.num_moves = 0
+        self.num_planning_fallbacks = 0
+        self.num_discarded_planned_paths = 0
+
+    def _create_navigator(self, spatial_index, random_seed=None):
+        navigator = Navigator(spatial_index=spatial_index, random_seed=random_seed)
+        if self._preferred_location is not None:
+            navigator.set_preferred_location(self._preferred_location)
+        return navigator
 
     def set_normalized_observed_reductions(self, normalized_observed_reductions):
         self._navigator.set_map_points(normalized_observed_reductions)
         
     def select_next_move(self):
-        found_non_empty_path = False
-        while not found_non_empty_path:
-            path_segments = self._generate_path()
-            self._path = self._interpolate_path(path_segments)
-            if len(self._path) > 0:
-                found_non_empty_path = True
+        departure = self._departure()
+        path = self._take_planned_path(departure)
+        if path is None:
+            path = self._plan_path(self._navigator, departure, self._get_planning_parameters())
+        self._path = path
         self._path_follower = self._create_path_follower(self._path)
+        self.num_moves += 1
+        if self._plan_in_background:
+            self._plan_next_path_in_background(self._path[-1])
         if self._on_changed_path:
             self._on_changed_path()
 
-    def _generate_path(self):
-        while True:
-            path = self._generate_potentially_empty_path()
+    def _take_planned_path(self, departure):
+        if self._planned_move is None:
+            return None
+        planned_move = self._planned_move
+        self._planned_move = None
+        if numpy.linalg.norm(planned_move.departure - departure) > PLANNED_DEPARTURE_TOLERANCE or \
+           planned_move.planning_parameters != self._get_planning_parameters():
+            planned_move.stop_planning.set()
+            self.num_discarded_planned_paths += 1
+            return None
+        if not planned_move.future.done():
+            # The stale job is stopped rather than cancelled, as it may already be running,
+            # and the same path is planned here so that it does not depend on timing.
+            planned_move.stop_planning.set()
+            self.num_planning_fallbacks += 1
+            navigator = self._create_navigator(planned_move.spatial_index, planned_move.random_seed)
+            return self._plan_path(
+                navigator, planned_move.departure, planned_move.planning_parameters)
+        if planned_move.future.exception() is not None:
+            self.num_discarded_planned_paths += 1
+            return None
+        return planned_move.future.result()
+
+    def _plan_next_path_in_background(self, departure):
+        # The next path is planned while the current one is being followed, using a
+        # snapshot of the map points and the parameters as they are now. The seed is drawn
+        # here rather than on the planning thread, so that --random-seed keeps paths
+        # reproducible.
+        if self._planning_executor is None:
+            self._planning_executor = ThreadPoolExecutor(max_workers=1)
+        planned_move = PlannedMove(
+            departure,
+            self._student.get_spatial_index().snapshot(),
+            random.getrandbits(32),
+            self._get_planning_parameters())
+        navigator = self._create_navigator(planned_move.spatial_index, planned_move.random_seed)
+        planned_move.future = self._planning_executor.submit(
+            self._plan_path, navigator, departure, planned_move.planning_parameters,
+            planned_move.stop_planning)
+        self._planned_move = planned_move
+
+    def tear_down(self):
+        if self._planned_move is not None:
+            self._planned_move.stop_planning.set()
+        if self._planning_executor is not None:
+            self._planning_executor.shutdown(wait=False)
+
+    def _get_planning_parameters(self):
+        return {"num_segments": self.params.num_segments,
+                "novelty": self.params.novelty * self._max_novelty,
+                "extension": self.params.extension,
+                "location_preference": self.params.location_preference,
+                "num_destination_candidates": self.params.num_destination_candidates,
+                "resolution": self.params.resolution}
+
+    def _plan_path(self, navigator, departure, planning_parameters, stop_planning=None):
+        # Returns None if stop_planning is set before a path is found
+        while not _is_set(stop_planning):
+            path_segments = self._generate_path(
+                navigator, departure, planning_parameters, stop_planning)
+            if path_segments is None:
+                break
+            path = self._interpolate_path(path_segments, planning_parameters["resolution"])
             if len(path) > 0:
                 return path
-
-    def _generate_potentially_empty_path(self):
-        return self._navigator.generate_path(
-            departure = self._departure(),
-            num_segments = self.params.num_segments,
-            novelty = self.params.novelty * self._max_novelty,
-            extension = self.params.extension,
-            location_preference = self.params.location_preference)
+        return None
+
+    def _generate_path(self, navigator, departure, planning_parameters, stop_planning=None):
+        while not _is_set(stop_planning):
+            path = navigator.generate_path(
+                departure = departure,
+                num_segments = planning_parameters["num_segments"],
+                novelty = planning_parameters["novelty"],
+                extension = planning_parameters["extension"],
+                location_preference = planning_parameters["location_preference"],
+                num_destination_candidates = planning_parameters["num_destination_candidates"])
+            if len(path) > 0:
+                return path
+        return None
 
     def _departure(self):
         if self._unadjusted_reduction is None:
@@ -106,10 +203,10 @@ class Improvise(Behavior):
             unnormalized_departure = self._unadjusted_reduction
             return self._student.normalize_reduction(unnormalized_departure)
 
-    def _interpolate_path(self, path_segments):
+    def _interpolate_path(self, path_segments, resolution):
         return interpolation.interpolate(
             path_segments,
-            resolution=self.params.resolution)
+            resolution=resolution)
 
     def _create_path_follower(self, path):
         dynamics_class = getattr(dynamics_module, "%s_dynamics" % self.params.dynamics)
@@ -150,3 +247,6 @@ class Improvise(Behavior):
     def _set_parameters(self, parameters_dict):
         for name, value in parameters_dict.items():
             self.params.get_parameter(name).set_value(value)
+
+def _is_set(event):
+    return event is not None and event.is_set()
@@ -0,0 +1,155 @@
+from navigator import Navigator
+import interpolation
+import dynamics as dynamics_module
+import numpy
+from dimensionality_reduction.behavior import Behavior
+
+# Navigation state of many improvising agents, held in arrays so that all agents are
+# advanced together. The agents share one set of ImproviseParameters and follow paths
+# planned like those of Improvise, but the paths of all agents that reach their
+# destination in the same frame are planned as one batch.
+#
+# Each agent's path is stored as its interpolated points and the cumulative time at
+# which each point is reached, padded to the length of the longest path by repeating the
+# last point.
+class ImproviseCrowd:
+    def __init__(self, student, num_agents, params, preferred_location, max_novelty):
+        self._student = student
+        self.num_agents = num_agents
+        self.params = params
+        self._max_novelty = max_novelty
+        self._navigator = Navigator(spatial_index=student.get_spatial_index())
+        num_dimensions = student.num_reduced_dimensions
+        if preferred_location is not None:
+            self._navigator.set_preferred_location(preferred_location)
+            departure = preferred_location
+        else:
+            departure = numpy.array([.5] * num_dimensions)
+        self.positions = numpy.tile(numpy.asarray(departure, dtype=float), (num_agents, 1))
+        self.velocities = numpy.zeros(num_agents)
+        self.strip_indices = numpy.zeros(num_agents, dtype=int)
+        self.remaining_durations = numpy.zeros(num_agents)
+        self._path_points = numpy.tile(self.positions[:,numpy.newaxis], (1, 2, 1))
+        self._path_lengths = numpy.zeros(num_agents, dtype=int)
+        self._cumulative_times = numpy.zeros((num_agents, 2))
+        self._elapsed_times = numpy.zeros(num_agents)
+        self._reductions = None
+        self.num_planned_paths = 0
+
+    def proceed(self, time_increment):
+        self._plan_paths(numpy.flatnonzero(
+            (self._path_lengths == 0) | (self._elapsed_times >= self._cumulative_times[:,-1])))
+        self._elapsed_times += time_increment * self.params.velocity
+        self._update_positions()
+        self._reductions = None
+
+    def get_paths(self):
+        return [numpy.array(points[:length])
+                for points, length in zip(self._path_points, self._path_lengths)]
+
+    def get_reductions(self):
+        if self._reductions is None:
+            normalized_positions = (self.positions - 0.5) * self.params.factor + 0.5
+            self._reductions = self._student.unnormalize_reductions(normalized_positions)
+        return self._reductions
+
+    def _plan_paths(self, agent_indices):
+        while len(agent_indices) > 0:
+            path_segments = self._navigator.generate_paths(
+                departures = self.positions[agent_indices],
+                num_segments = self.params.num_segments,
+                novelty = self.params.novelty * self._max_novelty,
+                extension = self.params.extension,
+                location_preference = self.params.location_preference,
+                num_destination_candidates = self.params.num_destination_candidates)
+            paths = interpolation.interpolate_paths(path_segments, self.params.resolution)
+            is_followable = numpy.array([len(path) >= 2 for path in paths])
+            self._set_paths(agent_indices[is_followable],
+                            [path for path in paths if len(path) >= 2])
+            agent_indices = agent_indices[~is_followable]
+
+    def _set_paths(self, agent_indices, paths):
+        if len(paths) == 0:
+            return
+        path_lengths = numpy.array([len(path) for path in paths])
+        self._ensure_path_capacity(path_lengths.max())
+        points = self._pad_paths(paths, self._path_points.shape[1])
+        self._path_points[agent_indices] = points
+        self._path_lengths[agent_indices] = path_lengths
+        self._cumulative_times[agent_indices] = self._get_cumulative_times(points, path_lengths)
+        self._elapsed_times[agent_indices] = 0
+        self.num_planned_paths += len(paths)
+
+    def _ensure_path_capacity(self, path_length):
+        num_padding_points = path_length - self._path_points.shape[1]
+        if num_padding_points > 0:
+            self._path_points = numpy.concatenate([
+                    self._path_points,
+                    numpy.repeat(self._path_points[:,-1:], num_padding_points, axis=1)], axis=1)
+            self._cumulative_times = numpy.concatenate([
+                    self._cumulative_times,
+                    numpy.repeat(self._cumulative_times[:,-1:], num_padding_points, axis=1)], axis=1)
+
+    def _pad_paths(self, paths, length):
+        return numpy.array([
+                numpy.concatenate([path, numpy.repeat(path[-1:], length - len(path), axis=0)])
+                for path in paths])
+
+    def _get_cumulative_times(self, points, path_lengths):
+        # Vectorized over paths, with the same strip durations and velocity correction as
+        # PathFollower. Padding strips have zero length and hence zero duration.
+        strip_distances = numpy.linalg.norm(numpy.diff(points, axis=1), axis=2)
+        relative_cursors = numpy.arange(strip_distances.shape[1]) / \
+            path_lengths[:,numpy.newaxis].astype(float)
+        strip_velocities = self._create_dynamics().velocity(relative_cursors)
+        strip_durations = strip_distances / strip_velocities
+        uncorrected_durations = strip_durations.sum(axis=1)
+        total_distances = strip_distances.sum(axis=1)
+        velocity_corrections = numpy.ones(len(points))
+        has_duration = uncorrected_durations > 0
+        velocity_corrections[has_duration] = \
+            total_distances[has_duration] / uncorrected_durations[has_duration]
+        strip_durations *= velocity_corrections[:,numpy.newaxis]
+        return numpy.concatenate([
+                numpy.zeros((len(points), 1)), numpy.cumsum(strip_durations, axis=1)], axis=1)
+
+    def _create_dynamics(self):
+        dynamics_class = getattr(dynamics_module, "%s_dynamics" % self.params.dynamics)
+        return dynamics_class(min_relative_velocity=self.params.min_relative_velocity)
+
+    def _update_positions(self):
+        agents = numpy.arange(self.num_agents)
+        strip_indices = (self._cumulative_times <= self._elapsed_times[:,numpy.newaxis]).sum(axis=1) - 1
+        strip_indices = numpy.clip(strip_indices, 0, self._path_lengths - 2)
+        strip_start_times = self._cumulative_times[agents, strip_indices]
+        strip_durations = self._cumulative_times[agents, strip_indices + 1] - strip_start_times
+        relative_times = numpy.ones(self.num_agents)
+        has_duration = strip_durations > 0
+        relative_times[has_duration] = numpy.clip(
+            (self._elapsed_times[has_duration] - strip_start_times[has_duration]) /
+            strip_durations[has_duration], 0, 1)
+        strip_departures = self._path_points[agents, strip_indices]
+        strip_vectors = self._path_points[agents, strip_indices + 1] - strip_departures
+        self.positions = strip_departures + strip_vectors * relative_times[:,numpy.newaxis]
+        self.strip_indices = strip_indices
+        self.remaining_durations = numpy.maximum(
+            self._cumulative_times[:,-1] - self._elapsed_times, 0) / self.params.velocity
+        self.velocities = numpy.zeros(self.num_agents)
+        self.velocities[has_duration] = numpy.linalg.norm(strip_vectors[has_duration], axis=1) / \
+            strip_durations[has_duration] * self.params.velocity
+
+class ImproviseCrowdMember(Behavior):
+    # Behavior of one agent in a crowd, e.g. for an avatar in an Application. The whole
+    # crowd is advanced when its first member proceeds, so all members are expected to
+    # proceed once per frame.
+    def __init__(self, crowd, index):
+        Behavior.__init__(self)
+        self._crowd = crowd
+        self._index = index
+
+    def proceed(self, time_increment):
+        if self._index == 0:
+            self._crowd.proceed(time_increment)
+
+    def get_reduction(self):
+        return self._crowd.get_reductions()[self._index]
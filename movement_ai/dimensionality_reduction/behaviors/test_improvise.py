@@ -0,0 +1,107 @@
+import unittest
+import random
+import threading
+import numpy
+from concurrent.futures import ThreadPoolExecutor
+from argparse import ArgumentParser
+
+from ..pca import LinearPCA
+from .improvise import Improvise, ImproviseParameters
+
+class ImproviseTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        parser = ArgumentParser()
+        LinearPCA.add_parser_arguments(parser)
+        self._student = LinearPCA(6, 3, parser.parse_args([]))
+        observations = numpy.random.RandomState(0).uniform(0, 1, (300, 6))
+        self._student.fit(observations)
+        self._student.probe(observations)
+
+    def test_next_path_is_planned_in_background(self):
+        improvise = self._create_improvise(plan_in_background=True)
+        improvise.select_next_move()
+        self._wait_for_planned_path(improvise)
+        planned_path = improvise._planned_move.future.result()
+        self._follow_until_next_move(improvise)
+        self.assertIs(planned_path, improvise.path())
+        self.assertEqual(2, improvise.num_moves)
+        self.assertEqual(0, improvise.num_planning_fallbacks)
+
+    def test_planned_path_departs_from_previous_destination(self):
+        improvise = self._create_improvise(plan_in_background=True)
+        improvise.select_next_move()
+        destination = improvise.path()[-1]
+        self._wait_for_planned_path(improvise)
+        self._follow_until_next_move(improvise)
+        self.assertLess(numpy.linalg.norm(improvise.path()[0] - destination), 0.05)
+
+    def test_planned_path_is_discarded_if_departure_has_changed(self):
+        improvise = self._create_improvise(plan_in_background=True)
+        improvise.select_next_move()
+        self._wait_for_planned_path(improvise)
+        improvise.select_next_move()
+        self.assertEqual(1, improvise.num_discarded_planned_paths)
+
+    def test_planned_path_is_discarded_if_parameters_have_changed(self):
+        improvise = self._create_improvise(plan_in_background=True)
+        improvise.select_next_move()
+        self._wait_for_planned_path(improvise)
+        improvise.params.get_parameter("novelty").set_value(0.9)
+        self._follow_until_next_move(improvise)
+        self.assertEqual(1, improvise.num_discarded_planned_paths)
+        self.assertEqual(0.9, improvise._planned_move.planning_parameters["novelty"])
+
+    def test_synchronous_planning(self):
+        improvise = self._create_improvise(plan_in_background=False)
+        improvise.select_next_move()
+        self._follow_until_next_move(improvise)
+        self.assertIsNone(improvise._planned_move)
+        self.assertEqual(2, improvise.num_moves)
+
+    def test_fallback_plans_same_path_as_background(self):
+        random.seed(1)
+        improvise = self._create_improvise(plan_in_background=True)
+        improvise.select_next_move()
+        self._wait_for_planned_path(improvise)
+        self._follow_until_next_move(improvise)
+        background_path = improvise.path()
+
+        random.seed(1)
+        improvise = self._create_improvise(plan_in_background=True)
+        planning_blocked = self._block_planning(improvise)
+        improvise.select_next_move()
+        stale_future = improvise._planned_move.future
+        self._follow_until_next_move(improvise)
+        planning_blocked.set()
+        self.assertEqual(1, improvise.num_planning_fallbacks)
+        numpy.testing.assert_array_equal(background_path, improvise.path())
+        self.assertIsNone(stale_future.result())
+
+    def test_tear_down_stops_planning(self):
+        improvise = self._create_improvise(plan_in_background=True)
+        planning_blocked = self._block_planning(improvise)
+        improvise.select_next_move()
+        planned_move = improvise._planned_move
+        improvise.tear_down()
+        planning_blocked.set()
+        self.assertIsNone(planned_move.future.result())
+        self.assertRaises(RuntimeError, improvise._planning_executor.submit, lambda: None)
+
+    def _block_planning(self, improvise):
+        planning_blocked = threading.Event()
+        improvise._planning_executor = ThreadPoolExecutor(max_workers=1)
+        improvise._planning_executor.submit(planning_blocked.wait)
+        return planning_blocked
+
+    def _create_improvise(self, plan_in_background):
+        return Improvise(self._student, 3, ImproviseParameters(), None, 1.,
+                         plan_in_background=plan_in_background)
+
+    def _wait_for_planned_path(self, improvise):
+        improvise._planned_move.future.result()
+
+    def _follow_until_next_move(self, improvise):
+        num_moves = improvise.num_moves
+        while improvise.num_moves <= num_moves:
+            improvise.proceed(0.1)
@@ -0,0 +1,62 @@
+import unittest
+import random
+import numpy
+from argparse import ArgumentParser
+
+from navigator import PathFollower
+import dynamics as dynamics_module
+from ..pca import LinearPCA
+from .improvise import ImproviseParameters
+from .improvise_crowd import ImproviseCrowd, ImproviseCrowdMember
+
+NUM_AGENTS = 50
+
+class ImproviseCrowdTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        parser = ArgumentParser()
+        LinearPCA.add_parser_arguments(parser)
+        self._student = LinearPCA(6, 3, parser.parse_args([]))
+        observations = numpy.random.RandomState(0).uniform(0, 1, (300, 6))
+        self._student.fit(observations)
+        self._student.probe(observations)
+        self._params = ImproviseParameters()
+        self._crowd = ImproviseCrowd(self._student, NUM_AGENTS, self._params, None, 1.)
+
+    def test_agents_follow_their_paths(self):
+        for n in range(20):
+            self._crowd.proceed(0.1)
+            for position, path, strip_index in zip(
+                    self._crowd.positions, self._crowd.get_paths(), self._crowd.strip_indices):
+                departure, destination = path[strip_index], path[strip_index + 1]
+                self.assertAlmostEqual(
+                    numpy.linalg.norm(destination - departure),
+                    numpy.linalg.norm(position - departure) + numpy.linalg.norm(destination - position))
+
+    def test_new_paths_depart_from_reached_destinations(self):
+        self._crowd.proceed(0.1)
+        self.assertEqual(NUM_AGENTS, self._crowd.num_planned_paths)
+        while self._crowd.num_planned_paths < 2 * NUM_AGENTS:
+            reached_destination = self._crowd.remaining_durations == 0
+            destinations = [numpy.array(path[-1]) for path in self._crowd.get_paths()]
+            self._crowd.proceed(0.1)
+            for agent in numpy.flatnonzero(reached_destination):
+                self.assertLess(numpy.linalg.norm(
+                        self._crowd.get_paths()[agent][0] - destinations[agent]), 0.05)
+
+    def test_path_durations_equal_path_follower_estimates(self):
+        self._crowd.proceed(0.)
+        dynamics = dynamics_module.sine_dynamics(
+            min_relative_velocity=self._params.min_relative_velocity)
+        for path, cumulative_times, length in zip(
+                self._crowd.get_paths(), self._crowd._cumulative_times, self._crowd._path_lengths):
+            self.assertAlmostEqual(
+                PathFollower(list(path), dynamics).estimated_duration(), cumulative_times[length-1])
+
+    def test_members(self):
+        members = [ImproviseCrowdMember(self._crowd, index) for index in range(NUM_AGENTS)]
+        for member in members:
+            member.proceed(0.1)
+        numpy.testing.assert_array_almost_equal(
+            self._student.unnormalize_reductions(self._crowd.positions),
+            [member.get_reduction() for member in members])
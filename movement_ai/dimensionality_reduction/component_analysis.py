@@ -1,16 +1,46 @@
 import numpy
+from concurrent.futures import ThreadPoolExecutor
 
 class ComponentAnalysis:
-    def __init__(self, pca, num_output_components, parameter_info_getter):
+    def __init__(self, pca, num_output_components, parameter_info_getter,
+                 resolution=10, batch_size=100000, num_threads=1):
         self._pca = pca
         self._parameter_info_getter = parameter_info_getter
         self._num_output_components = num_output_components
+        self._resolution = resolution
+        self._batch_size = batch_size
+        self._num_threads = num_threads
 
     def analyze(self):
-        for n in range(self._pca.num_reduced_dimensions):
-            self._analyze_component(n)
+        component_indices = range(self._pca.num_reduced_dimensions)
+        if self._num_threads > 1:
+            with ThreadPoolExecutor(self._num_threads) as executor:
+                variances_per_component = list(executor.map(self.get_output_variances, component_indices))
+        else:
+            variances_per_component = [self.get_output_variances(n) for n in component_indices]
+        for n, variances in enumerate(variances_per_component):
+            self._print_component(n, variances)
 
-    def _analyze_component(self, n, resolution=10, group_by_parameter_category=True):
+    def get_output_variances(self, n):
+        # For every observation, component n is swept over the normalized range while the other
+        # components keep their observed values. Returns the variance of each output component
+        # across the sweep, summed over observations. All sweeps are inverse-transformed as one
+        # grid, in batches of at most batch_size reductions.
+        normalized_reductions = numpy.asarray(self._pca.normalized_observed_reductions)
+        sweep = numpy.arange(0., 1., 1./self._resolution)
+        num_observations_per_batch = max(1, self._batch_size // len(sweep))
+        variances = numpy.zeros(self._num_output_components)
+        for start in range(0, len(normalized_reductions), num_observations_per_batch):
+            batch = normalized_reductions[start:start+num_observations_per_batch]
+            grid = numpy.repeat(batch, len(sweep), axis=0)
+            grid[:,n] = numpy.tile(sweep, len(batch))
+            reconstructions = self._pca.inverse_transform(self._pca.unnormalize_reductions(grid))
+            reconstructions = reconstructions.reshape(len(batch), len(sweep), -1)
+            variances += numpy.var(
+                reconstructions[:,:,:self._num_output_components], axis=1).sum(axis=0)
+        return variances
+
+    def _print_component(self, n, variances, group_by_parameter_category=True):
         print("component %s:" % n)
 
         output_components = []
@@ -18,28 +48,14 @@ class ComponentAnalysis:
             parameter_info = self._parameter_info_getter(output_component_index)
             output_components.append({"parameter_category": parameter_info["category"],
                                       "parameter_components": [parameter_info["component"]],
-                                      "variance": 0.})
-
-        for normalized_reduction in self._pca.normalized_observed_reductions:
-            reconstructions = []
-            for x in numpy.arange(0., 1., 1./resolution):
-                normalized_reduction[n] = x
-                reduction = self._pca.unnormalize_reduction(normalized_reduction)
-                reconstruction = self._pca.inverse_transform(reduction)[0]
-                reconstructions.append(reconstruction)
-            reconstructions = numpy.array(reconstructions)
-
-            for output_component_index in range(self._num_output_components):
-                variance = numpy.var(reconstructions[:,output_component_index])
-                output_components[output_component_index]["variance"] += variance
+                                      "variance": variances[output_component_index]})
 
         if group_by_parameter_category:
             output_components = self._group_components_by_category(output_components)
         output_components_sorted_by_variance = sorted(
             output_components,
             key=lambda output_component: -output_component["variance"])
-        for i in range(10):
-            output_component = output_components_sorted_by_variance[i]
+        for output_component in output_components_sorted_by_variance[:10]:
             print("  %s [%s] (%s)" % (
                 output_component["parameter_category"],
                 ",".join(output_component["parameter_components"]),
@@ -0,0 +1,37 @@
+import numpy
+import sampling
+
+# Selection of a representative subset (coreset) of the training data in parameter space,
+# so that models whose training cost grows steeply with the number of observations, such
+# as KernelPCA, can be fitted on far fewer of them. Recordings contain many near-duplicate
+# poses, e.g. of standing still, which add little to the model.
+
+METHODS = ["grid", "k-center"]
+
+def select(observations, method, size=None, tolerance=None):
+    # Returns the indices of the selected observations in ascending order.
+    observations = numpy.asarray(observations, dtype=float)
+    if method == "grid":
+        if tolerance is None:
+            raise Exception("grid coreset requires a tolerance")
+        indices = grid_indices(observations, tolerance)
+        if size is not None and len(indices) > size:
+            indices = indices[_k_center_indices(observations[indices], size)]
+    elif method == "k-center":
+        if size is None and tolerance is None:
+            raise Exception("k-center coreset requires a size or a tolerance")
+        indices = _k_center_indices(observations, size, tolerance)
+    else:
+        raise Exception("unknown coreset method %r" % method)
+    return numpy.sort(indices)
+
+def grid_indices(observations, cell_size):
+    # The first observation in each occupied cell of a grid with the given cell size.
+    cells = numpy.floor(observations / cell_size).astype(numpy.int64)
+    _, indices = numpy.unique(cells, axis=0, return_index=True)
+    return indices
+
+def _k_center_indices(observations, size=None, tolerance=None):
+    # Greedy k-center selection, starting from the first observation so that the coreset
+    # does not depend on the random state.
+    return sampling.farthest_point_indices(observations, size, tolerance, first_index=0)
@@ -1,5 +1,8 @@
 import numpy
 import pickle
+from startup_profiler import profiler as startup_profiler
+from spatial_index import SpatialIndex
+from . import model_container
 
 class DimensionalityReduction:
     @staticmethod
@@ -10,26 +13,96 @@ class DimensionalityReduction:
         self.num_input_dimensions = num_input_dimensions
         self.num_reduced_dimensions = num_reduced_dimensions
         self.args = args
+        self._normalized_observed_reductions = None
+        self._spatial_index = None
+        # hash of the saved or loaded model container, if any
+        self.content_hash = None
+
+    @property
+    def normalized_observed_reductions(self):
+        return self._normalized_observed_reductions
+
+    @normalized_observed_reductions.setter
+    def normalized_observed_reductions(self, normalized_observed_reductions):
+        self._normalized_observed_reductions = normalized_observed_reductions
+        if self._spatial_index is not None:
+            self._spatial_index.set_points(normalized_observed_reductions)
+            # the index may hold a converted copy, e.g. of a memory-mapped array, which
+            # behaviors passing the reductions back to the index should find identical
+            self._normalized_observed_reductions = self._spatial_index.points
+
+    def get_spatial_index(self):
+        # Index over the normalized observed reductions, shared by all behaviors and kept
+        # up to date when the reductions are re-probed.
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self._normalized_observed_reductions)
+            self._normalized_observed_reductions = self._spatial_index.points
+        return self._spatial_index
 
     def probe(self, observations):
         observed_reductions = self.transform(observations)
+        self._set_reduction_range(
+            observed_reductions.min(axis=0), observed_reductions.max(axis=0))
+        self.normalized_observed_reductions = self.normalize_reductions(observed_reductions)
+
+    def probe_appended(self, observations, max_num_observed=None):
+        # Cheaper alternative to probe when observations have been appended to those last
+        # probed: only the new observations are transformed, and normalized using the
+        # current reduction range. The oldest reductions are dropped beyond
+        # max_num_observed.
+        new_reductions = self.normalize_reductions(self.transform(numpy.array(observations)))
+        num_evicted = 0
+        if max_num_observed is not None:
+            num_evicted = max(0, len(self._normalized_observed_reductions) + \
+                                  len(new_reductions) - max_num_observed)
+        if self._spatial_index is None:
+            self._normalized_observed_reductions = numpy.concatenate([
+                    self._normalized_observed_reductions[num_evicted:], new_reductions])
+        else:
+            # the index evicts and appends without rebuilding, and then holds the reductions
+            self._spatial_index.insert(new_reductions, num_evicted)
+            self._normalized_observed_reductions = self._spatial_index.points
+
+    def probe_in_chunks(self, get_chunks):
+        # get_chunks returns an iterable of observation chunks. It is invoked twice: once to
+        # find the reduction range and once to normalize the reductions.
+        min_reductions = None
+        max_reductions = None
+        for chunk in get_chunks():
+            reductions = self.transform(chunk)
+            if min_reductions is None:
+                min_reductions = reductions.min(axis=0)
+                max_reductions = reductions.max(axis=0)
+            else:
+                min_reductions = numpy.minimum(min_reductions, reductions.min(axis=0))
+                max_reductions = numpy.maximum(max_reductions, reductions.max(axis=0))
+        self._set_reduction_range(min_reductions, max_reductions)
+        self.normalized_observed_reductions = numpy.concatenate([
+                self.normalize_reductions(self.transform(chunk))
+                for chunk in get_chunks()])
+
+    def _set_reduction_range(self, min_reductions, max_reductions):
         reduction_range = []
         for n in range(self.num_reduced_dimensions):
-            reductions_n = observed_reductions[:,n]
-            min_reduction = min(reductions_n)
-            max_reduction = max(reductions_n)
-            range_n = max_reduction - min_reduction
+            range_n = max_reductions[n] - min_reductions[n]
             if range_n == 0:
                 range_n = 1
             reduction_range.append({
-                "min": min_reduction,
-                "max": max_reduction,
+                "min": min_reductions[n],
+                "max": max_reductions[n],
                 "range": range_n
                 })
         self.reduction_range = reduction_range
-        self.normalized_observed_reductions = numpy.array([
-                self.normalize_reduction(observed_reduction)
-                for observed_reduction in observed_reductions])
+
+    def normalize_reductions(self, reductions):
+        min_reductions = numpy.array([component_range["min"] for component_range in self.reduction_range])
+        ranges = numpy.array([component_range["range"] for component_range in self.reduction_range])
+        return (reductions - min_reductions) / ranges
+
+    def unnormalize_reductions(self, normalized_reductions):
+        min_reductions = numpy.array([component_range["min"] for component_range in self.reduction_range])
+        ranges = numpy.array([component_range["range"] for component_range in self.reduction_range])
+        return normalized_reductions * ranges + min_reductions
 
     def normalize_reduction(self, normalized_reduction):
         return numpy.array([
@@ -59,13 +132,45 @@ class DimensionalityReduction:
     def inverse_transform(self, reductions):
         raise NotImplementedError()
 
-    def save(self, path):
-        self.save_model(path)
-        self.save_persistent_state(path)
+    def save(self, path, metadata={}):
+        self.content_hash = model_container.save(
+            path,
+            {"model": self.get_model_state(),
+             "reduction_range": self.reduction_range,
+             "normalized_observed_reductions": self.normalized_observed_reductions},
+            dict(self._get_metadata(), **metadata))
 
-    def load(self, path):
-        self.load_model(path)
-        self.load_persistant_state(path)
+    def load(self, path, expected_metadata={}, verify_hash=True):
+        with startup_profiler.phase("model load"):
+            if model_container.is_model_container(path):
+                self._load_container(path, expected_metadata, verify_hash)
+            else:
+                self.load_model(path)
+                self.load_persistant_state(path)
+                self.content_hash = None
+
+    def _load_container(self, path, expected_metadata, verify_hash):
+        content, metadata, content_hash = model_container.load(path, verify_hash)
+        mismatches = model_container.get_mismatches(
+            metadata, dict(self._get_metadata(), **expected_metadata))
+        if len(mismatches) > 0:
+            raise model_container.ModelContainerError(
+                "%s does not match the current configuration: %s" % (path, ", ".join(mismatches)))
+        self.set_model_state(content["model"])
+        self.reduction_range = content["reduction_range"]
+        self.normalized_observed_reductions = content["normalized_observed_reductions"]
+        self.content_hash = content_hash
+
+    def _get_metadata(self):
+        return {"type": self.__class__.__name__,
+                "num_input_dimensions": self.num_input_dimensions,
+                "num_reduced_dimensions": self.num_reduced_dimensions}
+
+    def get_model_state(self):
+        raise NotImplementedError()
+
+    def set_model_state(self, state):
+        raise NotImplementedError()
         
     def save_persistent_state(self, model_path):
         f = open(self._persistant_state_path(model_path), "wb")
@@ -82,6 +187,10 @@ class DimensionalityReduction:
 
     def supports_incremental_learning(self):
         return False
+
+    def flush(self):
+        # Applies training data which train() may have buffered, e.g. at the end of training
+        pass
     
     def reset(self):
         pass
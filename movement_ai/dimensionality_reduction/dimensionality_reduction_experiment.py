@@ -13,9 +13,14 @@ from .behaviors.improvise import ImproviseParameters, Improvise
 from .behaviors.flaneur_behavior import FlaneurBehavior, FlaneurParameters
 from .behaviors.hybrid import Hybrid, HybridParameters
 import sampling
-import sklearn.neighbors
 from transformations import euler_from_quaternion
 from memory import Memory
+from .training_store import TrainingStore
+from . import feature_matcher_training
+from .feature_matcher import FeatureMatcher
+from . import coreset
+from .online_probing import OnlineProbing
+import multiprocessing
 
 class DimensionalityReductionExperiment(Experiment):
     @staticmethod
@@ -38,6 +43,7 @@ class DimensionalityReductionExperiment(Experiment):
                             default=modes.EXPLORE)
         parser.add_argument("--max-novelty", type=float, default=1.)
         parser.add_argument("--analyze-components", action="store_true")
+        parser.add_argument("--component-analysis-threads", type=int, default=1)
         parser.add_argument("--analyze-accuracy", action="store_true")
         parser.add_argument("--training-data-stats", action="store_true")
         parser.add_argument("--export-stills")
@@ -46,12 +52,16 @@ class DimensionalityReductionExperiment(Experiment):
         parser.add_argument("--train-feature-matcher", action="store_true")
         parser.add_argument("--sampling-method", default="KMeans")
         parser.add_argument("--num-feature-matches", type=int, default=1)
+        parser.add_argument("--feature-extraction-processes", type=int,
+                            default=multiprocessing.cpu_count())
         parser.add_argument("--show-output-features", action="store_true")
         parser.add_argument("--show-all-feature-matches", action="store_true")
         parser.add_argument("--plot-model", action="store_true")
         parser.add_argument("--plot-pose-map-contents", action="store_true")
         parser.add_argument("--plot-args")
         parser.add_argument("--memory-size", type=int, default=1000)
+        parser.add_argument("--full-probe-interval", type=int, default=100,
+                            help="During online learning, re-probe the whole memory after this many probes, and otherwise only probe new observations.")
         parser.add_argument("--enable-io-blending", action="store_true")
         parser.add_argument("--io-blending-amount", type=float, default=0)
         parser.add_argument("--target-training-loss", type=float, default=0)
@@ -59,6 +69,19 @@ class DimensionalityReductionExperiment(Experiment):
                             help="Use incremental instead of batch training when training offline.")
         parser.add_argument("--resume-training", action="store_true",
                             help="When training with -train, use the existing model as a basis, rather than creating a new one.")
+        parser.add_argument("--streaming", action="store_true",
+                            help="When training with -train, read the training data in chunks from a memory-mapped store rather than loading all of it into memory. Requires a model which supports incremental learning (AutoEncoder, IncrementalPCA).")
+        parser.add_argument("--streaming-batch-size", type=int, default=1000)
+        parser.add_argument("--streaming-chunk-size", type=int, default=10000)
+        parser.add_argument("--shuffle-buffer-size", type=int, default=100000)
+        parser.add_argument("--coreset", choices=coreset.METHODS,
+                            help="When training with -train, fit the model on a representative subset of the training data, selected by this method. Not supported with --streaming.")
+        parser.add_argument("--coreset-size", type=int,
+                            help="Max number of observations in the coreset")
+        parser.add_argument("--coreset-tolerance", type=float,
+                            help="For grid: cell size. For k-center: max distance from an observation to the coreset.")
+        parser.add_argument("--flaneur-precomputed-steps", type=int, default=1,
+                            help="Number of flaneur steps computed at once. Parameter changes take effect with a delay of up to this many frames.")
         ImproviseParameters().add_parser_arguments(parser)
         FlaneurParameters().add_parser_arguments(parser)
         HybridParameters().add_parser_arguments(parser)
@@ -191,13 +214,25 @@ class DimensionalityReductionExperiment(Experiment):
             self._prepare_training_data()
             self._print_training_data_stats()
 
-        if self.args.train:
+        if self.args.train and self.args.streaming:
+            if self.args.coreset:
+                raise Exception("--coreset requires all training data in memory and cannot be combined with --streaming")
+            self._prepare_training_store()
+            if self.args.resume_training:
+                self._load_model()
+            self._train_model_streaming()
+            print("saving %s..." % self._student_model_path)
+            self.student.save(self._student_model_path, self._get_model_metadata())
+            print("ok")
+            storage.save(self.training_entity.model, self._entity_model_path)
+
+        elif self.args.train:
             self._prepare_training_data()
             if self.args.resume_training:
                 self._load_model()
             self._train_model()
             print("saving %s..." % self._student_model_path)
-            self.student.save(self._student_model_path)
+            self.student.save(self._student_model_path, self._get_model_metadata())
             print("ok")
             storage.save(self.training_entity.model, self._entity_model_path)
 
@@ -206,7 +241,8 @@ class DimensionalityReductionExperiment(Experiment):
             ComponentAnalysis(
                 pca=self.student,
                 num_output_components=len(self.entity.get_value()),
-                parameter_info_getter=self.entity.parameter_info).analyze()
+                parameter_info_getter=self.entity.parameter_info,
+                num_threads=self.args.component_analysis_threads).analyze()
 
         elif self.args.analyze_accuracy:
             self._prepare_training_data()
@@ -234,6 +270,8 @@ class DimensionalityReductionExperiment(Experiment):
             if not self.args.ui_only:
                 if self.student.supports_incremental_learning():
                     self._training_data = collections.deque([], maxlen=self.args.memory_size)
+                    self._online_probing = OnlineProbing(
+                        self.student, self._training_data, self.args.full_probe_interval)
                     self.model_noise_to_add = 0
                     self.min_training_loss = self.args.target_training_loss
                     self._training_loss = None
@@ -252,8 +290,7 @@ class DimensionalityReductionExperiment(Experiment):
                     self._flaneur_behavior]
 
                 if self.args.enable_features:
-                    self._feature_matcher, self._sampled_reductions = storage.load(
-                        self._feature_matcher_path)
+                    self._load_feature_matcher()
                     self._imitate = self._create_imitate_behavior()
                     self._behaviors.append(self._imitate)
                     self._hybrid = self._create_hybrid_behavior()
@@ -265,16 +302,35 @@ class DimensionalityReductionExperiment(Experiment):
                 self._memory = Memory()
                 
             self.run_backend_and_or_ui()
+            if not self.args.ui_only:
+                for behavior in self._behaviors:
+                    behavior.tear_down()
 
     def _prepare_training_data(self):
         if os.path.exists(self._training_data_path):
-            self._training_data = storage.load(self._training_data_path)
+            with startup_profiler.phase("training data load"):
+                self._training_data = storage.load(self._training_data_path)
             print("data size: %d samples" % len(self._training_data))
         else:
             teacher = Teacher(self.training_entity, self.args.training_data_frame_rate)
             self._training_data = teacher.create_training_data(self._training_duration())
             storage.save(self._training_data, self._training_data_path)
 
+    def _prepare_training_store(self):
+        training_store_path = "%s.npy" % self._training_data_path
+        if os.path.exists(training_store_path):
+            self._training_store = TrainingStore(training_store_path)
+            print("data size: %d samples" % len(self._training_store))
+        elif os.path.exists(self._training_data_path):
+            print("converting %s to %s..." % (self._training_data_path, training_store_path))
+            self._training_store = TrainingStore.create_from_array(
+                training_store_path, storage.load(self._training_data_path))
+            print("ok")
+        else:
+            teacher = Teacher(self.training_entity, self.args.training_data_frame_rate)
+            self._training_store = teacher.create_training_store(
+                self._training_duration(), training_store_path)
+
     def _create_follow_behavior(self):
         return Follow(self.student, self.training_entity, self.bvh_reader)
 
@@ -304,7 +360,6 @@ class DimensionalityReductionExperiment(Experiment):
             self._feature_matcher,
             self._sampled_reductions,
             self.args.num_components,
-            self.student.normalized_observed_reductions,
             self._hybrid_params,
             self.args.show_all_feature_matches)
 
@@ -330,7 +385,7 @@ class DimensionalityReductionExperiment(Experiment):
         self._flaneur_params = FlaneurParameters()
         self._flaneur_params.set_values_from_args(self.args)
         self._add_parameter_set(self._flaneur_params)
-        return FlaneurBehavior(self.student, self._flaneur_params, self.student.normalized_observed_reductions)
+        return FlaneurBehavior(self.student, self._flaneur_params, self.args.flaneur_precomputed_steps)
 
     def _add_parameter_set(self, parameters):
         self._parameter_sets[parameters.__class__.__name__] = parameters
@@ -370,10 +425,21 @@ class DimensionalityReductionExperiment(Experiment):
 
     def _load_model(self):
         print("loading %s..." % self._student_model_path)
-        self.student.load(self._student_model_path)
+        self.student.load(self._student_model_path, self._get_model_metadata())
         print("ok")
         entity_model = storage.load(self._entity_model_path)
 
+    def _get_model_metadata(self):
+        metadata = {"entity": self.args.entity,
+                    "entity_value_length": self.entity.get_value_length()}
+        if hasattr(self.entity, "parameter_info"):
+            parameter_infos = [
+                self.entity.parameter_info(n) for n in range(self.entity.get_value_length())]
+            metadata["entity_parameters"] = [
+                "%s %s" % (parameter_info["category"], parameter_info["component"])
+                for parameter_info in parameter_infos]
+        return metadata
+
     def _train_model(self):
         if hasattr(self.training_entity, "probe"):
             print("probing entity...")
@@ -381,6 +447,10 @@ class DimensionalityReductionExperiment(Experiment):
             self._training_data = list(map(self.training_entity.adapt_value_to_model, self._training_data))
             print("ok")
         
+        if self.args.coreset:
+            full_training_data = self._training_data
+            self._training_data = self._select_coreset(full_training_data)
+
         print("training model...")
         if self.student.supports_incremental_learning():
             if self.args.train_incrementally:
@@ -388,17 +458,62 @@ class DimensionalityReductionExperiment(Experiment):
             else:
                 self.student.batch_train(
                     self._training_data,
-                    self.args.num_training_epochs,
+                    getattr(self.args, "num_training_epochs", None),
                     self.args.target_training_loss,
-                    self.args.target_loss_slope)
+                    getattr(self.args, "target_loss_slope", None))
         else:
             self.student.fit(self._training_data)
         print("ok")
 
+        if self.args.coreset:
+            self._training_data = full_training_data
+            print("reconstruction error on all training data:")
+            self.student.analyze_accuracy(numpy.array(self._training_data))
+
         print("probing model...")
         self.student.probe(self._training_data)
         print("ok")
 
+    def _select_coreset(self, training_data):
+        print("selecting %s coreset..." % self.args.coreset)
+        indices = coreset.select(
+            training_data, self.args.coreset, self.args.coreset_size, self.args.coreset_tolerance)
+        print("selected %d of %d observations" % (len(indices), len(training_data)))
+        return [training_data[index] for index in indices]
+
+    def _train_model_streaming(self):
+        if not self.student.supports_incremental_learning():
+            raise Exception("streaming training requires a model which supports incremental learning")
+
+        if hasattr(self.training_entity, "probe"):
+            print("probing entity on a sample of the training data...")
+            self.training_entity.probe(
+                self._training_store.get_random_sample(self.args.shuffle_buffer_size))
+            print("ok")
+            adapt = lambda observations: numpy.array(
+                list(map(self.training_entity.adapt_value_to_model, observations)))
+        else:
+            adapt = lambda observations: observations
+
+        print("training model...")
+        num_epochs = getattr(self.args, "num_training_epochs", None) or 1
+        try:
+            for epoch in range(num_epochs):
+                for batch in self._training_store.get_shuffled_batches(
+                        self.args.streaming_batch_size,
+                        self.args.streaming_chunk_size,
+                        self.args.shuffle_buffer_size):
+                    self.student.train(adapt(batch))
+        except KeyboardInterrupt:
+            print("Training stopped at epoch %d" % epoch)
+        self.student.flush()
+        print("ok")
+
+        print("probing model...")
+        self.student.probe_in_chunks(lambda: (
+            adapt(chunk) for chunk in self._training_store.get_chunks(self.args.streaming_chunk_size)))
+        print("ok")
+
     def _train_incrementally(self):
         try:
             for epoch in range(self.args.num_training_epochs):
@@ -406,6 +521,7 @@ class DimensionalityReductionExperiment(Experiment):
                     self.student.train([training_datum])
         except KeyboardInterrupt:
             print("Training stopped at epoch %d" % epoch)
+        self.student.flush()
         
     def _print_training_data_stats(self):
         format = "%-5s%-20s%-8s%-8s%-8s%-8s"
@@ -429,13 +545,13 @@ class DimensionalityReductionExperiment(Experiment):
                 self.input = self._enqueue_and_deque_input(self._follow.get_input())
 
             if self.input is not None and self.student.supports_incremental_learning():
-                self._training_data.append(self.input)
+                self._online_probing.append(self.input)
                 if self.model_noise_to_add > 0:
                     self.student.add_noise(self.model_noise_to_add)
                 if self._training_loss is None or self._training_loss >= self.min_training_loss:
                     self._training_loss = self.student.train([self.input], return_loss=True)
                     self.send_event_to_ui(Event(Event.TRAINING_LOSS, self._training_loss))
-                    self.student.probe(self._training_data)
+                    self._online_probing.probe()
                     self._improvise.set_normalized_observed_reductions(self.student.normalized_observed_reductions)
                     self._flaneur_behavior.set_normalized_observed_reductions(self.student.normalized_observed_reductions)
                     if self.args.enable_features:
@@ -527,27 +643,40 @@ class DimensionalityReductionExperiment(Experiment):
             self._hybrid.set_target_features(event.content)
         self._broadcast_event_to_other_uis(event)
 
+    def _load_feature_matcher(self):
+        if os.path.exists(self._feature_matcher_path):
+            content = storage.load(self._feature_matcher_path)
+            if not (isinstance(content, dict) and
+                    isinstance(content["feature_matcher"], FeatureMatcher)):
+                print("%s has an outdated format" % self._feature_matcher_path)
+            elif content["model_content_hash"] != self.student.content_hash:
+                print("%s was trained on another model" % self._feature_matcher_path)
+            else:
+                self._feature_matcher = content["feature_matcher"]
+                self._sampled_reductions = content["sampled_reductions"]
+                return
+        self._train_feature_matcher()
+
     def _train_feature_matcher(self):
         print("training feature matcher:")
-        feature_matcher = sklearn.neighbors.KNeighborsClassifier(
-            n_neighbors=self.args.num_feature_matches, weights='uniform')
         print("sampling training data of size %s..." % len(
             self.student.normalized_observed_reductions))
         sampled_normalized_reductions = self._sample_normalized_reduction_space(
             self.student.normalized_observed_reductions)
         print("selected %s samples" % len(sampled_normalized_reductions))
-        sampled_reductions = [
-            self.student.unnormalize_reduction(normalized_reduction)
-            for normalized_reduction in sampled_normalized_reductions]
-        print("extracting features from samples...")
-        feature_vectors = [
-            self._reduction_to_feature_vector(reduction)
-            for reduction in sampled_reductions]
-        print("ok")
-        print("training feature matcher on samples...")
-        feature_matcher.fit(feature_vectors, sampled_reductions)
+        print("extracting features from samples and training feature matcher...")
+        content = feature_matcher_training.train_feature_matcher(
+            self.student,
+            self.student.unnormalize_reductions(numpy.array(sampled_normalized_reductions)),
+            self.entity,
+            self.args.num_feature_matches,
+            entity_factory=feature_matcher_training.EntityFactory(
+                self._get_skeleton_bvh_path(), self.args),
+            num_processes=self.args.feature_extraction_processes)
         print("ok")
-        storage.save((feature_matcher, sampled_reductions), self._feature_matcher_path)
+        storage.save(content, self._feature_matcher_path)
+        self._feature_matcher = content["feature_matcher"]
+        self._sampled_reductions = content["sampled_reductions"]
 
     def _sample_normalized_reduction_space(self, observations):
         if self.args.sampling_method:
@@ -555,13 +684,6 @@ class DimensionalityReductionExperiment(Experiment):
         else:
             return observations
 
-    def _reduction_to_feature_vector(self, reduction):
-        output = self.student.inverse_transform(numpy.array([reduction]))[0]
-        self.entity.parameters_to_processed_pose(
-            output, self._pose_for_feature_extraction)
-        features = self.entity.extract_features(self._pose_for_feature_extraction)
-        return features
-
     def should_read_bvh_frames(self):
         return self.args.train or self.args.mode or self.student.supports_incremental_learning()
 
@@ -1,4 +1,5 @@
 import numpy
+from .training_store import TrainingStore
 
 class Teacher:
     def __init__(self, stimulus, frame_rate):
@@ -17,6 +18,33 @@ class Teacher:
         print("created training data with %s samples" % len(self._training_data))
         return numpy.array(self._training_data)
 
+    def create_training_store(self, duration, path):
+        print("creating training data for %.1fs with %.1f FPS in %s..." % (
+            duration, self._frame_rate, path))
+        num_samples = self._get_num_samples(duration)
+        writer = None
+        time_increment = 1.0 / self._frame_rate
+        t = 0
+        while t < duration:
+            datum = self._stimulus.get_value()
+            if writer is None:
+                writer = TrainingStore.create(path, num_samples, len(datum))
+            writer.append(datum)
+            self.proceed(time_increment)
+            t += time_increment
+        training_store = writer.close()
+        print("created training data with %s samples" % len(training_store))
+        return training_store
+
+    def _get_num_samples(self, duration):
+        num_samples = 0
+        time_increment = 1.0 / self._frame_rate
+        t = 0
+        while t < duration:
+            num_samples += 1
+            t += time_increment
+        return num_samples
+
     def proceed(self, time_increment):
         self._stimulus.proceed(time_increment)
 
@@ -1,10 +1,9 @@
 from argparse import ArgumentParser
 
 from . import pca
-from .autoencoder import AutoEncoder
 
 class DimensionalityReductionFactory:
-    TYPES = ["LinearPCA", "KernelPCA", "AutoEncoder"]
+    TYPES = ["LinearPCA", "KernelPCA", "NystroemKernelPCA", "IncrementalPCA", "AutoEncoder"]
 
     @staticmethod
     def get_class(type_name):
@@ -12,7 +11,12 @@ class DimensionalityReductionFactory:
             return pca.LinearPCA
         elif type_name == "KernelPCA":
             return pca.KernelPCA
+        elif type_name == "NystroemKernelPCA":
+            return pca.NystroemKernelPCA
+        elif type_name == "IncrementalPCA":
+            return pca.IncrementalPCA
         elif type_name == "AutoEncoder":
+            from .autoencoder import AutoEncoder
             return AutoEncoder
 
     @staticmethod
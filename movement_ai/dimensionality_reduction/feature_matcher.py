@@ -0,0 +1,28 @@
+import numpy
+from spatial_index import SpatialIndex
+
+# Matches target features, e.g. of a tracked user, to the sampled reductions whose poses
+# have the most similar features, using a KD-tree over the features of the samples.
+#
+# Imitate and Hybrid are typically given the same target features in the same frame, so
+# the result of the last single-target match is reused while the target is unchanged.
+class FeatureMatcher:
+    def __init__(self, feature_vectors, num_matches):
+        self.num_matches = num_matches
+        self._index = SpatialIndex(feature_vectors)
+        self._last_target_features = None
+        self._last_match = None
+
+    def match(self, targets_features):
+        # Returns distances and indices of the matched samples for each target, as arrays of
+        # shape (number of targets, number of matches) sorted by distance.
+        return self._index.query(targets_features, k=self.num_matches)
+
+    def match_one(self, target_features):
+        target_features = numpy.array(target_features, dtype=float)
+        if self._last_target_features is None or \
+           not numpy.array_equal(target_features, self._last_target_features):
+            distances, indices = self.match(target_features)
+            self._last_target_features = target_features
+            self._last_match = distances[0], indices[0]
+        return self._last_match
@@ -0,0 +1,71 @@
+import glob
+import importlib
+import multiprocessing
+import numpy
+
+from bvh.bvh_collection import BvhCollection
+from .feature_matcher import FeatureMatcher
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Training of the feature matcher used by Imitate and Hybrid: an index over the features
+# of sampled poses, whose indices refer to the sampled reductions.
+#
+# All samples are inverse-transformed as one batch, their joint positions are computed by
+# the output pipeline's batched forward kinematics, and their features are extracted from
+# the array of joint positions at once. Only root angle processing and constraining remain
+# frame by frame, so the outputs are split into chunks that can be processed by a pool of
+# worker processes, each with its own entity.
+
+def train_feature_matcher(student, sampled_reductions, entity, num_feature_matches,
+                          entity_factory=None, num_processes=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    sampled_reductions = numpy.array(sampled_reductions)
+    outputs = student.inverse_transform(sampled_reductions)
+    feature_vectors = extract_features_from_outputs(
+        outputs, entity, entity_factory, num_processes, chunk_size)
+    return {"feature_matcher": FeatureMatcher(feature_vectors, num_feature_matches),
+            "sampled_reductions": sampled_reductions,
+            "model_content_hash": student.content_hash}
+
+def extract_features_from_outputs(outputs, entity, entity_factory=None, num_processes=1,
+                                  chunk_size=DEFAULT_CHUNK_SIZE):
+    chunks = [outputs[start:start+chunk_size] for start in range(0, len(outputs), chunk_size)]
+    if entity_factory is not None and num_processes > 1 and len(chunks) > 1:
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(min(num_processes, len(chunks)),
+                          _initialize_worker, (entity_factory,)) as pool:
+            input_positions = pool.map(_get_feature_input_positions_in_worker, chunks)
+    else:
+        input_positions = [get_feature_input_positions(entity, chunk) for chunk in chunks]
+    if len(input_positions) == 0:
+        return numpy.zeros((0, entity.feature_extractor.get_num_features()))
+    return entity.feature_extractor.extract_features_from_positions(
+        numpy.concatenate(input_positions))
+
+def get_feature_input_positions(entity, outputs):
+    # Forward kinematics of all outputs at once, via the entity's output pipeline
+    vertices = entity.get_output_pipeline().process_batch(outputs)
+    return vertices[:,entity.get_feature_input_vertex_indices(),:3]
+
+# Creates an entity in a worker process, from the same skeleton and arguments as the
+# experiment's entity, since BVH readers cannot be pickled.
+class EntityFactory:
+    def __init__(self, bvh_pattern, args):
+        self._bvh_pattern = bvh_pattern
+        self._args = args
+
+    def __call__(self):
+        bvh_reader = BvhCollection(glob.glob(self._bvh_pattern))
+        bvh_reader.read()
+        entity_class = importlib.import_module("entities.%s" % self._args.entity).Entity
+        pose = bvh_reader.get_hierarchy().create_pose()
+        return entity_class(bvh_reader, pose, self._args.floor, self._args.z_up, self._args)
+
+_worker_entity = None
+
+def _initialize_worker(entity_factory):
+    global _worker_entity
+    _worker_entity = entity_factory()
+
+def _get_feature_input_positions_in_worker(outputs):
+    return get_feature_input_positions(_worker_entity, outputs)
@@ -26,5 +26,60 @@ function unserialize(obj) {
     	    var content = eventObj.content["py/dict"];
 	    return new Event(type, content);
     	}
+	var array = eventObj.content && eventObj.content["py/numpy.ndarray"];
+	if(array)
+	    return new Event(type, array.values);
     }
 }
+
+// Decoder of the binary format of connectivity/event_packing.py. BINARY_EVENT_TYPES
+// must be kept in sync with the list of the same name there.
+
+var BINARY_FORMAT_VERSION = 1;
+var BINARY_EVENT_TYPES = [
+    "INPUT",
+    "OUTPUT",
+    "REDUCTION",
+    "NORMALIZED_OBSERVED_REDUCTIONS",
+    "FEATURES",
+    "TARGET_FEATURES",
+    "TARGET_REDUCTION",
+    "FEATURE_MATCH_OUTPUT",
+    "IO_BLEND",
+    "NEIGHBORS_CENTER"
+];
+var BINARY_DTYPES = [Float32Array, Int32Array];
+
+// Returns the content as nested arrays, like the values of an array event packed as JSON
+function unpackBinaryEvent(buffer) {
+    var view = new DataView(buffer);
+    var version = view.getUint8(0);
+    if(version != BINARY_FORMAT_VERSION)
+	throw new Error("unsupported binary event format version " + version);
+    var type = BINARY_EVENT_TYPES[view.getUint8(1)];
+    var dtype = BINARY_DTYPES[view.getUint8(2)];
+    var numDimensions = view.getUint8(3);
+    var shape = [];
+    var size = 1;
+    for(var i = 0; i < numDimensions; i++) {
+	shape.push(view.getUint32(4 + 4 * i, true));
+	size *= shape[i];
+    }
+    var values = new dtype(buffer, 4 + 4 * numDimensions, size);
+    return new Event(type, toNestedArrays(values, shape, 0, 0));
+}
+
+function toNestedArrays(values, shape, dimension, offset) {
+    if(shape.length == 0)
+	return values[0];
+    var length = shape[dimension];
+    if(dimension == shape.length - 1)
+	return Array.prototype.slice.call(values, offset, offset + length);
+    var stride = 1;
+    for(var i = dimension + 1; i < shape.length; i++)
+	stride *= shape[i];
+    var result = [];
+    for(var i = 0; i < length; i++)
+	result.push(toNestedArrays(values, shape, dimension + 1, offset + i * stride));
+    return result;
+}
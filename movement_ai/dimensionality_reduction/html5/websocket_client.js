@@ -1,5 +1,6 @@
 function WebsocketClient(address, handleConnected, handleEvent, handleError) {
     this.ws = new WebSocket(address);
+    this.ws.binaryType = "arraybuffer";
 
     this.ws.onopen = function(_event) {
 	console.log("WebSocket connection established");
@@ -19,7 +20,11 @@ function WebsocketClient(address, handleConnected, handleEvent, handleError) {
     }
 
     this.ws.onmessage = function(message) {
-	event = unpackEvent(message.data);
+	var event;
+	if(message.data instanceof ArrayBuffer)
+	    event = unpackBinaryEvent(message.data);
+	else
+	    event = unpackEvent(message.data);
 	handleEvent(event);
     }
 
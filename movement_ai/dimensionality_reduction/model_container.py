@@ -0,0 +1,123 @@
+import hashlib
+import io
+import json
+import pickle
+import struct
+import numpy
+
+# A single model file holding a pickled model state, with numpy arrays stored as raw aligned
+# blocks outside the pickle so that they can be memory-mapped when loading. Layout:
+#
+#   MAGIC, format version and header length (uint32 each), JSON header, padding,
+#   data section: pickle, followed by the arrays
+#
+# The header holds the metadata given when saving, a content hash over the pickle and
+# array data, and the location, dtype and shape of each array.
+
+MAGIC = b"AIAMMODEL\n"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+MIN_EXTERNAL_ARRAY_SIZE = 1024 # smaller arrays (in bytes) are kept in the pickle
+
+class ModelContainerError(Exception):
+    pass
+
+def is_model_container(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def save(path, content, metadata):
+    arrays = []
+    pickle_buffer = io.BytesIO()
+    _Pickler(pickle_buffer, arrays).dump(content)
+    pickled_content = pickle_buffer.getvalue()
+
+    content_hash = hashlib.sha256(pickled_content)
+    array_infos = []
+    offset = _align(len(pickled_content))
+    for array in arrays:
+        content_hash.update(memoryview(array).cast("B"))
+        array_infos.append({"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)})
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        "metadata": metadata,
+        "content_hash": content_hash.hexdigest(),
+        "pickle_length": len(pickled_content),
+        "arrays": array_infos,
+        }
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix_length = len(MAGIC) + struct.calcsize("<II") + len(header_bytes)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<II", FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (_align(prefix_length) - prefix_length))
+        _write_padded(f, pickled_content)
+        for array in arrays:
+            _write_padded(f, memoryview(array).cast("B"))
+    return header["content_hash"]
+
+def load(path, verify_hash=True):
+    # Verifying the content hash reads all arrays once; skipping it keeps loading to the
+    # header and pickle, e.g. for fast model swaps.
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ModelContainerError("%s is not a model container" % path)
+        format_version, header_length = struct.unpack("<II", f.read(struct.calcsize("<II")))
+        if format_version > FORMAT_VERSION:
+            raise ModelContainerError("%s has format version %d, but only versions up to %d are supported" % (
+                path, format_version, FORMAT_VERSION))
+        header = json.loads(f.read(header_length).decode("utf-8"))
+        data_start = _align(f.tell())
+        f.seek(data_start)
+        pickled_content = f.read(header["pickle_length"])
+
+    def load_array(index):
+        array_info = header["arrays"][index]
+        return numpy.memmap(
+            path, dtype=numpy.dtype(array_info["dtype"]), mode="c",
+            offset=data_start + array_info["offset"], shape=tuple(array_info["shape"]))
+
+    arrays = [load_array(index) for index in range(len(header["arrays"]))]
+    if verify_hash:
+        content_hash = hashlib.sha256(pickled_content)
+        for array in arrays:
+            content_hash.update(memoryview(numpy.ascontiguousarray(array)).cast("B"))
+        if content_hash.hexdigest() != header["content_hash"]:
+            raise ModelContainerError("content hash mismatch in %s" % path)
+    content = _Unpickler(io.BytesIO(pickled_content), arrays).load()
+    return content, header["metadata"], header["content_hash"]
+
+def get_mismatches(metadata, expected_metadata):
+    return ["%s: %r (expected %r)" % (key, metadata.get(key), value)
+            for key, value in sorted(expected_metadata.items())
+            if key in metadata and metadata[key] != value]
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _write_padded(f, data):
+    f.write(data)
+    f.write(b"\0" * (_align(len(data)) - len(data)))
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, arrays):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._arrays = arrays
+
+    def persistent_id(self, obj):
+        if isinstance(obj, numpy.ndarray) and not obj.dtype.hasobject and \
+           obj.nbytes >= MIN_EXTERNAL_ARRAY_SIZE:
+            self._arrays.append(numpy.ascontiguousarray(obj))
+            return len(self._arrays) - 1
+        return None
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, arrays):
+        pickle.Unpickler.__init__(self, file)
+        self._arrays = arrays
+
+    def persistent_load(self, index):
+        return self._arrays[index]
@@ -0,0 +1,36 @@
+# Keeps a student's observed reductions up to date with a memory of the latest
+# observations during online learning, i.e. a deque with a maxlen to which an observation
+# is appended every frame or every few frames.
+#
+# Re-probing the whole memory after each partial fit costs time proportional to the
+# memory size. Instead, only the observations appended since the last probe are probed
+# and appended to the observed reductions, and the whole memory is only re-probed after
+# every full_probe_interval probes, so that the reductions of older observations and the
+# reduction range catch up with the model.
+class OnlineProbing:
+    def __init__(self, student, memory, full_probe_interval):
+        self._student = student
+        self._memory = memory
+        self._full_probe_interval = full_probe_interval
+        self._num_unprobed_observations = 0
+        # the observed reductions of a loaded model do not stem from the memory
+        self._num_probes_since_full_probe = None
+        self.num_full_probes = 0
+
+    def append(self, observation):
+        self._memory.append(observation)
+        self._num_unprobed_observations += 1
+
+    def probe(self):
+        if self._num_probes_since_full_probe is None or \
+           self._num_probes_since_full_probe + 1 >= self._full_probe_interval or \
+           self._num_unprobed_observations >= len(self._memory):
+            self._student.probe(self._memory)
+            self._num_probes_since_full_probe = 0
+            self.num_full_probes += 1
+        elif self._num_unprobed_observations > 0:
+            self._student.probe_appended(
+                [self._memory[-n] for n in range(self._num_unprobed_observations, 0, -1)],
+                self._memory.maxlen)
+            self._num_probes_since_full_probe += 1
+        self._num_unprobed_observations = 0
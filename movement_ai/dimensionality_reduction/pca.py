@@ -1,6 +1,9 @@
 from .dimensionality_reduction import DimensionalityReduction
 import sklearn.decomposition
+import sklearn.kernel_approximation
+import sklearn.linear_model
 import pickle
+import numpy
 
 class PCADimensionalityReduction(DimensionalityReduction):
     def fit(self, *args, **kwargs):
@@ -15,6 +18,12 @@ class PCADimensionalityReduction(DimensionalityReduction):
     def inverse_transform(self, *args, **kwargs):
         return self.pca.inverse_transform(*args, **kwargs)
         
+    def get_model_state(self):
+        return self.pca
+
+    def set_model_state(self, state):
+        self.pca = state
+
     def save_model(self, path):
         f = open(path, "wb")
         pickle.dump(self.pca, f)
@@ -39,9 +48,135 @@ class KernelPCA(PCADimensionalityReduction):
     @staticmethod
     def add_parser_arguments(parser):
         parser.add_argument("--pca-kernel", default="poly")
+        parser.add_argument("--pca-gamma", type=float, default=0.5)
+        parser.add_argument("--pca-degree", type=int, default=3)
 
     def __init__(self, num_input_dimensions, num_reduced_dimensions, args):
         DimensionalityReduction.__init__(self, num_input_dimensions, num_reduced_dimensions, args)
         self.pca = sklearn.decomposition.KernelPCA(
             n_components=num_reduced_dimensions,
-            kernel=args.pca_kernel, fit_inverse_transform=True, gamma=0.5)
+            kernel=args.pca_kernel, fit_inverse_transform=True, gamma=args.pca_gamma,
+            degree=args.pca_degree)
+
+class NystroemKernelPCA(PCADimensionalityReduction):
+    @staticmethod
+    def add_parser_arguments(parser):
+        parser.add_argument("--pca-kernel", default="poly")
+        parser.add_argument("--pca-gamma", type=float, default=0.5)
+        parser.add_argument("--pca-degree", type=int, default=3)
+        parser.add_argument("--num-landmarks", type=int, default=500,
+                            help="Number of landmark observations approximating the kernel")
+        parser.add_argument("--num-inverse-landmarks", type=int,
+                            help="Number of landmark reductions for the inverse mapping (default: --num-landmarks)")
+        parser.add_argument("--inverse-alpha", type=float, default=1.0)
+
+    def __init__(self, num_input_dimensions, num_reduced_dimensions, args):
+        DimensionalityReduction.__init__(self, num_input_dimensions, num_reduced_dimensions, args)
+        self.pca = NystroemPCA(
+            n_components=num_reduced_dimensions,
+            kernel=args.pca_kernel,
+            gamma=args.pca_gamma,
+            degree=args.pca_degree,
+            num_landmarks=args.num_landmarks,
+            num_inverse_landmarks=args.num_inverse_landmarks or args.num_landmarks,
+            alpha=args.inverse_alpha)
+
+# Approximates sklearn's KernelPCA with fit_inverse_transform=True, but fits in
+# O(N * num_landmarks^2) instead of O(N^3). Observations are mapped to Nystroem features
+# and reduced with linear PCA. As in KernelPCA, the inverse is a kernel ridge regression
+# from the reductions, here also approximated with Nystroem features.
+class NystroemPCA:
+    def __init__(self, n_components, kernel, gamma, degree, num_landmarks, num_inverse_landmarks, alpha):
+        self._feature_map = sklearn.kernel_approximation.Nystroem(
+            kernel=kernel, gamma=gamma, degree=degree, n_components=num_landmarks, random_state=0)
+        self._pca = sklearn.decomposition.PCA(n_components=n_components)
+        self._inverse_feature_map = sklearn.kernel_approximation.Nystroem(
+            kernel=kernel, gamma=gamma, degree=degree, n_components=num_inverse_landmarks,
+            random_state=0)
+        self._inverse_regression = sklearn.linear_model.Ridge(alpha=alpha)
+
+    def fit(self, observations):
+        self.fit_transform(observations)
+        return self
+
+    def fit_transform(self, observations):
+        observations = numpy.asarray(observations)
+        for feature_map in [self._feature_map, self._inverse_feature_map]:
+            feature_map.set_params(n_components=min(feature_map.n_components, len(observations)))
+        features = self._feature_map.fit_transform(observations)
+        reductions = self._pca.fit_transform(features)
+        self._inverse_regression.fit(
+            self._inverse_feature_map.fit_transform(reductions), observations)
+        return reductions
+
+    def transform(self, observations):
+        return self._pca.transform(self._feature_map.transform(observations))
+
+    def inverse_transform(self, reductions):
+        return self._inverse_regression.predict(self._inverse_feature_map.transform(reductions))
+
+class IncrementalPCA(PCADimensionalityReduction):
+    @staticmethod
+    def add_parser_arguments(parser):
+        parser.add_argument("--partial-fit-batch-size", type=int,
+                            help="Number of new frames to collect before each partial fit (at least the number of components)")
+
+    def __init__(self, num_input_dimensions, num_reduced_dimensions, args):
+        DimensionalityReduction.__init__(self, num_input_dimensions, num_reduced_dimensions, args)
+        self.pca = sklearn.decomposition.IncrementalPCA(n_components=num_reduced_dimensions)
+        self._partial_fit_batch_size = max(
+            num_reduced_dimensions, args.partial_fit_batch_size or 0)
+        self._pending_frames = []
+        self._learning_rate = 1.
+
+    def batch_train(self,
+                    training_data,
+                    num_training_epochs=None,
+                    target_training_loss=None,
+                    target_loss_slope=None):
+        self.pca.fit(training_data)
+
+    def train(self, training_data, return_loss=False):
+        if self._learning_rate > 0:
+            self._pending_frames.extend(training_data)
+            if len(self._pending_frames) >= self._partial_fit_batch_size:
+                self._partial_fit_pending_frames()
+        if return_loss:
+            return self._reconstruction_loss(training_data)
+
+    def flush(self):
+        if len(self._pending_frames) == 0:
+            return
+        if not self._is_fitted() and len(self._pending_frames) < self.num_reduced_dimensions:
+            raise Exception("at least %d frames are needed to fit the model, got %d" % (
+                self.num_reduced_dimensions, len(self._pending_frames)))
+        self._partial_fit_pending_frames()
+
+    def _partial_fit_pending_frames(self):
+        self.pca.partial_fit(numpy.array(self._pending_frames))
+        self._pending_frames = []
+
+    def _reconstruction_loss(self, observations):
+        if not self._is_fitted():
+            return None
+        observations = numpy.array(observations)
+        reconstructions = self.inverse_transform(self.transform(observations))
+        return numpy.sqrt(((observations - reconstructions) ** 2).mean())
+
+    def _is_fitted(self):
+        return getattr(self.pca, "components_", None) is not None
+
+    def supports_incremental_learning(self):
+        return True
+
+    def get_learning_rate(self):
+        return self._learning_rate
+
+    def set_learning_rate(self, learning_rate):
+        # Partial fits have no step size; a learning rate of 0 pauses learning.
+        self._learning_rate = learning_rate
+
+    def add_noise(self, amount):
+        if self._is_fitted():
+            self.pca.components_ += numpy.random.uniform(
+                -amount, amount, self.pca.components_.shape)
@@ -0,0 +1,49 @@
+import unittest
+import numpy
+from argparse import ArgumentParser
+
+from .component_analysis import ComponentAnalysis
+from .pca import LinearPCA
+
+NUM_OUTPUT_COMPONENTS = 6
+RESOLUTION = 10
+
+class ComponentAnalysisTestCase(unittest.TestCase):
+    def setUp(self):
+        observations = numpy.random.RandomState(0).randn(50, NUM_OUTPUT_COMPONENTS)
+        parser = ArgumentParser()
+        LinearPCA.add_parser_arguments(parser)
+        self._pca = LinearPCA(NUM_OUTPUT_COMPONENTS, 3, parser.parse_args([]))
+        self._pca.fit(observations)
+        self._pca.probe(observations)
+
+    def test_batched_variances_equal_per_observation_sweeps(self):
+        for batch_size in [1, 35, 100000]:
+            analysis = self._create_analysis(batch_size=batch_size)
+            for n in range(3):
+                numpy.testing.assert_array_almost_equal(
+                    self._get_expected_variances(n), analysis.get_output_variances(n))
+
+    def test_does_not_modify_observed_reductions(self):
+        normalized_observed_reductions = self._pca.normalized_observed_reductions.copy()
+        self._create_analysis(num_threads=2).analyze()
+        numpy.testing.assert_array_equal(
+            normalized_observed_reductions, self._pca.normalized_observed_reductions)
+
+    def _create_analysis(self, **kwargs):
+        return ComponentAnalysis(
+            self._pca, NUM_OUTPUT_COMPONENTS,
+            lambda index: {"category": "category%d" % (index / 2), "component": str(index)},
+            resolution=RESOLUTION, **kwargs)
+
+    def _get_expected_variances(self, n):
+        variances = numpy.zeros(NUM_OUTPUT_COMPONENTS)
+        for normalized_reduction in self._pca.normalized_observed_reductions:
+            reconstructions = []
+            for x in numpy.arange(0., 1., 1./RESOLUTION):
+                swept_reduction = normalized_reduction.copy()
+                swept_reduction[n] = x
+                reduction = self._pca.unnormalize_reduction(swept_reduction)
+                reconstructions.append(self._pca.inverse_transform([reduction])[0])
+            variances += numpy.var(reconstructions, axis=0)
+        return variances
@@ -0,0 +1,47 @@
+import unittest
+import numpy
+import sampling
+from dimensionality_reduction import coreset
+
+class CoresetTestCase(unittest.TestCase):
+    def setUp(self):
+        # few distinct poses, each repeated with small noise
+        random_state = numpy.random.RandomState(0)
+        self._distinct_observations = random_state.uniform(-1, 1, (30, 20))
+        self._observations = numpy.repeat(self._distinct_observations, 50, axis=0) + \
+            random_state.normal(scale=0.001, size=(1500, 20))
+
+    def test_k_center_with_size(self):
+        indices = coreset.select(self._observations, "k-center", size=30)
+        self.assertEqual(30, len(indices))
+        self.assertLess(self._get_covering_radius(indices), 0.05)
+
+    def test_k_center_with_tolerance(self):
+        indices = coreset.select(self._observations, "k-center", tolerance=0.05)
+        self.assertEqual(30, len(indices))
+        numpy.testing.assert_array_equal(numpy.sort(indices), indices)
+
+    def test_k_center_equals_brute_force(self):
+        indices = sampling.farthest_point_indices(self._observations, 40, first_index=0)
+        expected_indices = [0]
+        distances = numpy.linalg.norm(self._observations - self._observations[0], axis=1)
+        while len(expected_indices) < 40:
+            expected_indices.append(numpy.argmax(distances))
+            distances = numpy.minimum(distances, numpy.linalg.norm(
+                    self._observations - self._observations[expected_indices[-1]], axis=1))
+        numpy.testing.assert_array_equal(expected_indices, indices)
+
+    def test_grid_keeps_one_observation_per_cell(self):
+        cell_size = 0.5
+        indices = coreset.select(self._observations, "grid", tolerance=cell_size)
+        cells = numpy.floor(self._observations / cell_size)
+        self.assertEqual(len(numpy.unique(cells, axis=0)), len(indices))
+        self.assertEqual(len(indices), len(numpy.unique(cells[indices], axis=0)))
+
+    def test_grid_with_size(self):
+        indices = coreset.select(self._observations, "grid", size=10, tolerance=0.5)
+        self.assertEqual(10, len(indices))
+
+    def _get_covering_radius(self, indices):
+        return max(numpy.linalg.norm(self._observations[indices] - observation, axis=1).min()
+                   for observation in self._observations)
@@ -0,0 +1,32 @@
+import unittest
+import numpy
+from dimensionality_reduction.feature_matcher import FeatureMatcher
+
+class FeatureMatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        random_state = numpy.random.RandomState(0)
+        self._feature_vectors = random_state.uniform(0, 1, (500, 7))
+        self._targets_features = random_state.uniform(0, 1, (20, 7))
+        self._feature_matcher = FeatureMatcher(self._feature_vectors, num_matches=5)
+
+    def test_matches_nearest_samples_of_all_targets(self):
+        distances, indices = self._feature_matcher.match(self._targets_features)
+        self.assertEqual((20, 5), indices.shape)
+        for target_features, target_distances, target_indices in zip(
+                self._targets_features, distances, indices):
+            expected_distances = numpy.linalg.norm(self._feature_vectors - target_features, axis=1)
+            expected_indices = numpy.argsort(expected_distances)[:5]
+            numpy.testing.assert_array_equal(expected_indices, target_indices)
+            numpy.testing.assert_allclose(expected_distances[expected_indices], target_distances)
+
+    def test_single_target_equals_batch_match(self):
+        distances, indices = self._feature_matcher.match(self._targets_features)
+        for n, target_features in enumerate(self._targets_features):
+            target_distances, target_indices = self._feature_matcher.match_one(list(target_features))
+            numpy.testing.assert_array_equal(indices[n], target_indices)
+            numpy.testing.assert_array_equal(distances[n], target_distances)
+
+    def test_reuses_match_of_unchanged_target(self):
+        first_match = self._feature_matcher.match_one(self._targets_features[0])
+        self.assertIs(first_match, self._feature_matcher.match_one(self._targets_features[0].copy()))
+        self.assertIsNot(first_match, self._feature_matcher.match_one(self._targets_features[1]))
@@ -0,0 +1,86 @@
+import unittest
+from argparse import ArgumentParser
+import numpy
+import os
+import tempfile
+
+from entities.hierarchical import Entity
+from dimensionality_reduction.pca import LinearPCA
+from dimensionality_reduction import feature_matcher_training
+
+SKELETON = "scenes/pn-01.22_skeleton.bvh"
+FEATURE_JOINT_ARGS = (
+    "--left-hand=LeftHand --left-forearm=LeftForeArm --left-shoulder=LeftShoulder "
+    "--right-hand=RightHand --right-forearm=RightForeArm --right-shoulder=RightShoulder "
+    "--torso=Hips --neck=Neck --head=Head --left-hip=LeftUpLeg --left-knee=LeftLeg "
+    "--right-hip=RightUpLeg --right-knee=RightLeg --left-foot=LeftFoot --right-foot=RightFoot")
+
+class FeatureMatcherTrainingTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = ArgumentParser()
+        Entity.add_parser_arguments(parser)
+        self._args = parser.parse_args(("-r quaternion " + FEATURE_JOINT_ARGS).split())
+        self._args.entity = "hierarchical"
+        self._args.floor = True
+        self._args.z_up = False
+        self._args.enable_features = True
+        self._entity_factory = feature_matcher_training.EntityFactory(SKELETON, self._args)
+        self._entity = self._entity_factory()
+        training_data = numpy.random.RandomState(0).uniform(
+            -1, 1, (50, self._entity.get_value_length()))
+        self._student = LinearPCA(self._entity.get_value_length(), 3, None)
+        self._student.fit(training_data)
+        self._student.probe(training_data)
+        self._reductions = self._student.transform(training_data)
+
+    def test_features_equal_features_of_each_processed_pose(self):
+        outputs = self._student.inverse_transform(self._reductions)
+        features = feature_matcher_training.extract_features_from_outputs(
+            outputs, self._entity_factory(), chunk_size=7)
+        entity = self._entity_factory()
+        pose = entity.bvh_reader.get_hierarchy().create_pose()
+        expected_features = []
+        for output in outputs:
+            entity.parameters_to_processed_pose(output, pose)
+            expected_features.append(entity.extract_features(pose))
+        numpy.testing.assert_allclose(expected_features, features, atol=1e-9)
+
+    def test_input_positions_equal_those_of_each_processed_pose(self):
+        outputs = self._student.inverse_transform(self._reductions)
+        input_positions = feature_matcher_training.get_feature_input_positions(
+            self._entity_factory(), outputs)
+        entity = self._entity_factory()
+        pose = entity.bvh_reader.get_hierarchy().create_pose()
+        expected_input_positions = []
+        for output in outputs:
+            entity.parameters_to_processed_pose(output, pose)
+            expected_input_positions.append(
+                numpy.array(entity.get_feature_input_positions(pose))[:,:3])
+        numpy.testing.assert_allclose(expected_input_positions, input_positions, atol=1e-9)
+
+    def test_unsaved_model_has_no_content_hash(self):
+        content = feature_matcher_training.train_feature_matcher(
+            self._student, self._reductions, self._entity, num_feature_matches=1)
+        self.assertIsNone(content["model_content_hash"])
+
+    def test_parallel_extraction_equals_serial_extraction(self):
+        outputs = self._student.inverse_transform(self._reductions)
+        serial_features = feature_matcher_training.extract_features_from_outputs(
+            outputs, self._entity_factory(), chunk_size=10)
+        parallel_features = feature_matcher_training.extract_features_from_outputs(
+            outputs, self._entity_factory(), self._entity_factory, num_processes=2, chunk_size=10)
+        numpy.testing.assert_allclose(serial_features, parallel_features, atol=1e-9)
+
+    def test_trained_feature_matcher_refers_to_model(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            self._student.save(os.path.join(tempdir, "model"))
+        content = feature_matcher_training.train_feature_matcher(
+            self._student, self._reductions, self._entity, num_feature_matches=1)
+        self.assertIsNotNone(self._student.content_hash)
+        self.assertEqual(self._student.content_hash, content["model_content_hash"])
+        outputs = self._student.inverse_transform(self._reductions[:1])
+        features = feature_matcher_training.extract_features_from_outputs(
+            outputs, self._entity_factory())
+        _distances, indices = content["feature_matcher"].match(features)
+        self.assertEqual(0, indices[0][0])
+        numpy.testing.assert_array_equal(self._reductions, content["sampled_reductions"])
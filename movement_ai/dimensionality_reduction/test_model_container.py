@@ -0,0 +1,97 @@
+import unittest
+import numpy
+import os
+import tempfile
+from argparse import ArgumentParser
+
+from . import model_container
+from .pca import LinearPCA, KernelPCA
+
+class ModelContainerTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tempdir.name, "model")
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+
+    def test_roundtrip_with_memory_mapped_arrays(self):
+        large_array = numpy.arange(1000, dtype=numpy.float32).reshape(100, 10)
+        small_array = numpy.array([1., 2.])
+        content = {"large": large_array, "small": small_array, "other": ["x", 1]}
+        saved_hash = model_container.save(self._path, content, {"key": "value"})
+
+        loaded_content, metadata, loaded_hash = model_container.load(self._path, verify_hash=True)
+        self.assertIsInstance(loaded_content["large"], numpy.memmap)
+        numpy.testing.assert_array_equal(large_array, loaded_content["large"])
+        numpy.testing.assert_array_equal(small_array, loaded_content["small"])
+        self.assertEqual(["x", 1], loaded_content["other"])
+        self.assertEqual({"key": "value"}, metadata)
+        self.assertEqual(saved_hash, loaded_hash)
+
+    def test_loaded_arrays_are_copy_on_write(self):
+        model_container.save(self._path, numpy.zeros(1000), {})
+        loaded_array, _metadata, _hash = model_container.load(self._path)
+        loaded_array += 1
+        reloaded_array, _metadata, _hash = model_container.load(self._path, verify_hash=True)
+        numpy.testing.assert_array_equal(numpy.zeros(1000), reloaded_array)
+
+    def test_corrupted_content_is_detected(self):
+        model_container.save(self._path, numpy.zeros(1000), {})
+        with open(self._path, "r+b") as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b"\1")
+        with self.assertRaises(model_container.ModelContainerError):
+            model_container.load(self._path)
+        model_container.load(self._path, verify_hash=False)
+
+    def test_student_roundtrip(self):
+        observations = numpy.random.RandomState(0).randn(200, 6)
+        student = self._create_student(KernelPCA, 6, 2)
+        student.fit(observations)
+        student.probe(observations)
+        student.save(self._path, {"entity": "hierarchical"})
+
+        loaded_student = self._create_student(KernelPCA, 6, 2)
+        loaded_student.load(self._path, {"entity": "hierarchical"})
+        numpy.testing.assert_array_almost_equal(
+            student.inverse_transform(student.transform(observations)),
+            loaded_student.inverse_transform(loaded_student.transform(observations)))
+        numpy.testing.assert_array_equal(
+            student.normalized_observed_reductions, loaded_student.normalized_observed_reductions)
+        self.assertEqual(student.content_hash, loaded_student.content_hash)
+
+    def test_reductions_are_those_of_spatial_index(self):
+        observations = numpy.random.RandomState(0).randn(200, 6)
+        student = self._create_student(LinearPCA, 6, 2)
+        student.fit(observations)
+        student.probe(observations)
+        student.save(self._path)
+
+        loaded_student = self._create_student(LinearPCA, 6, 2)
+        loaded_student.load(self._path)
+        self.assertIsInstance(loaded_student.normalized_observed_reductions, numpy.memmap)
+        spatial_index = loaded_student.get_spatial_index()
+        self.assertIs(spatial_index.points, loaded_student.normalized_observed_reductions)
+        loaded_student.normalized_observed_reductions = \
+            student.normalized_observed_reductions.astype(numpy.float32)
+        self.assertIs(spatial_index.points, loaded_student.normalized_observed_reductions)
+
+    def test_mismatching_student_is_rejected(self):
+        observations = numpy.random.RandomState(0).randn(200, 6)
+        student = self._create_student(LinearPCA, 6, 2)
+        student.fit(observations)
+        student.probe(observations)
+        student.save(self._path, {"entity": "hierarchical"})
+
+        with self.assertRaises(model_container.ModelContainerError):
+            self._create_student(LinearPCA, 6, 3).load(self._path)
+        with self.assertRaises(model_container.ModelContainerError):
+            self._create_student(KernelPCA, 6, 2).load(self._path)
+        with self.assertRaises(model_container.ModelContainerError):
+            self._create_student(LinearPCA, 6, 2).load(self._path, {"entity": "point"})
+
+    def _create_student(self, cls, num_input_dimensions, num_reduced_dimensions):
+        parser = ArgumentParser()
+        cls.add_parser_arguments(parser)
+        return cls(num_input_dimensions, num_reduced_dimensions, parser.parse_args([]))
@@ -0,0 +1,84 @@
+import unittest
+import collections
+import numpy
+from argparse import ArgumentParser
+
+from .pca import LinearPCA
+from .online_probing import OnlineProbing
+
+NUM_INPUT_DIMENSIONS = 6
+NUM_REDUCED_DIMENSIONS = 3
+MEMORY_SIZE = 50
+
+class CountingLinearPCA(LinearPCA):
+    def __init__(self, *args):
+        LinearPCA.__init__(self, *args)
+        self.num_transformed_observations = 0
+
+    def transform(self, observations):
+        self.num_transformed_observations += len(observations)
+        return LinearPCA.transform(self, observations)
+
+class OnlineProbingTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = ArgumentParser()
+        LinearPCA.add_parser_arguments(parser)
+        self._student = CountingLinearPCA(
+            NUM_INPUT_DIMENSIONS, NUM_REDUCED_DIMENSIONS, parser.parse_args([]))
+        self._observations = numpy.random.RandomState(0).uniform(
+            0, 1, (200, NUM_INPUT_DIMENSIONS))
+        self._student.fit(self._observations)
+        self._memory = collections.deque([], maxlen=MEMORY_SIZE)
+
+    def test_only_new_observations_are_probed_between_full_probes(self):
+        online_probing = OnlineProbing(self._student, self._memory, full_probe_interval=1000)
+        for observation in self._observations[:MEMORY_SIZE]:
+            online_probing.append(observation)
+        online_probing.probe()
+        self._student.num_transformed_observations = 0
+        for observation in self._observations[MEMORY_SIZE:]:
+            online_probing.append(observation)
+            online_probing.probe()
+        self.assertEqual(1, online_probing.num_full_probes)
+        self.assertEqual(
+            len(self._observations) - MEMORY_SIZE, self._student.num_transformed_observations)
+        self._assert_reductions_of_memory()
+
+    def test_observations_appended_without_probe_are_probed_later(self):
+        online_probing = OnlineProbing(self._student, self._memory, full_probe_interval=100)
+        for observation in self._observations[:MEMORY_SIZE]:
+            online_probing.append(observation)
+        online_probing.probe()
+        for observation in self._observations[MEMORY_SIZE:MEMORY_SIZE+5]:
+            online_probing.append(observation)
+        online_probing.probe()
+        self.assertEqual(1, online_probing.num_full_probes)
+        self._assert_reductions_of_memory()
+
+    def test_whole_memory_is_probed_at_interval(self):
+        online_probing = OnlineProbing(self._student, self._memory, full_probe_interval=10)
+        for observation in self._observations[:100]:
+            online_probing.append(observation)
+            online_probing.probe()
+        self.assertEqual(10, online_probing.num_full_probes)
+
+    def test_spatial_index_is_rarely_rebuilt(self):
+        memory = collections.deque([], maxlen=500)
+        observations = numpy.random.RandomState(1).uniform(0, 1, (1000, NUM_INPUT_DIMENSIONS))
+        online_probing = OnlineProbing(self._student, memory, full_probe_interval=1000)
+        for observation in observations[:500]:
+            online_probing.append(observation)
+        online_probing.probe()
+        spatial_index = self._student.get_spatial_index()
+        for observation in observations[500:]:
+            online_probing.append(observation)
+            online_probing.probe()
+        self.assertLessEqual(spatial_index.num_builds, 500 / 25 + 1)
+        self.assertIs(spatial_index.points, self._student.normalized_observed_reductions)
+        self._memory = memory
+        self._assert_reductions_of_memory()
+
+    def _assert_reductions_of_memory(self):
+        numpy.testing.assert_allclose(
+            self._student.normalize_reductions(self._student.transform(numpy.array(self._memory))),
+            self._student.normalized_observed_reductions)
@@ -0,0 +1,117 @@
+import unittest
+import numpy
+import os
+import tempfile
+from argparse import ArgumentParser
+
+from .pca import LinearPCA, KernelPCA, NystroemKernelPCA, IncrementalPCA
+
+NUM_INPUT_DIMENSIONS = 10
+NUM_REDUCED_DIMENSIONS = 3
+
+def create(cls, num_input_dimensions, num_reduced_dimensions, args_strings=[]):
+    parser = ArgumentParser()
+    cls.add_parser_arguments(parser)
+    args = parser.parse_args(args_strings)
+    return cls(num_input_dimensions, num_reduced_dimensions, args)
+
+class IncrementalPCATestCase(unittest.TestCase):
+    def setUp(self):
+        random_state = numpy.random.RandomState(0)
+        scales = numpy.array([5., 3., 2.] + [.1] * (NUM_INPUT_DIMENSIONS - 3))
+        rotation, _ = numpy.linalg.qr(random_state.randn(NUM_INPUT_DIMENSIONS, NUM_INPUT_DIMENSIONS))
+        self._observations = numpy.dot(
+            random_state.randn(2000, NUM_INPUT_DIMENSIONS) * scales, rotation) + 1.
+        self._batch_pca = self._create(LinearPCA)
+        self._batch_pca.fit(self._observations)
+
+    def test_components_converge_towards_batch_pca_when_trained_frame_by_frame(self):
+        incremental_pca = self._create(IncrementalPCA)
+        for observation in self._observations:
+            incremental_pca.train([observation])
+        self._assert_same_components(incremental_pca)
+
+    def test_batch_train(self):
+        incremental_pca = self._create(IncrementalPCA)
+        incremental_pca.batch_train(self._observations)
+        self._assert_same_components(incremental_pca)
+
+    def test_loss_is_none_before_first_partial_fit(self):
+        incremental_pca = self._create(IncrementalPCA)
+        self.assertIsNone(incremental_pca.train([self._observations[0]], return_loss=True))
+
+    def test_flush_fits_frames_left_over_from_last_batch(self):
+        incremental_pca = create(IncrementalPCA, NUM_INPUT_DIMENSIONS, NUM_REDUCED_DIMENSIONS,
+                                 ["--partial-fit-batch-size", "5000"])
+        for observation in self._observations:
+            incremental_pca.train([observation])
+        self.assertFalse(incremental_pca._is_fitted())
+        incremental_pca.flush()
+        self._assert_same_components(incremental_pca)
+
+    def test_flush_fails_if_too_few_frames_to_fit(self):
+        incremental_pca = self._create(IncrementalPCA)
+        incremental_pca.train([self._observations[0]])
+        self.assertRaises(Exception, incremental_pca.flush)
+
+    def test_probe(self):
+        incremental_pca = self._create(IncrementalPCA)
+        incremental_pca.batch_train(self._observations)
+        incremental_pca.probe(self._observations)
+        normalized_observed_reductions = incremental_pca.normalized_observed_reductions
+        self.assertEqual(
+            (len(self._observations), NUM_REDUCED_DIMENSIONS), normalized_observed_reductions.shape)
+        numpy.testing.assert_array_almost_equal(
+            [0.] * NUM_REDUCED_DIMENSIONS, normalized_observed_reductions.min(axis=0))
+        numpy.testing.assert_array_almost_equal(
+            [1.] * NUM_REDUCED_DIMENSIONS, normalized_observed_reductions.max(axis=0))
+
+    def test_save_and_load(self):
+        incremental_pca = self._create(IncrementalPCA)
+        incremental_pca.batch_train(self._observations)
+        incremental_pca.probe(self._observations)
+        loaded_pca = self._create(IncrementalPCA)
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "model")
+            incremental_pca.save(path)
+            loaded_pca.load(path)
+        numpy.testing.assert_array_almost_equal(
+            incremental_pca.transform(self._observations),
+            loaded_pca.transform(self._observations))
+        self.assertEqual(incremental_pca.reduction_range, loaded_pca.reduction_range)
+
+    def _create(self, cls):
+        return create(cls, NUM_INPUT_DIMENSIONS, NUM_REDUCED_DIMENSIONS)
+
+    def _assert_same_components(self, incremental_pca):
+        alignment = numpy.abs(numpy.dot(
+            incremental_pca.pca.components_, self._batch_pca.pca.components_.T))
+        numpy.testing.assert_allclose(
+            numpy.eye(NUM_REDUCED_DIMENSIONS), alignment, atol=1e-2)
+
+class NystroemKernelPCATestCase(unittest.TestCase):
+    def setUp(self):
+        random_state = numpy.random.RandomState(0)
+        latent = random_state.uniform(-1, 1, (400, 2))
+        self._observations = numpy.column_stack([
+            latent[:,0],
+            latent[:,1],
+            latent[:,0] ** 2,
+            latent[:,0] * latent[:,1],
+            numpy.sin(latent[:,1])]) + random_state.randn(400, 5) * .01
+
+    def test_reconstruction_error_is_close_to_exact_kernel_pca(self):
+        exact_error = self._reconstruction_error(create(KernelPCA, 5, 2))
+        approximated_error = self._reconstruction_error(
+            create(NystroemKernelPCA, 5, 2, ["--num-landmarks=50"]))
+        self.assertLess(approximated_error, exact_error * 1.1)
+
+    def test_num_landmarks_exceeding_num_observations(self):
+        student = create(NystroemKernelPCA, 5, 2, ["--num-landmarks=1000"])
+        student.fit(self._observations)
+        self.assertEqual((len(self._observations), 2), student.transform(self._observations).shape)
+
+    def _reconstruction_error(self, student):
+        student.fit(self._observations)
+        reconstructions = student.inverse_transform(student.transform(self._observations))
+        return ((self._observations - reconstructions) ** 2).mean()
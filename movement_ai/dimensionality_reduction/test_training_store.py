@@ -0,0 +1,62 @@
+import unittest
+import numpy
+import os
+import tempfile
+from argparse import ArgumentParser
+
+from .training_store import TrainingStore
+from .pca import LinearPCA
+
+class TrainingStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tempdir.name, "training.npy")
+        self._training_data = numpy.random.RandomState(0).randn(1003, 5).astype(numpy.float32)
+        self._store = TrainingStore.create_from_array(self._path, self._training_data)
+
+    def tearDown(self):
+        del self._store
+        self._tempdir.cleanup()
+
+    def test_chunks_cover_training_data_in_order(self):
+        numpy.testing.assert_array_equal(
+            self._training_data,
+            numpy.concatenate(list(self._store.get_chunks(chunk_size=100))))
+
+    def test_shuffled_batches_contain_each_sample_once(self):
+        batches = list(self._store.get_shuffled_batches(
+            batch_size=64, chunk_size=100, shuffle_buffer_size=300,
+            random_state=numpy.random.RandomState(0)))
+        self.assertTrue(all(len(batch) <= 64 for batch in batches))
+        samples = numpy.concatenate(batches)
+        self.assertFalse(numpy.array_equal(self._training_data, samples))
+        numpy.testing.assert_array_equal(
+            self._sorted_rows(self._training_data), self._sorted_rows(samples))
+
+    def test_writer(self):
+        path = os.path.join(self._tempdir.name, "written.npy")
+        writer = TrainingStore.create(path, len(self._training_data), 5)
+        for datum in self._training_data:
+            writer.append(datum)
+        store = writer.close()
+        numpy.testing.assert_array_equal(
+            self._training_data, numpy.concatenate(list(store.get_chunks(chunk_size=1000))))
+
+    def test_probe_in_chunks_equals_probe(self):
+        parser = ArgumentParser()
+        LinearPCA.add_parser_arguments(parser)
+        student = LinearPCA(5, 2, parser.parse_args([]))
+        student.fit(self._training_data)
+        student.probe(self._training_data)
+        expected_range = student.reduction_range
+        expected_reductions = student.normalized_observed_reductions
+
+        student.probe_in_chunks(lambda: self._store.get_chunks(chunk_size=100))
+        for expected, actual in zip(expected_range, student.reduction_range):
+            for key in ["min", "max", "range"]:
+                self.assertAlmostEqual(expected[key], actual[key], places=5)
+        numpy.testing.assert_array_almost_equal(
+            expected_reductions, student.normalized_observed_reductions)
+
+    def _sorted_rows(self, array):
+        return array[numpy.lexsort(array.T)]
@@ -0,0 +1,69 @@
+import numpy
+
+# Training data stored as an .npy file and read through a memory map, so that corpora
+# larger than the available memory can be trained on in chunks.
+class TrainingStore:
+    def __init__(self, path):
+        self._data = numpy.load(path, mmap_mode="r")
+
+    @staticmethod
+    def create(path, num_samples, num_dimensions):
+        return TrainingStoreWriter(path, num_samples, num_dimensions)
+
+    @staticmethod
+    def create_from_array(path, training_data):
+        numpy.save(path, numpy.asarray(training_data, dtype=numpy.float32))
+        return TrainingStore(path)
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def num_dimensions(self):
+        return self._data.shape[1]
+
+    def get_chunks(self, chunk_size):
+        for start in range(0, len(self._data), chunk_size):
+            yield numpy.array(self._data[start:start+chunk_size])
+
+    def get_shuffled_batches(self, batch_size, chunk_size, shuffle_buffer_size, random_state=numpy.random):
+        # Chunks are read in random order and collected in a buffer, which is shuffled and
+        # emitted as batches whenever it is full.
+        chunk_starts = random_state.permutation(numpy.arange(0, len(self._data), chunk_size))
+        buffer = numpy.empty((0, self.num_dimensions), dtype=self._data.dtype)
+        for start in chunk_starts:
+            buffer = numpy.concatenate([buffer, self._data[start:start+chunk_size]])
+            if len(buffer) >= shuffle_buffer_size:
+                buffer = buffer[random_state.permutation(len(buffer))]
+                num_batched_samples = len(buffer) - len(buffer) % batch_size
+                for batch_start in range(0, num_batched_samples, batch_size):
+                    yield buffer[batch_start:batch_start+batch_size]
+                buffer = buffer[num_batched_samples:]
+        buffer = buffer[random_state.permutation(len(buffer))]
+        for batch_start in range(0, len(buffer), batch_size):
+            yield buffer[batch_start:batch_start+batch_size]
+
+    def get_random_sample(self, num_samples, random_state=numpy.random):
+        if num_samples >= len(self._data):
+            return numpy.array(self._data)
+        indices = numpy.sort(random_state.choice(len(self._data), num_samples, replace=False))
+        return self._data[indices]
+
+class TrainingStoreWriter:
+    def __init__(self, path, num_samples, num_dimensions):
+        self._path = path
+        self._data = numpy.lib.format.open_memmap(
+            path, mode="w+", dtype=numpy.float32, shape=(num_samples, num_dimensions))
+        self._num_written_samples = 0
+
+    def append(self, datum):
+        self._data[self._num_written_samples] = datum
+        self._num_written_samples += 1
+
+    def close(self):
+        if self._num_written_samples != len(self._data):
+            raise Exception("expected %d samples but got %d" % (
+                len(self._data), self._num_written_samples))
+        self._data.flush()
+        del self._data
+        return TrainingStore(self._path)
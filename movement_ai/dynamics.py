@@ -1,4 +1,6 @@
-import math
+import numpy
+
+# Velocities can be computed for a single relative cursor or for an array of them.
 
 class Dynamics:
     def __init__(self, min_relative_velocity=.1):
@@ -12,21 +14,19 @@ class Dynamics:
 
 class SymmetricalDynamics(Dynamics):
     def unclamped_velocity(self, relative_cursor):
-        if relative_cursor < .5:
-            return self._clamp(self.rising_velocity(relative_cursor*2))
-        else:
-            return self._clamp(self.rising_velocity((1-relative_cursor) * 2))
+        return self._clamp(self.rising_velocity(numpy.where(
+            relative_cursor < .5, relative_cursor*2, (1-relative_cursor) * 2)))
 
 class constant_dynamics(Dynamics):
     def velocity(self, relative_cursor):
-        return 1.
+        return numpy.ones_like(relative_cursor, dtype=float)
 
 class exponential_dynamics(SymmetricalDynamics):
     _slope = 3.
 
     def rising_velocity(self, relative_cursor):
-        return pow(relative_cursor, self._slope)
+        return numpy.power(relative_cursor, self._slope)
 
 class sine_dynamics(Dynamics):
     def unclamped_velocity(self, relative_cursor):
-        return (math.sin((relative_cursor + .75) * math.pi*2) + 1) / 2
+        return (numpy.sin((relative_cursor + .75) * numpy.pi*2) + 1) / 2
@@ -5,6 +5,7 @@ from transformations import euler_matrix, quaternion_from_euler, euler_from_quat
 import random
 from physics import Constrainers
 from feature_extraction import FeatureExtractor
+from output_pipeline import OutputPipeline
 import math
 
 ASSUME_NO_TRANSLATIONAL_OFFSETS_IN_NON_ROOT = True
@@ -205,6 +206,7 @@ class Entity(BaseEntity):
         self._last_root_vertical_orientation = None
         self._rotation_interpolators = {}
         self._enable_friction = self.args.friction
+        self._output_pipeline = None
         if hasattr(self.args, "enable_features") and self.args.enable_features:
             self.feature_extractor = FeatureExtractor(self._coordinate_up)
             self._bvh_joint_name_for_feature = self._get_bvh_joint_names_for_features_from_args()
@@ -399,11 +401,31 @@ class Entity(BaseEntity):
         self.bvh_reader.get_hierarchy().set_pose_vertices(
             output_pose, vertices, not ASSUME_NO_TRANSLATIONAL_OFFSETS_IN_NON_ROOT)
 
+    def get_output_pipeline(self):
+        # Faster alternative to parameters_to_processed_pose, sharing its constrainers
+        # and root orientation processing. See output_pipeline.py.
+        if self._output_pipeline is None:
+            self._output_pipeline = OutputPipeline(
+                self.bvh_reader, self.rotation_parametrization, self._unnormalized_constrainers,
+                translate=self.args.translate,
+                translation_weight=self.args.translation_weight,
+                process_root_angles=self._process_vertical_axis)
+        return self._output_pipeline
+
     def extract_features(self, pose):
-        positions = [
+        return self.feature_extractor.extract_features(*self.get_feature_input_positions(pose))
+
+    def get_feature_input_positions(self, pose):
+        return [
             pose.get_joint(self._bvh_joint_name_for_feature[joint_name]).worldpos
             for joint_name in self.feature_extractor.INPUT_JOINTS]
-        return self.feature_extractor.extract_features(*positions)
+
+    def get_feature_input_vertex_indices(self):
+        # Indices of the feature input joints in the vertices of the output pipeline
+        output_pipeline = self.get_output_pipeline()
+        return [
+            output_pipeline.get_vertex_index(self._bvh_joint_name_for_feature[joint_name])
+            for joint_name in self.feature_extractor.INPUT_JOINTS]
 
     def interpolate(self, parameters1, parameters2, amount):
         result = []
@@ -1,5 +1,6 @@
 class Event:
     SUBSCRIBE = "SUBSCRIBE"
+    SET_WIRE_FORMAT = "SET_WIRE_FORMAT"
     START = "START"
     STOP = "STOP"
     INPUT = "INPUT"
@@ -0,0 +1,103 @@
+import contextlib
+import hashlib
+import threading
+import numpy
+
+from event import Event
+
+# Events that describe state which is typically resent every frame, e.g. the current
+# output. Only the latest such event of each type matters to receivers.
+STATE_EVENT_TYPES = [
+    Event.FRAME_COUNT,
+    Event.INPUT,
+    Event.OUTPUT,
+    Event.REDUCTION,
+    Event.REDUCTION_RANGE,
+    Event.NORMALIZED_OBSERVED_REDUCTIONS,
+    Event.TRAINING_LOSS,
+    Event.FEATURES,
+    Event.IO_BLEND,
+    Event.NEIGHBORS_CENTER,
+    Event.USER_INTENSITY,
+    ]
+
+# Filters the events passed to a send function. A state event is dropped if its content
+# equals that of the last sent event of the same type, and while collecting, e.g. during
+# one frame, only the latest state event of each type is kept and sent when collecting
+# ends. Other events are sent immediately. Collecting only applies to events put by the
+# thread that is collecting, so that events from other threads are not delayed.
+class EventOutbox:
+    def __init__(self, send, state_event_types=STATE_EVENT_TYPES):
+        self._send = send
+        self._state_event_types = set(state_event_types)
+        self._lock = threading.Lock()
+        self._content_keys = {}
+        self._thread_state = threading.local()
+        self.num_dropped_events = 0
+
+    def put(self, event):
+        if event.type not in self._state_event_types:
+            self._send(event)
+            return
+        if self._get_collecting_depth() > 0:
+            pending_events = self._thread_state.pending_events
+            if event.type in pending_events:
+                with self._lock:
+                    self.num_dropped_events += 1
+                del pending_events[event.type]
+            pending_events[event.type] = event
+            return
+        self._send_if_changed(event)
+
+    @contextlib.contextmanager
+    def collecting(self):
+        if self._get_collecting_depth() == 0:
+            self._thread_state.pending_events = {}
+        self._thread_state.collecting_depth += 1
+        try:
+            yield
+        finally:
+            self._thread_state.collecting_depth -= 1
+            if self._thread_state.collecting_depth == 0:
+                pending_events = list(self._thread_state.pending_events.values())
+                self._thread_state.pending_events = {}
+                for event in pending_events:
+                    self._send_if_changed(event)
+
+    def _get_collecting_depth(self):
+        if not hasattr(self._thread_state, "collecting_depth"):
+            self._thread_state.collecting_depth = 0
+        return self._thread_state.collecting_depth
+
+    def forget(self):
+        # Makes the next state event of each type be sent even if unchanged, e.g. when a
+        # new receiver has connected.
+        with self._lock:
+            self._content_keys = {}
+
+    def _send_if_changed(self, event):
+        content_key = _get_content_key(event.content)
+        with self._lock:
+            if self._content_keys.get(event.type) == content_key:
+                self.num_dropped_events += 1
+                return
+            self._content_keys[event.type] = content_key
+        self._send(event)
+
+def _get_content_key(content):
+    # A hashable key which is equal for equal contents, also for numpy scalars and for
+    # lists, tuples and dicts containing arrays.
+    if isinstance(content, (numpy.ndarray, numpy.generic)):
+        content = numpy.ascontiguousarray(content)
+        return (content.dtype.str, content.shape, hashlib.sha1(content.tobytes()).digest())
+    if isinstance(content, (list, tuple)):
+        return (type(content).__name__,) + tuple(_get_content_key(item) for item in content)
+    if isinstance(content, dict):
+        return ("dict",) + tuple(
+            (key, _get_content_key(value)) for key, value in content.items())
+    try:
+        hash(content)
+    except TypeError:
+        # content that cannot be compared is never considered unchanged
+        return object()
+    return (type(content).__name__, content)
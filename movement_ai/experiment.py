@@ -11,15 +11,16 @@ from fps_meter import FpsMeter
 import threading
 from event import Event
 from event_listener import EventListener
+from event_outbox import EventOutbox
 from bvh.bvh_writer import BvhWriter
 import glob
 import subprocess
 import tracking.pn.receiver
 import random
 import numpy
+from startup_profiler import profiler as startup_profiler
 
 from connectivity.websocket_server import WebsocketServer, ClientHandler
-from connectivity.websocket_client import WebsocketClient
 from connectivity.single_process_server import SingleProcessServer
 from connectivity.single_process_client import SingleProcessClient
 
@@ -108,6 +109,8 @@ class Experiment(EventListener):
                             help="Force websockets support (enabled automatically by --backend-only)")
         parser.add_argument("--no-websockets", action="store_true",
                             help="Force running without websockets support (e.g when combing --ui-only and --event-log-source)")
+        parser.add_argument("--binary-events", action="store_true",
+                            help="With --ui-only, receive array events from the backend in the binary wire format rather than as JSON")
         parser.add_argument("--launch-when-ready", help="Run command when websocket server ready")
         parser.add_argument("--output-receiver-host")
         parser.add_argument("--output-receiver-port", type=int, default=10000)
@@ -123,6 +126,8 @@ class Experiment(EventListener):
                             help="Handle time deterministically (fixed time interval between updates) rather than taking " +
                             "real time into account. May cause latency.")
         parser.add_argument("--stopped", action="store_true", help="Start in stopped mode")
+        parser.add_argument("--profile-startup", action="store_true",
+                            help="Report time spent on imports, loading and the first frame")
 
     def __init__(self, parser, event_handlers={}):
         event_handlers.update({
@@ -211,6 +216,7 @@ class Experiment(EventListener):
         self._frame_count = 0
         self._ui_handlers = set()
         self._ui_handlers_lock = threading.Lock()
+        self._event_outbox = EventOutbox(self._send_event_to_ui_handlers)
         self._exporting_output = False
 
         if args.output_receiver_host:
@@ -289,6 +295,7 @@ class Experiment(EventListener):
     def ui_connected(self, handler):
         with self._ui_handlers_lock:
             self._ui_handlers.add(handler)
+        self._event_outbox.forget()
         if self.entity.processed_input is not None:
             self.send_event_to_ui(Event(Event.INPUT, self.entity.processed_input))
         if self.output is not None:
@@ -315,8 +322,10 @@ class Experiment(EventListener):
                 self._proceed_and_update()
             print("ok")
         else:
-            self.entity.update(self.input)
-            self.update()
+            with startup_profiler.phase("first frame"):
+                self.entity.update(self.input)
+                self.update()
+        startup_profiler.report()
                 
         run_backend = not self.args.ui_only
         run_ui = not self.args.backend_only
@@ -349,7 +358,8 @@ class Experiment(EventListener):
             if self.args.no_websockets:
                 client = None
             else:
-                client = WebsocketClient(self.args.backend_host)
+                from connectivity.websocket_client import WebsocketClient
+                client = WebsocketClient(self.args.backend_host, binary=self.args.binary_events)
             self.run_ui(client)
 
         if self.args.with_profiler:
@@ -368,35 +378,37 @@ class Experiment(EventListener):
         pass
 
     def _update_and_refresh_uis(self):
-        if self.now is None:
-            self.now = 0
-            self.stopwatch.start()
-        else:
-            self.now = self.current_time()
-            if self.is_running():
-                if self.args.deterministic:
-                    self.time_increment = 1. / self.args.frame_rate
-                else:
-                    self.time_increment = self.now - self.previous_frame_time
-                if self.args.show_fps:
-                    self._fps_meter.update()
+        # state events sent during a frame are coalesced and sent at its end
+        with self._event_outbox.collecting():
+            if self.now is None:
+                self.now = 0
+                self.stopwatch.start()
+            else:
+                self.now = self.current_time()
+                if self.is_running():
+                    if self.args.deterministic:
+                        self.time_increment = 1. / self.args.frame_rate
+                    else:
+                        self.time_increment = self.now - self.previous_frame_time
+                    if self.args.show_fps:
+                        self._fps_meter.update()
 
-                self._proceed_and_update()
+                    self._proceed_and_update()
 
-                if self.entity.processed_input is not None:
-                    self.send_event_to_ui(Event(Event.INPUT, self.entity.processed_input))
+                    if self.entity.processed_input is not None:
+                        self.send_event_to_ui(Event(Event.INPUT, self.entity.processed_input))
 
-                if self.output is not None:
-                    self.process_and_broadcast_output()
+                    if self.output is not None:
+                        self.process_and_broadcast_output()
 
-        self.previous_frame_time = self.now
+            self.previous_frame_time = self.now
 
-        if self.output is not None and (self._exporting_output or self._output_sender):
-            self.entity.parameters_to_processed_pose(self.output, self.pose)
-            if self._exporting_output:
-                self._export_bvh()
-            if self._output_sender:
-                self._send_output()
+            if self.output is not None and (self._exporting_output or self._output_sender):
+                self.entity.parameters_to_processed_pose(self.output, self.pose)
+                if self._exporting_output:
+                    self._export_bvh()
+                if self._output_sender:
+                    self._send_output()
 
     def _proceed_and_update(self):
         self.proceed()
@@ -411,15 +423,19 @@ class Experiment(EventListener):
             self.send_event_to_ui(Event(Event.OUTPUT, self.processed_output))
 
     def _proceed_to_next_frame(self, event):
-        self.time_increment = 1. / self.args.frame_rate
-        self._proceed_and_update()
+        with self._event_outbox.collecting():
+            self.time_increment = 1. / self.args.frame_rate
+            self._proceed_and_update()
 
-        if self.output is not None:
-            self.process_and_broadcast_output()
-        if self.entity.processed_input is not None:
-            self.send_event_to_ui(Event(Event.INPUT, self.entity.processed_input))
+            if self.output is not None:
+                self.process_and_broadcast_output()
+            if self.entity.processed_input is not None:
+                self.send_event_to_ui(Event(Event.INPUT, self.entity.processed_input))
 
     def send_event_to_ui(self, event):
+        self._event_outbox.put(event)
+
+    def _send_event_to_ui_handlers(self, event):
         with self._ui_handlers_lock:
             for ui_handler in self._ui_handlers:
                 if not (event.source == "PythonUI" and ui_handler.__class__ == SingleProcessUiHandler):
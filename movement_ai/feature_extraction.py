@@ -116,13 +116,82 @@ class FeatureExtractor:
 
     def _get_horizontal_distance(self, position1, position2):
         return math.sqrt(sum([
-                    pow(position1[coordinate] - position2[coordinate], 2)
+                    (position1[coordinate] - position2[coordinate]) *
+                    (position1[coordinate] - position2[coordinate])
                     for coordinate in self._horizontal_coordinates]))
 
     def _get_total_horizontal_distance(self, positions):
         return sum([self._get_horizontal_distance(positions[i], positions[i+1])
                     for i in range(len(positions)-1)])
 
+    def extract_features_from_positions(self, positions):
+        # Vectorized extract_features for an array of shape (..., 15, 3) with the positions
+        # of INPUT_JOINTS, e.g. one pose per row. Returns an array of shape (..., 7) equal to
+        # the result of extract_features for each pose.
+        positions = numpy.asarray(positions, dtype=float)
+        (left_foot, left_hand, left_forearm, left_shoulder, left_knee, left_hip,
+         right_foot, right_hand, right_forearm, right_shoulder, right_knee, right_hip,
+         torso, neck, head) = [positions[..., index, :] for index in range(len(self.INPUT_JOINTS))]
+
+        left_arm_length = self._get_total_distances(
+            [left_hand, left_forearm, left_shoulder, neck])
+        left_hand_elevation = self._get_elevations(left_hand, neck, left_arm_length)
+
+        right_arm_length = self._get_total_distances(
+            [right_hand, right_forearm, right_shoulder, neck])
+        right_hand_elevation = self._get_elevations(right_hand, neck, right_arm_length)
+
+        torso_head_distance = self._get_total_distances([torso, neck, head])
+        head_elevation = self._get_elevations(torso, head, torso_head_distance)
+
+        mid_feet = (left_foot + right_foot) / 2
+        leaning = self._get_horizontal_distances(mid_feet, neck) / self._get_total_distances(
+            [left_foot, left_knee, left_hip, torso, neck])
+
+        relative_knee_distance = self._distances(left_knee, right_knee) / \
+            self._get_total_distances([left_knee, left_hip, right_hip, right_knee])
+
+        max_hand_distance = self._get_total_distances(
+            [left_hand, left_forearm, left_shoulder, neck, right_shoulder, right_forearm, right_hand])
+        openness = self._get_horizontal_distances(left_hand, right_hand) / max_hand_distance
+
+        asymmetry = numpy.abs(
+            left_hand[..., self._coordinate_up] - right_hand[..., self._coordinate_up]) / \
+            max_hand_distance
+
+        return numpy.stack([
+                left_hand_elevation,
+                right_hand_elevation,
+                head_elevation,
+                leaning,
+                relative_knee_distance,
+                openness,
+                asymmetry], axis=-1)
+
+    def _get_total_distances(self, positions):
+        # Summed in the same order as _get_total_distance
+        result = self._distances(positions[0], positions[1])
+        for i in range(1, len(positions)-1):
+            result = result + self._distances(positions[i], positions[i+1])
+        return result
+
+    def _get_elevations(self, start_positions, end_positions, total_distances):
+        return ((start_positions[..., self._coordinate_up] - end_positions[..., self._coordinate_up])
+                / total_distances + 1) / 2
+
+    def _distances(self, p1, p2):
+        # Computed as a dot product per row, like numpy.linalg.norm for a single vector,
+        # so that the results are identical to _distance
+        difference = p1 - p2
+        return numpy.sqrt(numpy.matmul(
+                difference[..., numpy.newaxis, :], difference[..., :, numpy.newaxis])[..., 0, 0])
+
+    def _get_horizontal_distances(self, positions1, positions2):
+        difference = positions1 - positions2
+        first, second = self._horizontal_coordinates
+        return numpy.sqrt(difference[..., first] * difference[..., first] +
+                          difference[..., second] * difference[..., second])
+
     def get_feature_by_name(self, feature_values, feature_name):
         feature_index = self._feature_name_to_index[feature_name]
         return feature_values[feature_index]
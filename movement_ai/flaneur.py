@@ -1,27 +1,35 @@
 import numpy
-import sklearn.neighbors
 from dimensionality_reduction.utils import PositionComparison
+from spatial_index import SpatialIndex
 
 NUM_NEIGHBORS = 100
+DEFAULT_NEIGHBOR_CACHE_SIZE = 4 * NUM_NEIGHBORS
 
 class Flaneur:
-    def __init__(self, map_points,
+    def __init__(self, map_points=None,
                  translational_speed=0.2,
                  directional_speed=0.7,
-                 look_ahead_distance=0.1):
+                 look_ahead_distance=0.1,
+                 spatial_index=None,
+                 neighbor_cache_size=DEFAULT_NEIGHBOR_CACHE_SIZE):
         self.translational_speed = translational_speed
         self.directional_speed = directional_speed
         self.look_ahead_distance = look_ahead_distance
-        self._n_dimensions = len(map_points[0])
-        self._nearest_neighbor_classifier = sklearn.neighbors.KNeighborsClassifier(
-            n_neighbors=NUM_NEIGHBORS, weights='uniform')
-        self.set_map_points(map_points)
+        self.neighbor_cache_size = neighbor_cache_size
+        self._neighbor_cache = None
+        if spatial_index is None:
+            spatial_index = SpatialIndex(map_points)
+        self._spatial_index = spatial_index
+        self._n_dimensions = spatial_index.num_dimensions
         self.reset()
 
+    @property
+    def map_points(self):
+        return self._spatial_index.points
+
     def set_map_points(self, map_points):
-        self.map_points = map_points
-        self._nearest_neighbor_classifier.fit(map_points, list(range(len(map_points))))
-        
+        self._spatial_index.set_points(map_points)
+
     def reset(self):
         self._position = numpy.random.random(size=self._n_dimensions)
         self._direction = None
@@ -42,6 +50,18 @@ class Flaneur:
         self._process_direction()
         self._move_in_direction()
 
+    def proceed_steps(self, time_increment, num_steps):
+        # Advances several steps at once and returns the position and neighbors center
+        # after each step. Successive steps stay close to each other, so with a neighbor
+        # cache, most of them are served by the same index query.
+        positions = []
+        neighbors_centers = []
+        for n in range(num_steps):
+            self.proceed(time_increment)
+            positions.append(numpy.array(self._position))
+            neighbors_centers.append(self._neighbors_center)
+        return positions, neighbors_centers
+
     def _process_direction(self):
         target_position = self.get_target_position(self._position, self._direction)
         target_comparison = PositionComparison(
@@ -56,14 +76,46 @@ class Flaneur:
 
     def get_target_position(self, current_position, current_direction):
         position_ahead = self._get_position_ahead(current_position, current_direction)
-        distances_list, points_indices_list = self._nearest_neighbor_classifier.kneighbors(
-            position_ahead)
-        distances = distances_list[0]
-        points_indices = points_indices_list[0]
-        self._neighbors = [self.map_points[index] for index in points_indices]
+        points_indices = self._get_nearest_neighbor_indices(position_ahead)
+        self._neighbors = self.map_points[points_indices]
         self._neighbors_center = numpy.mean(self._neighbors, 0)
         return self._neighbors_center
 
+    def _get_nearest_neighbor_indices(self, position):
+        if self.neighbor_cache_size is not None:
+            points_indices = self._get_nearest_neighbor_indices_from_cache(position)
+            if points_indices is not None:
+                return points_indices
+        distances_list, points_indices_list = self._spatial_index.query(
+            position, k=max(NUM_NEIGHBORS, self.neighbor_cache_size or 0))
+        if self.neighbor_cache_size is not None:
+            self._update_neighbor_cache(position, distances_list[0], points_indices_list[0])
+        return points_indices_list[0][:NUM_NEIGHBORS]
+
+    def _update_neighbor_cache(self, center, distances, points_indices):
+        # The cache holds the points nearest to a center. No other point is closer to the
+        # center than the cache radius, so the nearest neighbors of a position among the
+        # cached points are its true nearest neighbors, as long as they are within the
+        # cache radius minus the position's distance from the center.
+        if len(points_indices) < len(self.map_points):
+            radius = distances[-1]
+        else:
+            radius = numpy.inf
+        self._neighbor_cache = (
+            self.map_points, numpy.array(center), points_indices, self.map_points[points_indices], radius)
+
+    def _get_nearest_neighbor_indices_from_cache(self, position):
+        if self._neighbor_cache is None:
+            return None
+        map_points, center, points_indices, cached_points, radius = self._neighbor_cache
+        if map_points is not self.map_points:
+            return None
+        distances = numpy.linalg.norm(cached_points - position, axis=1)
+        nearest = numpy.argsort(distances)[:NUM_NEIGHBORS]
+        if distances[nearest[-1]] > radius - numpy.linalg.norm(position - center):
+            return None
+        return points_indices[nearest]
+
     def _get_position_ahead(self, current_position, current_direction):
         if current_direction is None:
             return current_position
@@ -1,22 +1,34 @@
-from scipy.interpolate import InterpolatedUnivariateSpline
+from scipy.interpolate import CubicSpline
 import numpy
 
 class InterpolationException(Exception): pass
 
 def interpolate(uninterpolated_path, resolution):
-    uninterpolated_path_numpy = numpy.array(uninterpolated_path)
-    n_dimensions = len(uninterpolated_path[0])
-    unclamped_interpolated_path = numpy.column_stack(
-        [_spline_interpolation_1d(uninterpolated_path_numpy[:,n], resolution)
-         for n in range(n_dimensions)])
-    return list(_clamp_path(unclamped_interpolated_path, uninterpolated_path))
-
-def _spline_interpolation_1d(points, resolution):
-    x = numpy.arange(0., 1., 1./len(points))
-    x_new = numpy.arange(0., 1., 1./resolution)
-    k = min(3, len(points)-1)
+    uninterpolated_path_numpy = numpy.array(uninterpolated_path, dtype=float)
+    unclamped_interpolated_path = _spline_interpolation(uninterpolated_path_numpy, resolution)
+    return list(_clamp_path(unclamped_interpolated_path, uninterpolated_path_numpy))
+
+def interpolate_paths(uninterpolated_paths, resolution):
+    # Batch version of interpolate for paths of equal length, given as an array of shape
+    # (number of paths, number of points, number of dimensions). Returns a list of
+    # interpolated paths.
+    uninterpolated_paths = numpy.asarray(uninterpolated_paths, dtype=float)
+    unclamped_interpolated_paths = _spline_interpolation(
+        uninterpolated_paths.swapaxes(0, 1), resolution).swapaxes(0, 1)
+    start_indices = _nearest_indices(unclamped_interpolated_paths, uninterpolated_paths[:,0])
+    end_indices = _nearest_indices(unclamped_interpolated_paths, uninterpolated_paths[:,-1])
+    return [path[start_index:end_index]
+            for path, start_index, end_index
+            in zip(unclamped_interpolated_paths, start_indices, end_indices)]
+
+def _spline_interpolation(points, resolution):
+    # Interpolates all dimensions at once. The not-a-knot end conditions reproduce the
+    # cubic (or for fewer points, quadratic or linear) interpolating spline which was
+    # previously fitted per dimension.
+    x = numpy.arange(len(points)) / float(len(points))
+    x_new = numpy.arange(resolution) / float(resolution)
     try:
-        curve = InterpolatedUnivariateSpline(x, points, k=k)
+        curve = CubicSpline(x, points, axis=0, bc_type="not-a-knot")
     except Exception as exception:
         raise InterpolationException(exception)
     return curve(x_new)
@@ -28,12 +40,11 @@ def _clamp_path(unclamped_interpolated_path, uninterpolated_path):
     index_nearest_end = _nearest_index(unclamped_interpolated_path, endpoint)
     return unclamped_interpolated_path[index_nearest_start:index_nearest_end]
 
-def _nearest_index(iterable, target):
-    return min(list(range(len(iterable))),
-               key=lambda i: _distance(iterable[i], target))
+def _nearest_index(points, target):
+    return numpy.argmin(numpy.linalg.norm(points - target, axis=1))
 
-def _distance(a, b):
-    return numpy.linalg.norm(a - b)
+def _nearest_indices(paths, targets):
+    return numpy.argmin(numpy.linalg.norm(paths - targets[:,numpy.newaxis], axis=2), axis=1)
 
 def linear_interpolation(a, b, interpolation):
     return a + (b - a) * interpolation
@@ -14,6 +14,7 @@ from osc_receiver import OscReceiver
 from websocket_client import WebsocketClient
 from event_listener import EventListener
 from event import Event
+from event_outbox import EventOutbox
 from tracked_users_viewer import TrackedUsersViewer
 from transformations import rotation_matrix, euler_from_quaternion
 from filters import OneEuroFilter
@@ -492,9 +493,10 @@ class UserMovementInterpreter:
 class OutputController:
     def __init__(self, event_sender):
         self._event_sender = event_sender
+        self._state_event_outbox = EventOutbox(event_sender.send_event)
 
     def send_user_intensity(self, intensity):
-        self._event_sender.send_event(Event(Event.USER_INTENSITY, intensity))
+        self._state_event_outbox.put(Event(Event.USER_INTENSITY, intensity))
 
     def send_system_state_changed(self):
         self._event_sender.send_event(Event(Event.SYSTEM_STATE_CHANGED))
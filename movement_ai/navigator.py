@@ -1,26 +1,33 @@
-import sklearn.neighbors
 import numpy
 import copy
-import dynamics as dynamics_module
+import bisect
 import random
 import math
+from spatial_index import SpatialIndex
 
 NUM_DESTINATION_CANDIDATES = 50
 
 class Navigator:
-    def __init__(self, map_points):
-        self._nearest_neighbor_regressor = sklearn.neighbors.KNeighborsRegressor(
-            n_neighbors=1, weights='uniform')
-        self.set_map_points(map_points)
-        self._n_dimensions = len(map_points[0])
+    def __init__(self, map_points=None, spatial_index=None, random_seed=None):
+        if spatial_index is None:
+            spatial_index = SpatialIndex(map_points)
+        self._spatial_index = spatial_index
+        if random_seed is None:
+            self._random_state = None
+        else:
+            self._random_state = numpy.random.RandomState(random_seed)
+        self._n_dimensions = spatial_index.num_dimensions
         self._max_distance = math.sqrt(self._n_dimensions) / 2
         self._departure = None
         self._preferred_location = None
 
+    @property
+    def map_points(self):
+        return self._spatial_index.points
+
     def set_map_points(self, map_points):
-        self.map_points = map_points
-        self._nearest_neighbor_regressor.fit(map_points, map_points)
-        
+        self._spatial_index.set_points(map_points)
+
     def set_preferred_location(self, location):
         self._preferred_location = location
 
@@ -29,45 +36,53 @@ class Navigator:
 
     def _select_destination(self, novelty=.0):
         if self._departure is None:
-            return self._generate_destination(novelty)
+            return self._generate_destinations(novelty, 1)[0]
         else:
             return self._select_best_destination(novelty)
 
     def _select_best_destination(self, novelty):
-        destination_candidates = [
-            self._generate_destination(novelty)
-            for n in range(NUM_DESTINATION_CANDIDATES)]
-        best_destination = min(
-            destination_candidates,
-            key=lambda destination: self._score_destination(destination))
-        return best_destination
-
-    def _generate_destination(self, novelty):
-        known_destination = random.choice(self.map_points)
-        return known_destination + self._random_vector_of_magnitude(novelty)
-
-    def _score_destination(self, destination):
-        score = self._difference_from_extension(destination)
+        destination_candidates = self._generate_destinations(
+            novelty, self._num_destination_candidates)
+        scores = self._score_destinations(destination_candidates, self._departure)
+        return destination_candidates[numpy.argmin(scores)]
+
+    def _generate_destinations(self, novelty, num_destinations):
+        random_state = self._get_random_state()
+        known_destinations = self.map_points[
+            random_state.randint(len(self.map_points), size=num_destinations)]
+        return known_destinations + self._random_vectors_of_magnitude(
+            random_state, num_destinations, novelty)
+
+    def _get_random_state(self):
+        # Unless seeded, e.g. by a caller that plans on another thread, seeded from the
+        # random module so that --random-seed keeps paths reproducible.
+        if self._random_state is None:
+            return numpy.random.RandomState(random.getrandbits(32))
+        return self._random_state
+
+    def _score_destinations(self, destinations, departure):
+        # destinations may also hold candidates for several departures, with shape
+        # (number of departures, number of candidates, number of dimensions).
+        scores = self._differences_from_extension(destinations, departure)
         if self._preferred_location is not None:
-            score += self._location_preference * self._distance_from_preferred_location(destination)
-        return score
+            scores += self._location_preference * self._distances_from_preferred_location(destinations)
+        return scores
 
-    def _difference_from_extension(self, destination):
-        distance = self._distance(self._departure, destination)
-        return abs(distance - self._extension)
+    def _differences_from_extension(self, destinations, departure):
+        distances = numpy.linalg.norm(destinations - departure, axis=-1)
+        return numpy.abs(distances - self._extension)
 
-    def _distance_from_preferred_location(self, destination):
-        return self._distance(destination, self._preferred_location)
+    def _distances_from_preferred_location(self, destinations):
+        return numpy.linalg.norm(destinations - self._preferred_location, axis=-1)
 
-    def _random_vector_of_magnitude(self, magnitude):
-        v = self._random_vector()
-        return v / numpy.linalg.norm(v) * magnitude
+    def _random_vectors_of_magnitude(self, random_state, num_vectors, magnitude):
+        vectors = random_state.uniform(-1, 1, (num_vectors, self._n_dimensions))
+        return vectors / numpy.linalg.norm(vectors, axis=1)[:,numpy.newaxis] * magnitude
 
-    def _random_vector(self):
-        return numpy.array([random.uniform(-1, 1) for n in range(self._n_dimensions)])
-
-    def generate_path(self, departure, num_segments, novelty, extension, location_preference):
+    def generate_path(self, departure, num_segments, novelty, extension, location_preference,
+                      num_destination_candidates=NUM_DESTINATION_CANDIDATES):
         self._departure = departure
+        self._num_destination_candidates = num_destination_candidates
         self._num_segments = num_segments
         self._extension = self._max_distance * extension
         self._location_preference = location_preference
@@ -77,15 +92,35 @@ class Navigator:
             self._add_path_segment(n, novelty)
         return self._segments
 
-    def _distance(self, a, b):
-        return numpy.linalg.norm(a - b)
+    def generate_paths(self, departures, num_segments, novelty, extension, location_preference,
+                       num_destination_candidates=NUM_DESTINATION_CANDIDATES):
+        # Batch version of generate_path for several departures. Returns an array of shape
+        # (number of departures, num_segments, number of dimensions); unlike generate_path,
+        # repeated points are kept so that all paths have the same number of points.
+        departures = numpy.asarray(departures, dtype=float)
+        self._extension = self._max_distance * extension
+        self._location_preference = location_preference
+        destination_candidates = self._generate_destinations(
+            novelty, len(departures) * num_destination_candidates).reshape(
+            len(departures), num_destination_candidates, self._n_dimensions)
+        scores = self._score_destinations(destination_candidates, departures[:,numpy.newaxis])
+        destinations = destination_candidates[
+            numpy.arange(len(departures)), numpy.argmin(scores, axis=1)]
+        segments = [departures]
+        for n in range(num_segments-1):
+            previous_points = segments[-1]
+            next_points_straightly = previous_points + (destinations - previous_points) \
+                / (num_segments - n - 1)
+            next_points_in_map = self._spatial_index.query_nearest_points(next_points_straightly)
+            segments.append(next_points_in_map + (next_points_straightly - next_points_in_map) * \
+                min(1, novelty*0.3))
+        return numpy.stack(segments, axis=1)
 
     def _add_path_segment(self, n, novelty):
         previous_point = self._segments[-1]
         next_point_straightly = previous_point + (self._destination - previous_point) \
             / (self._num_segments - n - 1)
-        next_point_in_map = self._nearest_neighbor_regressor.predict(
-            [next_point_straightly])[0][0]
+        next_point_in_map = self._spatial_index.query_nearest_points(next_point_straightly)[0]
         next_point = next_point_in_map + (next_point_straightly - next_point_in_map) * \
             min(1, novelty*0.3)
         if not numpy.array_equal(next_point, previous_point):
@@ -95,27 +130,57 @@ class Navigator:
 class PathFollower:
     def __init__(self, path, dynamics):
         self._path = path
-        self._velocity_correction = 1.
-        if dynamics.__class__ != dynamics_module.constant_dynamics():
-            estimated_duration = self._estimate_duration(dynamics)
-            if estimated_duration > 0:
-                self._velocity_correction = self._estimate_duration(dynamics_module.constant_dynamics()) / \
-                                            self._estimate_duration(dynamics)
         self._dynamics = dynamics
+        self._create_arc_length_table()
+        self._velocity_correction = 1.
+        uncorrected_duration = self._strip_durations.sum()
+        if uncorrected_duration > 0:
+            self._velocity_correction = self._cumulative_distances[-1] / uncorrected_duration
         self._restart()
 
+    def _create_arc_length_table(self):
+        # Cumulative distance along the path at each path point, and the duration of each
+        # strip (between two consecutive points) at unit velocity correction. A strip's
+        # velocity is given by the dynamics at the strip's relative position in the path.
+        points = numpy.array(self._path, dtype=float)
+        strip_distances = numpy.linalg.norm(numpy.diff(points, axis=0), axis=1)
+        self._cumulative_distances = numpy.concatenate([[0.], numpy.cumsum(strip_distances)])
+        strip_velocities = self._dynamics.velocity(
+            numpy.arange(len(strip_distances)) / float(len(self._path)))
+        self._strip_durations = strip_distances / strip_velocities
+
     def _restart(self):
         self._position = self._path[0]
         self._remaining_path = copy.copy(self._path)
         self._activate_next_path_strip()
 
-    def _estimate_duration(self, dynamics):
-        self._dynamics = dynamics
-        self._restart()
-        duration = 0.
-        while not self.reached_destination():
-            duration += self.proceed()
-        return duration
+    def estimated_duration(self):
+        return self._strip_durations.sum() * self._velocity_correction
+
+    def total_distance(self):
+        return self._cumulative_distances[-1]
+
+    def position_at_distance(self, distance):
+        distance = min(max(distance, 0.), self.total_distance())
+        n = min(bisect.bisect_right(self._cumulative_distances, distance), len(self._path) - 1)
+        strip_distance = self._cumulative_distances[n] - self._cumulative_distances[n-1]
+        if strip_distance == 0:
+            return self._path[n]
+        relative_distance = (distance - self._cumulative_distances[n-1]) / strip_distance
+        return self._path[n-1] + (self._path[n] - self._path[n-1]) * relative_distance
+
+    def remaining_distance(self):
+        return self.total_distance() - self.travelled_distance()
+
+    def travelled_distance(self):
+        if self.reached_destination():
+            return self.total_distance()
+        n = len(self._path) - len(self._remaining_path)
+        if self._current_strip_duration == 0:
+            return self._cumulative_distances[n+1]
+        strip_distance = self._cumulative_distances[n+1] - self._cumulative_distances[n]
+        return self._cumulative_distances[n] + strip_distance * min(
+            1., self._travel_time_in_strip / self._current_strip_duration)
 
     def proceed(self, max_time_to_process=None):
         self._time_processed = 0.
@@ -0,0 +1,344 @@
+import numpy
+import math
+from angle_parameters import EulerToQuaternion
+from transformations import euler_matrix, _AXES2TUPLE, _NEXT_AXIS, _EPS
+
+# Fused alternative to Entity.parameters_to_processed_pose followed by
+# BvhWriter.add_pose_as_frame, for entities.hierarchical. Instead of setting angles on a
+# Pose, recursing through its joints and allocating a matrix and a vertex per joint, one
+# frame of output parameters is processed into preallocated arrays:
+#
+# - the Euler angles of all joints, converted from the quaternions of all joints at once
+# - the rotation matrices of all joints
+# - the local-to-world matrices, multiplied one hierarchy level at a time
+# - the vertices, constrained in place
+# - the BVH frame, i.e. the values of all channels in the order of the BVH file
+#
+# Joints are stored in the depth-first order of Joint.get_vertices, except for the
+# matrices, which are stored one hierarchy level after another so that each level is a
+# contiguous slice. The arrays are overwritten by the next frame.
+
+POSITION_CHANNELS = {"Xposition": 0, "Yposition": 1, "Zposition": 2}
+
+class OutputPipeline:
+    def __init__(self, bvh_reader, rotation_parametrization, constrainers,
+                 translate=False, translation_weight=1., process_root_angles=None):
+        self._bvh_reader = bvh_reader
+        self._rotation_parametrization = rotation_parametrization
+        self._constrainers = constrainers
+        self._translate = translate
+        self._translation_weight = translation_weight
+        self._process_root_angles = process_root_angles
+        root_definition = bvh_reader.get_hierarchy().get_root_joint_definition()
+        self._definitions = []
+        self._add_definitions_recurse(root_definition)
+        self._positions = dict(
+            (definition.name, position) for position, definition in enumerate(self._definitions))
+        self._create_arrays()
+        self._create_levels()
+        self._create_rotating_joints()
+        self._create_bvh_channels()
+
+    def _add_definitions_recurse(self, definition):
+        self._definitions.append(definition)
+        for child_definition in definition.child_definitions:
+            self._add_definitions_recurse(child_definition)
+
+    def _create_arrays(self):
+        num_joints = len(self._definitions)
+        # vertices and angles share one buffer, from which the BVH frame is gathered
+        self._channel_sources = numpy.zeros(num_joints * 7)
+        self.vertices = self._channel_sources[:num_joints*4].reshape(num_joints, 4)
+        self.angles = self._channel_sources[num_joints*4:].reshape(num_joints, 3)
+        for index, definition in enumerate(self._definitions):
+            if definition.has_static_rotation:
+                self.angles[index] = definition.static_angles
+        self._root_translation_matrix = numpy.identity(4)
+
+    def _create_levels(self):
+        # level order of the joints, and the slice and parent positions of each level
+        level_order = []
+        self._levels = []
+        level = [0]
+        while len(level) > 0:
+            start = len(level_order)
+            level_order.extend(level)
+            if start == 0:
+                parent_positions = None
+            else:
+                parent_positions = numpy.array([
+                        level_order.index(self._positions[self._definitions[index].parent.name])
+                        for index in level])
+            self._levels.append((start, len(level_order), parent_positions))
+            level = [self._positions[child_definition.name]
+                     for index in level
+                     for child_definition in self._definitions[index].child_definitions]
+        self._level_positions = numpy.argsort(level_order)
+        num_joints = len(level_order)
+        self._translation_matrices = numpy.array([
+                self._definitions[index].translation_matrix for index in level_order])
+        self._rotation_matrices = numpy.tile(numpy.identity(4), (num_joints, 1, 1))
+        for position, index in enumerate(level_order):
+            definition = self._definitions[index]
+            if definition.has_static_rotation:
+                self._rotation_matrices[position] = euler_matrix(
+                    *definition.static_angles, axes=definition.axes)
+        self._parent_matrices = numpy.empty((num_joints, 4, 4))
+        self._local_to_world_matrices = numpy.empty((num_joints, 4, 4))
+        self._world_matrices = numpy.empty((num_joints, 4, 4))
+
+    def _create_rotating_joints(self):
+        # joints whose rotations are parametrized, in the order of the parameters
+        self._parameter_offset = 3 if self._translate else 0
+        rotating_indices = [
+            index for index, definition in enumerate(self._definitions)
+            if definition.has_rotation and not definition.has_static_rotation]
+        self._rotating_indices = numpy.array(rotating_indices, dtype=int)
+        self._root_is_rotating = len(rotating_indices) > 0 and rotating_indices[0] == 0
+        self._axes = [self._definitions[index].axes for index in rotating_indices]
+        self._axes_groups = []
+        for axes in sorted(set(self._axes)):
+            rows = numpy.array([row for row, joint_axes in enumerate(self._axes)
+                                if joint_axes == axes])
+            self._axes_groups.append((
+                    axes, rows,
+                    self._rotating_indices[rows],
+                    self._level_positions[self._rotating_indices[rows]],
+                    numpy.tile(numpy.identity(4), (len(rows), 1, 1))))
+
+    def _create_bvh_channels(self):
+        num_joints = len(self._definitions)
+        source_indices = []
+        is_rotation = []
+        for definition in self._definitions:
+            for channel in definition.channels:
+                if channel in POSITION_CHANNELS:
+                    source_indices.append(definition.index * 4 + POSITION_CHANNELS[channel])
+                    is_rotation.append(False)
+                else:
+                    source_indices.append(
+                        num_joints * 4 + self._positions[definition.name] * 3 +
+                        definition.rotation_index[channel])
+                    is_rotation.append(True)
+        self._channel_source_indices = numpy.array(source_indices, dtype=int)
+        self._is_rotation_channel = numpy.array(is_rotation, dtype=bool)
+        self.bvh_frame = numpy.zeros(len(source_indices))
+
+    def process(self, parameters):
+        parameters = numpy.asarray(parameters, dtype=float)
+        self._process_root_translation(parameters)
+        self._process_rotations(parameters)
+        self._update_world_matrices()
+        numpy.take(self._local_to_world_matrices[:,:,3], self._level_positions, axis=0,
+                   out=self.vertices)
+        self._constrainers.constrain_in_place(self.vertices)
+        numpy.take(self._channel_sources, self._channel_source_indices, out=self.bvh_frame)
+        # division rather than multiplication, like math.degrees
+        numpy.divide(self.bvh_frame, math.pi / 180, out=self.bvh_frame,
+                     where=self._is_rotation_channel)
+
+    def _process_root_translation(self, parameters):
+        if self._translate:
+            if self._translation_weight == 0:
+                self._root_translation_matrix[:3,3] = 0
+            else:
+                self._root_translation_matrix[:3,3] = self._bvh_reader.skeleton_scale_vector(
+                    parameters[:3] / self._translation_weight)
+
+    def _process_rotations(self, parameters):
+        num_parameters = self._rotation_parametrization.num_parameters
+        rotation_parameters = parameters[
+            self._parameter_offset:
+            self._parameter_offset + len(self._rotating_indices) * num_parameters].reshape(
+            len(self._rotating_indices), num_parameters)
+        for axes, rows, indices, positions, matrices in self._axes_groups:
+            if self._rotation_parametrization is EulerToQuaternion:
+                self.angles[indices] = euler_from_quaternions(rotation_parameters[rows], axes)
+            else:
+                for row, index in zip(rows, indices):
+                    self.angles[index] = self._rotation_parametrization.parameters_to_rotation(
+                        rotation_parameters[row], axes)
+        if self._root_is_rotating and self._process_root_angles is not None:
+            self.angles[0] = self._process_root_angles(self.angles[0], self._axes[0])
+        for axes, rows, indices, positions, matrices in self._axes_groups:
+            self._rotation_matrices[positions] = euler_matrices(
+                self.angles[indices], axes, out=matrices)
+
+    def _update_world_matrices(self):
+        for start, end, parent_positions in self._levels:
+            if parent_positions is None:
+                numpy.matmul(self._translation_matrices[start:end], self._root_translation_matrix,
+                             out=self._local_to_world_matrices[start:end])
+            else:
+                numpy.take(self._world_matrices, parent_positions, axis=0,
+                           out=self._parent_matrices[start:end])
+                numpy.matmul(self._parent_matrices[start:end], self._translation_matrices[start:end],
+                             out=self._local_to_world_matrices[start:end])
+            numpy.matmul(self._local_to_world_matrices[start:end], self._rotation_matrices[start:end],
+                         out=self._world_matrices[start:end])
+
+    def process_batch(self, all_parameters):
+        # Returns the vertices of many frames of output parameters as an array of shape
+        # (number of frames, number of joints, 4), like calling process for each frame in
+        # turn. Forward kinematics is computed for all frames at once; only root angle
+        # processing (if any) and the constrainers, which may depend on the previous frame,
+        # remain frame by frame. Unlike process, the pipeline's own arrays are not updated.
+        all_parameters = numpy.asarray(all_parameters, dtype=float)
+        num_frames = len(all_parameters)
+        num_joints = len(self._definitions)
+        root_translation_matrices = numpy.tile(numpy.identity(4), (num_frames, 1, 1))
+        if self._translate and self._translation_weight != 0:
+            root_translation_matrices[:,:3,3] = [
+                self._bvh_reader.skeleton_scale_vector(parameters[:3] / self._translation_weight)
+                for parameters in all_parameters]
+        angles = numpy.repeat(self.angles[numpy.newaxis], num_frames, axis=0)
+        num_parameters = self._rotation_parametrization.num_parameters
+        rotation_parameters = all_parameters[
+            :, self._parameter_offset:
+            self._parameter_offset + len(self._rotating_indices) * num_parameters].reshape(
+            num_frames, len(self._rotating_indices), num_parameters)
+        for axes, rows, indices, positions, _matrices in self._axes_groups:
+            if self._rotation_parametrization is EulerToQuaternion:
+                angles[:,indices] = euler_from_quaternions(
+                    rotation_parameters[:,rows].reshape(-1, num_parameters), axes).reshape(
+                    num_frames, len(rows), 3)
+            else:
+                for frame in range(num_frames):
+                    for row, index in zip(rows, indices):
+                        angles[frame, index] = self._rotation_parametrization.parameters_to_rotation(
+                            rotation_parameters[frame, row], axes)
+        if self._root_is_rotating and self._process_root_angles is not None:
+            for frame in range(num_frames):
+                angles[frame, 0] = self._process_root_angles(angles[frame, 0], self._axes[0])
+        rotation_matrices = numpy.repeat(self._rotation_matrices[numpy.newaxis], num_frames, axis=0)
+        for axes, rows, indices, positions, _matrices in self._axes_groups:
+            rotation_matrices[:,positions] = euler_matrices(
+                angles[:,indices].reshape(-1, 3), axes).reshape(num_frames, len(rows), 4, 4)
+        local_to_world_matrices = numpy.empty((num_frames, num_joints, 4, 4))
+        world_matrices = numpy.empty((num_frames, num_joints, 4, 4))
+        for start, end, parent_positions in self._levels:
+            if parent_positions is None:
+                local_to_world_matrices[:,start:end] = numpy.matmul(
+                    root_translation_matrices[:,numpy.newaxis],
+                    self._translation_matrices[start:end])
+            else:
+                local_to_world_matrices[:,start:end] = numpy.matmul(
+                    world_matrices[:,parent_positions], self._translation_matrices[start:end])
+            world_matrices[:,start:end] = numpy.matmul(
+                local_to_world_matrices[:,start:end], rotation_matrices[:,start:end])
+        vertices = local_to_world_matrices[:,:,:,3][:,self._level_positions]
+        for frame_vertices in vertices:
+            self._constrainers.constrain_in_place(frame_vertices)
+        return vertices
+
+    def get_vertex_index(self, joint_name):
+        # Index of a joint in the vertices, i.e. in the order of Joint.get_vertices
+        return self._definitions[self._positions[joint_name]].index
+
+    def update_pose(self, pose):
+        # Sets the world positions of the pose's joints like Hierarchy.set_pose_vertices and
+        # the angles of its rotating joints, from copies of this frame's arrays.
+        vertices = self.vertices.copy()
+        angles = self.angles.copy()
+        self._update_joint_recurse(pose.get_root_joint(), vertices, angles)
+
+    def _update_joint_recurse(self, joint, vertices, angles):
+        if joint.definition.is_end:
+            joint.worldpos = vertices[joint.parent.definition.index]
+        else:
+            joint.worldpos = vertices[joint.definition.index]
+            if joint.definition.has_rotation and not joint.definition.has_static_rotation:
+                joint.angles = angles[self._positions[joint.definition.name]]
+            for child in joint.children:
+                self._update_joint_recurse(child, vertices, angles)
+
+def euler_from_quaternions(quaternions, axes):
+    # Vectorized euler_from_quaternion for an array of non-normalized quaternions of
+    # shape (n, 4), computed like EulerToQuaternion.parameters_to_rotation.
+    quaternions = numpy.asarray(quaternions, dtype=float)
+    q = quaternions / numpy.sqrt(numpy.einsum("ij,ij->i", quaternions, quaternions))[:,numpy.newaxis]
+    n = numpy.einsum("ij,ij->i", q, q)
+    q = q * numpy.sqrt(2.0 / n)[:,numpy.newaxis]
+    w, x, y, z = q.T
+    matrices = numpy.empty((len(q), 3, 3))
+    matrices[:,0,0] = 1.0 - y*y - z*z
+    matrices[:,0,1] = x*y - z*w
+    matrices[:,0,2] = x*z + y*w
+    matrices[:,1,0] = x*y + z*w
+    matrices[:,1,1] = 1.0 - x*x - z*z
+    matrices[:,1,2] = y*z - x*w
+    matrices[:,2,0] = x*z - y*w
+    matrices[:,2,1] = y*z + x*w
+    matrices[:,2,2] = 1.0 - x*x - y*y
+    matrices[n < _EPS] = numpy.identity(3)
+    return euler_from_matrices(matrices, axes)
+
+def euler_from_matrices(matrices, axes):
+    # Vectorized euler_from_matrix for rotation matrices of shape (n, 3, 3) or (n, 4, 4).
+    firstaxis, parity, repetition, frame = _AXES2TUPLE[axes.lower()]
+    i = firstaxis
+    j = _NEXT_AXIS[i+parity]
+    k = _NEXT_AXIS[i-parity+1]
+    M = numpy.asarray(matrices, dtype=float)
+    angles = numpy.empty((len(M), 3))
+    if repetition:
+        sy = numpy.sqrt(M[:,i,j]*M[:,i,j] + M[:,i,k]*M[:,i,k])
+        is_regular = sy > _EPS
+        angles[:,0] = numpy.where(
+            is_regular, numpy.arctan2(M[:,i,j], M[:,i,k]), numpy.arctan2(-M[:,j,k], M[:,j,j]))
+        angles[:,1] = numpy.arctan2(sy, M[:,i,i])
+        angles[:,2] = numpy.where(is_regular, numpy.arctan2(M[:,j,i], -M[:,k,i]), 0.0)
+    else:
+        cy = numpy.sqrt(M[:,i,i]*M[:,i,i] + M[:,j,i]*M[:,j,i])
+        is_regular = cy > _EPS
+        angles[:,0] = numpy.where(
+            is_regular, numpy.arctan2(M[:,k,j], M[:,k,k]), numpy.arctan2(-M[:,j,k], M[:,j,j]))
+        angles[:,1] = numpy.arctan2(-M[:,k,i], cy)
+        angles[:,2] = numpy.where(is_regular, numpy.arctan2(M[:,j,i], M[:,i,i]), 0.0)
+    if parity:
+        angles = -angles
+    if frame:
+        angles = angles[:,::-1]
+    return angles
+
+def euler_matrices(angles, axes, out=None):
+    # Vectorized euler_matrix for Euler angles of shape (n, 3). Only the rotation part of
+    # out is written, so the rest is expected to be that of an identity matrix.
+    firstaxis, parity, repetition, frame = _AXES2TUPLE[axes.lower()]
+    i = firstaxis
+    j = _NEXT_AXIS[i+parity]
+    k = _NEXT_AXIS[i-parity+1]
+    angles = numpy.asarray(angles, dtype=float)
+    if frame:
+        angles = angles[:,::-1]
+    if parity:
+        angles = -angles
+    si, sj, sk = numpy.sin(angles).T
+    ci, cj, ck = numpy.cos(angles).T
+    cc, cs = ci*ck, ci*sk
+    sc, ss = si*ck, si*sk
+    if out is None:
+        M = numpy.tile(numpy.identity(4), (len(angles), 1, 1))
+    else:
+        M = out
+    if repetition:
+        M[:,i,i] = cj
+        M[:,i,j] = sj*si
+        M[:,i,k] = sj*ci
+        M[:,j,i] = sj*sk
+        M[:,j,j] = -cj*ss+cc
+        M[:,j,k] = -cj*cs-sc
+        M[:,k,i] = -sj*ck
+        M[:,k,j] = cj*sc+cs
+        M[:,k,k] = cj*cc-ss
+    else:
+        M[:,i,i] = cj*ck
+        M[:,i,j] = sj*sc-cs
+        M[:,i,k] = sj*cc+ss
+        M[:,j,i] = cj*sk
+        M[:,j,j] = sj*ss+cc
+        M[:,j,k] = sj*cs-sc
+        M[:,k,i] = -sj
+        M[:,k,j] = cj*si
+        M[:,k,k] = cj*ci
+    return M
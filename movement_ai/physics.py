@@ -2,6 +2,10 @@ import numpy
 import random
 import math
 
+# The constrainers take vertices as an array of shape (number of vertices, number of
+# dimensions) and translate them in place, returning the same array. Vertices given as a
+# list are first copied into a new array.
+
 class FrictionConstrainer:
     def __init__(self, balance_detector):
         self._balance_detector = balance_detector
@@ -13,20 +17,20 @@ class FrictionConstrainer:
         self._supporting_vertex_index = None
 
     def constrain(self, vertices):
+        vertices = numpy.asarray(vertices)
         self._update_translation(vertices)
-        result = [vertex + self._translation for vertex in vertices]
-        
         new_supporting_vertex_index = self._balance_detector.identify_supporting_vertex(vertices)
+        vertices += self._translation
+
         if new_supporting_vertex_index != self._supporting_vertex_index:
             self._supporting_vertex_index = new_supporting_vertex_index
-            self._supporting_vertex_locked_position = result[self._supporting_vertex_index]
+            self._supporting_vertex_locked_position = vertices[self._supporting_vertex_index].copy()
 
-        return result
+        return vertices
 
     def _update_translation(self, vertices):
         if self._translation is None:
-            num_dimensions = len(vertices[0])
-            self._translation = [0] * num_dimensions
+            self._translation = numpy.zeros(vertices.shape[1], dtype=vertices.dtype)
         elif self.enabled:
             self._translation = self._translation_wrt_supporting_vertex(vertices)
     
@@ -42,20 +46,17 @@ class BalanceDetector:
         return self._lowest_vertex(vertices)
 
     def _lowest_vertex(self, vertices):
-        return min(
-            list(range(len(vertices))),
-            key=lambda index: vertices[index][self._coordinate_up])
-        
+        return int(numpy.argmin(numpy.asarray(vertices)[:,self._coordinate_up]))
+
 class FloorConstrainer:
     def __init__(self, coordinate_up=1):
         self._floor_y = 0
         self._coordinate_up = coordinate_up
 
     def constrain(self, vertices):
-        bottom_y = min([vertex[self._coordinate_up] for vertex in vertices])
-        offset = numpy.zeros(len(vertices[0]))
-        offset[self._coordinate_up] = self._floor_y - bottom_y
-        return [vertex + offset for vertex in vertices]
+        vertices = numpy.asarray(vertices)
+        vertices[:,self._coordinate_up] += self._floor_y - vertices[:,self._coordinate_up].min()
+        return vertices
 
 class Confinement:
     def __init__(self, coordinate_up=1, update_rate=None, target_position=None):
@@ -77,13 +78,14 @@ class Confinement:
     def constrain(self, vertices):
         if not self.enabled or self._update_rate is None:
             return vertices
+        vertices = numpy.asarray(vertices)
         self._update_translation(vertices)
-        result = [vertex + self._translation for vertex in vertices]
-        return result
+        vertices += self._translation
+        return vertices
 
     def _update_translation(self, vertices):
         if self._target_position is None:
-            self._target_position = numpy.zeros(len(vertices[0]))
+            self._target_position = numpy.zeros(vertices.shape[1])
         desired_translation = self._target_position - vertices[0]
         desired_translation[self._coordinate_up] = 0
         if self._translation is None:
@@ -99,8 +101,10 @@ class RandomSlide:
         self._translation = numpy.zeros(3)
 
     def constrain(self, vertices):
+        vertices = numpy.asarray(vertices)
         self._translation += self._translation_increment
-        return [vertex + self._translation for vertex in vertices]
+        vertices[:,:3] += self._translation
+        return vertices
 
 class CircleSlide:
     def __init__(self):
@@ -112,7 +116,9 @@ class CircleSlide:
             [math.cos(self._angle), 0, math.sin(self._angle)]) * 0.02
         self._translation += translation_increment
         self._angle += 0.01
-        return [vertex + self._translation for vertex in vertices]
+        vertices = numpy.asarray(vertices)
+        vertices[:,:3] += self._translation
+        return vertices
 
 class Constrainers:
     def __init__(self,
@@ -136,6 +142,9 @@ class Constrainers:
         self._circle_slide = CircleSlide()
 
     def constrain(self, vertices):
+        return self.constrain_in_place(numpy.array(vertices, dtype=float))
+
+    def constrain_in_place(self, vertices):
         if self.enable_friction:
             vertices = self._friction.constrain(vertices)
         if self.enable_floor:
@@ -0,0 +1,141 @@
+# Renders improvised movement to BVH files offline, without UI, websockets or frame
+# timing, as fast as the behavior and model can be stepped. One file is rendered per
+# random seed, optionally in parallel processes.
+#
+# Example usage:
+# python render_offline.py --model profiles/dimensionality_reduction/valencia_pn.model \
+#   --reduction-type KernelPCA -n 7 --duration 3600 --seed 1 2 3 4 --processes 4 \
+#   --novelty 0.7 --save-parameters
+
+from argparse import ArgumentParser
+import multiprocessing
+import os
+import random
+import time
+import numpy
+
+from bvh.bvh_reader import BvhReader
+from bvh.bvh_writer import BvhWriter
+from entities.hierarchical import Entity
+from dimensionality_reduction.factory import DimensionalityReductionFactory
+from dimensionality_reduction.behaviors.improvise import ImproviseParameters, Improvise
+from dimensionality_reduction.behaviors.flaneur_behavior import FlaneurParameters, FlaneurBehavior
+
+BEHAVIORS = ["improvise", "flaneur"]
+
+def add_parser_arguments(parser):
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--reduction-type", default="KernelPCA")
+    parser.add_argument("--reduction-args", default="")
+    parser.add_argument("--num-components", "-n", type=int, default=7)
+    parser.add_argument("--skeleton", default="scenes/pn-01.22_skeleton.bvh")
+    parser.add_argument("--entity-args", default="-r quaternion --friction --translate")
+    parser.add_argument("--z-up", action="store_true")
+    parser.add_argument("--no-floor", action="store_true")
+    parser.add_argument("--behavior", choices=BEHAVIORS, default="improvise")
+    parser.add_argument("--max-novelty", type=float, default=1.4)
+    parser.add_argument("--preferred-location", type=str)
+    parser.add_argument("--duration", type=float, default=60.,
+                        help="Duration of each rendered file in seconds")
+    parser.add_argument("--frame-rate", type=float, default=30.)
+    parser.add_argument("--seed", type=int, nargs="+", default=[0],
+                        help="Random seeds. One file is rendered per seed.")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Number of frames to inverse-transform at once")
+    parser.add_argument("--output-dir", default="recordings")
+    parser.add_argument("--output-prefix", default="offline")
+    parser.add_argument("--save-parameters", action="store_true",
+                        help="Also save the reductions and output parameters of all frames as .npy files")
+    ImproviseParameters().add_parser_arguments(parser)
+    FlaneurParameters().add_parser_arguments(parser)
+
+def get_output_path(args, seed):
+    return os.path.join(args.output_dir, "%s_seed%d" % (args.output_prefix, seed))
+
+def create_entity(args, bvh_reader):
+    entity_parser = ArgumentParser()
+    Entity.add_parser_arguments(entity_parser)
+    entity_args = entity_parser.parse_args(args.entity_args.split())
+    pose = bvh_reader.get_hierarchy().create_pose()
+    return Entity(bvh_reader, pose, not args.no_floor, args.z_up, entity_args)
+
+def create_behavior(args, student):
+    if args.behavior == "improvise":
+        params = ImproviseParameters()
+        params.set_values_from_args(args)
+        if args.preferred_location:
+            preferred_location = numpy.array([
+                    float(s) for s in args.preferred_location.split(",")])
+        else:
+            preferred_location = None
+        return Improvise(
+            student, student.num_reduced_dimensions, params, preferred_location,
+            args.max_novelty, plan_in_background=False)
+    elif args.behavior == "flaneur":
+        params = FlaneurParameters()
+        params.set_values_from_args(args)
+        return FlaneurBehavior(student, params)
+
+def render(args, seed):
+    random.seed(seed)
+    numpy.random.seed(seed)
+    bvh_reader = BvhReader(args.skeleton)
+    bvh_reader.read()
+    entity = create_entity(args, bvh_reader)
+    student = DimensionalityReductionFactory.create(
+        args.reduction_type, entity.get_value_length(), args.num_components, args.reduction_args)
+    student.load(args.model)
+    behavior = create_behavior(args, student)
+
+    time_increment = 1. / args.frame_rate
+    num_frames = int(round(args.duration * args.frame_rate))
+    bvh_writer = BvhWriter(bvh_reader.get_hierarchy(), time_increment)
+    output_pipeline = entity.get_output_pipeline()
+    all_reductions = []
+    all_outputs = []
+    time_before = time.time()
+    for chunk_start in range(0, num_frames, args.chunk_size):
+        num_chunk_frames = min(args.chunk_size, num_frames - chunk_start)
+        reductions = numpy.array([
+                _proceed_and_get_reduction(behavior, time_increment)
+                for n in range(num_chunk_frames)])
+        outputs = student.inverse_transform(reductions)
+        for output in outputs:
+            entity.update()
+            output_pipeline.process(output)
+            bvh_writer.add_frame(output_pipeline.bvh_frame.tolist())
+        if args.save_parameters:
+            all_reductions.append(reductions)
+            all_outputs.append(outputs)
+
+    output_path = get_output_path(args, seed)
+    bvh_writer.write(output_path + ".bvh")
+    if args.save_parameters:
+        numpy.save(output_path + ".reductions.npy", numpy.concatenate(all_reductions))
+        numpy.save(output_path + ".parameters.npy", numpy.concatenate(all_outputs))
+    return output_path, time.time() - time_before
+
+def _proceed_and_get_reduction(behavior, time_increment):
+    behavior.proceed(time_increment)
+    return behavior.get_reduction()
+
+def _render_seed(args_and_seed):
+    return render(*args_and_seed)
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    add_parser_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    jobs = [(args, seed) for seed in args.seed]
+    if args.processes > 1:
+        pool = multiprocessing.get_context("spawn").Pool(args.processes)
+        results = pool.imap_unordered(_render_seed, jobs)
+    else:
+        results = map(_render_seed, jobs)
+    for output_path, rendering_time in results:
+        print("rendered %s.bvh (%.1f s, %.1fx realtime)" % (
+            output_path, rendering_time, args.duration / rendering_time))
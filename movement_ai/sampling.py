@@ -1,6 +1,5 @@
 import numpy
-import sklearn.cluster
-import sklearn.neighbors
+from scipy.spatial import cKDTree
 
 class Sampler:
     @staticmethod
@@ -41,22 +40,28 @@ class NeighborhoodSampler(Sampler):
         return (numpy.random.rand(num_dimensions) - 0.5) * magnitude
 
 class KMeansSampler(Sampler):
+    # Initialized with a farthest-point sample rather than several randomized k-means++
+    # runs, so that the clustering is fitted only once.
     @staticmethod
     def add_parser_arguments(parser):
         parser.add_argument("--num-samples", type=int, default=500)
 
     def sample(self):
-        kmeans = sklearn.cluster.KMeans(n_clusters=self._args.num_samples)
+        import sklearn.cluster
+        kmeans = sklearn.cluster.KMeans(
+            n_clusters=self._args.num_samples, init=self._initial_centers(), n_init=1)
         kmeans.fit(self._observations)
         return kmeans.cluster_centers_
 
-class MiniBatchKMeansSampler(Sampler):
-    @staticmethod
-    def add_parser_arguments(parser):
-        parser.add_argument("--num-samples", type=int, default=500)
+    def _initial_centers(self):
+        observations = numpy.asarray(self._observations, dtype=float)
+        return observations[farthest_point_indices(observations, self._args.num_samples)]
 
+class MiniBatchKMeansSampler(KMeansSampler):
     def sample(self):
-        kmeans = sklearn.cluster.MiniBatchKMeans(n_clusters=self._args.num_samples)
+        import sklearn.cluster
+        kmeans = sklearn.cluster.MiniBatchKMeans(
+            n_clusters=self._args.num_samples, init=self._initial_centers(), n_init=1)
         kmeans.fit(self._observations)
         return kmeans.cluster_centers_
 
@@ -66,47 +71,96 @@ class DistanceDistributionEqualizationSampler(Sampler):
         parser.add_argument("--num-samples", type=int, default=500)
 
     def sample(self):
-        self._knn = sklearn.neighbors.KNeighborsClassifier(n_neighbors=2)
-        indices = list(range(len(self._observations)))
-        self._knn.fit(self._observations, indices)
-        indices_sorted_by_nearest_neighbor_distance = sorted(
-            indices,
-            key=lambda index: self._distance_to_nearest_neighbor(index))
+        observations = numpy.asarray(self._observations, dtype=float)
+        distances, _ = cKDTree(observations).query(observations, k=2)
+        nearest_neighbor_distances = distances.max(axis=1)
+        indices_sorted_by_nearest_neighbor_distance = numpy.argsort(
+            nearest_neighbor_distances, kind="stable")
         linear_index_distribution = [
             int(n) for n in numpy.arange(
                 0, len(self._observations), float(len(self._observations))/self._args.num_samples)]
-        sampled_indices = [
-            indices_sorted_by_nearest_neighbor_distance[index]
-            for index in linear_index_distribution]
+        sampled_indices = indices_sorted_by_nearest_neighbor_distance[linear_index_distribution]
         return [self._observations[index] for index in sampled_indices]
 
-    def _distance_to_nearest_neighbor(self, index):
-        observation = self._observations[index]
-        distances_list, _ = self._knn.kneighbors(observation, return_distance=True)
-        distances = distances_list[0]
-        return max(distances)
-
 class MinDistanceSampler(Sampler):
+    # Visiting observations in order, drops every observation which is closer than the min
+    # distance to an earlier observation that has not been dropped itself.
     @staticmethod
     def add_parser_arguments(parser):
         parser.add_argument("--min-distance", type=float)
-        parser.add_argument("--num-neighbors_ratio", type=float, default=0.01)
 
     def sample(self):
-        knn = sklearn.neighbors.KNeighborsClassifier(
-            n_neighbors=int(len(self._observations) * self._args.num_neighbors_ratio))
-        indices = list(range(len(self._observations)))
-        knn.fit(self._observations, indices)
-        dropped_indices = set()
-        for index, observation in zip(indices, self._observations):
-            distances_list, neighbor_indices_list = knn.kneighbors(observation)
-            distances = distances_list[0]
-            neighbor_indices = neighbor_indices_list[0]
-            for neighbor_index, distance in zip(neighbor_indices, distances):
-                if (neighbor_index != index and
-                    distance < self._args.min_distance and
-                    neighbor_index not in dropped_indices):
-                    dropped_indices.add(index)
-                    break
-        sampled_indices = set(indices) - dropped_indices
-        return [self._observations[index] for index in sampled_indices]
+        observations = numpy.asarray(self._observations, dtype=float)
+        return [self._observations[index]
+                for index in min_distance_indices(observations, self._args.min_distance)]
+
+class FarthestPointSampler(Sampler):
+    @staticmethod
+    def add_parser_arguments(parser):
+        parser.add_argument("--num-samples", type=int, default=500)
+
+    def sample(self):
+        observations = numpy.asarray(self._observations, dtype=float)
+        return observations[farthest_point_indices(observations, self._args.num_samples)]
+
+class PoissonDiskSampler(Sampler):
+    @staticmethod
+    def add_parser_arguments(parser):
+        parser.add_argument("--min-distance", type=float, default=0.05)
+
+    def sample(self):
+        observations = numpy.asarray(self._observations, dtype=float)
+        return observations[poisson_disk_indices(observations, self._args.min_distance)]
+
+def farthest_point_indices(points, num_samples=None, tolerance=None, first_index=None):
+    # Greedy farthest-point sampling, also known as greedy k-center selection: starting
+    # from first_index, or a random point if not given, the point farthest from all samples
+    # so far is added until there are num_samples samples or all points are within the
+    # tolerance of a sample. Each added sample costs a full pass over the points, so
+    # selecting k samples is O(N*k*d) for N points of d dimensions. Squared distances are
+    # computed via dot products, which avoids temporary arrays of the size of the points.
+    points = numpy.asarray(points, dtype=float)
+    if num_samples is None:
+        num_samples = len(points)
+    num_samples = min(num_samples, len(points))
+    if num_samples == 0:
+        return numpy.zeros(0, dtype=int)
+    if first_index is None:
+        first_index = numpy.random.randint(len(points))
+    squared_norms = numpy.einsum("ij,ij->i", points, points)
+    sampled_indices = [first_index]
+    squared_distances = _squared_distances_to(points, squared_norms, first_index)
+    while len(sampled_indices) < num_samples:
+        index = int(numpy.argmax(squared_distances))
+        if tolerance is not None and squared_distances[index] <= tolerance * tolerance:
+            break
+        sampled_indices.append(index)
+        squared_distances = numpy.minimum(
+            squared_distances, _squared_distances_to(points, squared_norms, index))
+    return numpy.array(sampled_indices, dtype=int)
+
+def _squared_distances_to(points, squared_norms, index):
+    return numpy.maximum(
+        squared_norms - 2 * points.dot(points[index]) + squared_norms[index], 0)
+
+def min_distance_indices(points, min_distance):
+    # The same covering pass as poisson_disk_indices, but in order and only covering
+    # points closer than, not at, the min distance, so that one radius query is made per
+    # kept point.
+    return _covering_indices(
+        points, numpy.nextafter(min_distance, 0), numpy.arange(len(points)))
+
+def poisson_disk_indices(points, min_distance):
+    # Poisson-disk sampling by dart throwing over the points: in random order, each point
+    # which is not within the min distance of an accepted sample is accepted.
+    return _covering_indices(points, min_distance, numpy.random.permutation(len(points)))
+
+def _covering_indices(points, radius, visiting_order):
+    tree = cKDTree(points)
+    is_covered = numpy.zeros(len(points), dtype=bool)
+    sampled_indices = []
+    for index in visiting_order:
+        if not is_covered[index]:
+            sampled_indices.append(index)
+            is_covered[tree.query_ball_point(points[index], radius)] = True
+    return numpy.array(sampled_indices, dtype=int)
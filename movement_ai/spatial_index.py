@@ -0,0 +1,148 @@
+import numpy
+import copy
+from scipy.spatial import cKDTree
+
+DEFAULT_MAX_PENDING_FRACTION = 0.1
+DEFAULT_MAX_DISPLACEMENT = 0.01
+
+# A KD-tree over a set of points (typically a student's normalized observed reductions)
+# which is shared by all behaviors querying the same points.
+#
+# The points can be replaced or added to at any time, but the tree is only rebuilt once it
+# has become too stale: when points added or evicted since the last build exceed a
+# fraction of the indexed points, or when indexed points have moved further than a
+# threshold. Until then, added points are searched by brute force, evicted points are
+# skipped and moved points are looked up via their indexed positions. Returned distances
+# and neighbours always refer to the current points; k-NN results may be approximate
+# while points have moved (by at most the displacement threshold), whereas radius queries
+# are exact.
+class SpatialIndex:
+    def __init__(self, points,
+                 max_pending_fraction=DEFAULT_MAX_PENDING_FRACTION,
+                 max_displacement=DEFAULT_MAX_DISPLACEMENT):
+        self.max_pending_fraction = max_pending_fraction
+        self.max_displacement = max_displacement
+        self.num_builds = 0
+        self._tree = None
+        self._num_evicted_points = 0
+        self.set_points(points)
+
+    def set_points(self, points):
+        if self._tree is not None and points is self.points:
+            return
+        self.points = numpy.asarray(points, dtype=float)
+        if self._tree is None or len(self.points) < self._num_indexed_points:
+            self._build()
+            return
+        moved = self.points[:self._num_indexed_points] - \
+            self._tree.data[self._num_evicted_points:]
+        self._displacement = numpy.sqrt((moved * moved).sum(axis=1).max()) \
+            if self._num_indexed_points > 0 else 0.
+        self._rebuild_if_stale()
+
+    def insert(self, points, num_evicted=0):
+        # Appends points, and evicts the num_evicted first points, e.g. when the points are
+        # a sliding window over observations. Indices of the remaining points shift
+        # accordingly.
+        points = numpy.asarray(points, dtype=float).reshape(-1, self.num_dimensions)
+        self.points = numpy.concatenate([self.points[num_evicted:], points])
+        if num_evicted > self._num_indexed_points:
+            self._build()
+            return
+        self._num_evicted_points += num_evicted
+        self._rebuild_if_stale()
+
+    def snapshot(self):
+        # A copy which is unaffected by later changes to this index, e.g. for querying on
+        # another thread. The tree and points are never modified in place, so they are
+        # shared rather than copied.
+        return copy.copy(self)
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def num_dimensions(self):
+        return self.points.shape[1]
+
+    def query(self, positions, k=1):
+        # Returns distances and indices of the k nearest points to each position, as arrays
+        # of shape (number of positions, k) sorted by distance.
+        positions = self._as_positions(positions)
+        k = min(k, len(self.points))
+        candidates = []
+        if self._num_indexed_points > 0:
+            candidates.append(self._query_tree(positions, k))
+        if self._num_pending_points > 0:
+            candidates.append(numpy.tile(
+                numpy.arange(self._num_indexed_points, len(self.points)), (len(positions), 1)))
+        candidates = numpy.concatenate(candidates, axis=1)
+        distances = numpy.linalg.norm(
+            self.points[candidates] - positions[:,numpy.newaxis], axis=2)
+        distances[candidates < 0] = numpy.inf
+        order = numpy.argsort(distances, axis=1)[:,:k]
+        rows = numpy.arange(len(positions))[:,numpy.newaxis]
+        return distances[rows, order], candidates[rows, order]
+
+    def _query_tree(self, positions, k):
+        # Returns indices of the k nearest indexed points to each position, where -1 pads
+        # rows that have fewer than k. Positions for which the tree returns evicted points
+        # are queried again for more points.
+        num_evicted = self._num_evicted_points
+        _, tree_indices = self._tree.query(positions, k=min(k, self._num_indexed_points))
+        tree_indices = tree_indices.reshape(len(positions), -1) - num_evicted
+        if num_evicted == 0:
+            return tree_indices
+        stale_rows = numpy.flatnonzero((tree_indices < 0).any(axis=1))
+        if len(stale_rows) == 0:
+            return tree_indices
+        _, requeried_indices = self._tree.query(
+            positions[stale_rows], k=min(k + num_evicted, self._tree.n))
+        requeried_indices = requeried_indices.reshape(len(stale_rows), -1) - num_evicted
+        indices = numpy.full((len(positions), requeried_indices.shape[1]), -1, dtype=int)
+        indices[:,:tree_indices.shape[1]] = tree_indices
+        indices[stale_rows] = requeried_indices
+        return indices
+
+    def query_nearest_points(self, positions):
+        _, indices = self.query(positions, k=1)
+        return self.points[indices[:,0]]
+
+    def query_radius(self, positions, radius):
+        # Returns a list with an array of indices of the points within the radius of each
+        # position.
+        positions = self._as_positions(positions)
+        results = []
+        for position in positions:
+            candidates = self._tree.query_ball_point(position, radius + self._displacement) \
+                if self._num_indexed_points > 0 else []
+            candidates = numpy.asarray(candidates, dtype=int) - self._num_evicted_points
+            candidates = numpy.concatenate([
+                candidates[candidates >= 0],
+                numpy.arange(self._num_indexed_points, len(self.points))])
+            distances = numpy.linalg.norm(self.points[candidates] - position, axis=1)
+            results.append(numpy.sort(candidates[distances <= radius]))
+        return results
+
+    def _as_positions(self, positions):
+        return numpy.asarray(positions, dtype=float).reshape(-1, self.num_dimensions)
+
+    @property
+    def _num_indexed_points(self):
+        return self._tree.n - self._num_evicted_points
+
+    @property
+    def _num_pending_points(self):
+        return len(self.points) - self._num_indexed_points
+
+    def _rebuild_if_stale(self):
+        if self._displacement > self.max_displacement or \
+           self._num_pending_points + self._num_evicted_points > \
+           self.max_pending_fraction * self._tree.n:
+            self._build()
+
+    def _build(self):
+        self._tree = cKDTree(self.points.copy())
+        self._num_evicted_points = 0
+        self._displacement = 0.
+        self.num_builds += 1
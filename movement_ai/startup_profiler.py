@@ -0,0 +1,82 @@
+# Reports where start-up time is spent: time per imported top-level package, and named
+# phases such as BVH load, model load and the first frame. Enabled with --profile-startup,
+# which needs to be detected before the heavy imports happen, hence start_if_requested().
+
+import builtins
+import collections
+import contextlib
+import sys
+import time
+
+ARGUMENT = "--profile-startup"
+NUM_IMPORTS_TO_REPORT = 15
+
+class StartupProfiler:
+    def __init__(self):
+        self._enabled = False
+        self._reported = False
+        self._import_durations = collections.defaultdict(float)
+        self._import_stack = []
+        self._phase_durations = collections.OrderedDict()
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    def start(self):
+        self._enabled = True
+        self._start_time = time.time()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        package = name.partition(".")[0]
+        if level != 0 or package in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._import_stack.append(0.)
+        start_time = time.time()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            duration = time.time() - start_time
+            duration_of_nested_imports = self._import_stack.pop()
+            self._import_durations[package] += duration - duration_of_nested_imports
+            if len(self._import_stack) > 0:
+                self._import_stack[-1] += duration
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not self._enabled:
+            yield
+            return
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self._phase_durations[name] = self._phase_durations.get(name, 0) + time.time() - start_time
+
+    def report(self):
+        if not self._enabled or self._reported:
+            return
+        builtins.__import__ = self._original_import
+        self._reported = True
+        total_duration = time.time() - self._start_time
+
+        format = "%-40s%8.3f"
+        print("start-up profile (s):")
+        import_durations = sorted(
+            self._import_durations.items(), key=lambda item: -item[1])
+        for package, duration in import_durations[:NUM_IMPORTS_TO_REPORT]:
+            print(format % ("  import %s" % package, duration))
+        print(format % ("  import (other)", sum(
+            duration for _package, duration in import_durations[NUM_IMPORTS_TO_REPORT:])))
+        for name, duration in self._phase_durations.items():
+            print(format % ("  %s" % name, duration))
+        print(format % ("  total", total_duration))
+
+profiler = StartupProfiler()
+
+def start_if_requested(argv=sys.argv):
+    if ARGUMENT in argv:
+        profiler.start()
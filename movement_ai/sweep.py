@@ -0,0 +1,230 @@
+# Trains dimensionality reduction models for a grid (or a random sample of a grid) of
+# hyperparameters on a process pool and reports fit time, transform/inverse-transform
+# latency, reconstruction error, parameter size and saved model size. The training data is
+# written once as a .npy file which all workers memory-map. Runs offline.
+#
+# Example usage:
+# python sweep.py profiles/dimensionality_reduction/valencia_pn.data --reduction-type KernelPCA \
+#   -n 5 7 10 --param pca-kernel=poly,rbf --cpu-budget 8 --output sweep.csv
+#
+# python sweep.py profiles/dimensionality_reduction/valencia_pn.data --reduction-type AutoEncoder \
+#   -n 7 --param "num-hidden-nodes=0,20,40 20" --param learning-rate=0.001,0.005 \
+#   --fixed-args "--num-training-epochs=1000 --tied-weights" --threads-per-process 2
+
+from argparse import ArgumentParser
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import time
+import numpy
+
+import storage
+
+RESULT_FIELDS = [
+    "reduction_type", "num_components", "args",
+    "fit_time", "transform_latency", "inverse_transform_latency",
+    "training_error", "validation_error", "parameter_size", "model_size", "error"]
+NUM_LATENCY_MEASUREMENTS = 100
+THREAD_ENVIRONMENT_VARIABLES = [
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"]
+
+def parse_param(string):
+    name, values_string = string.split("=", 1)
+    return name, values_string.split(",")
+
+def create_configurations(args):
+    params = [parse_param(string) for string in args.param]
+    names = [name for name, _values in params]
+    configurations = []
+    for num_components in args.num_components:
+        for values in itertools.product(*[values for _name, values in params]):
+            args_string = " ".join(
+                ["--%s=%s" % (name, value) if " " not in value else "--%s %s" % (name, value)
+                 for name, value in zip(names, values)] + [args.fixed_args])
+            configurations.append((args.reduction_type, num_components, args_string.strip()))
+    if args.num_random_samples and args.num_random_samples < len(configurations):
+        configurations = random.Random(args.random_seed).sample(
+            configurations, args.num_random_samples)
+    return configurations
+
+def split_training_data(training_data, validation_fraction, random_seed):
+    indices = numpy.random.RandomState(random_seed).permutation(len(training_data))
+    num_validation_samples = int(len(training_data) * validation_fraction)
+    return training_data[indices[num_validation_samples:]], training_data[indices[:num_validation_samples]]
+
+def initialize_worker(training_data_path, validation_data_path):
+    global _training_data, _validation_data
+    _training_data = numpy.load(training_data_path, mmap_mode="r")
+    _validation_data = numpy.load(validation_data_path, mmap_mode="r")
+
+def evaluate(configuration):
+    reduction_type, num_components, args_string = configuration
+    result = {"reduction_type": reduction_type,
+              "num_components": num_components,
+              "args": args_string}
+    try:
+        result.update(_evaluate(reduction_type, num_components, args_string))
+    except Exception as exception:
+        result["error"] = repr(exception)
+    return result
+
+def _evaluate(reduction_type, num_components, args_string):
+    from dimensionality_reduction.factory import DimensionalityReductionFactory
+    student = DimensionalityReductionFactory.create(
+        reduction_type, _training_data.shape[1], num_components, args_string)
+
+    time_before_fit = time.time()
+    _train(student, _training_data)
+    fit_time = time.time() - time_before_fit
+    student.probe(_training_data)
+
+    frames = _validation_data if len(_validation_data) > 0 else _training_data
+    frames = frames[:NUM_LATENCY_MEASUREMENTS]
+    time_before_transform = time.time()
+    reductions = [student.transform(frame[numpy.newaxis]) for frame in frames]
+    time_before_inverse_transform = time.time()
+    for reduction in reductions:
+        student.inverse_transform(reduction)
+    time_after_inverse_transform = time.time()
+
+    return {"fit_time": fit_time,
+            "transform_latency": (time_before_inverse_transform - time_before_transform) / len(frames),
+            "inverse_transform_latency": (time_after_inverse_transform - time_before_inverse_transform) / len(frames),
+            "training_error": _reconstruction_error(student, _training_data),
+            "validation_error": _reconstruction_error(student, _validation_data),
+            "parameter_size": _parameter_size(student),
+            "model_size": _model_size(student)}
+
+def _train(student, training_data):
+    if student.supports_incremental_learning():
+        student.batch_train(
+            training_data,
+            getattr(student.args, "num_training_epochs", None),
+            None,
+            getattr(student.args, "target_loss_slope", None))
+    else:
+        student.fit(training_data)
+
+def _reconstruction_error(student, observations):
+    if len(observations) == 0:
+        return None
+    reconstructions = student.inverse_transform(student.transform(observations))
+    return ((observations - reconstructions) ** 2).mean(axis=None)
+
+def _parameter_size(student):
+    # Bytes of the arrays in the model state, unlike the model size which also includes
+    # the observed reductions saved with the model
+    pickler = _ArraySizePickler(io.BytesIO())
+    pickler.dump(student.get_model_state())
+    return pickler.array_size
+
+class _ArraySizePickler(pickle.Pickler):
+    def __init__(self, file):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.array_size = 0
+
+    def persistent_id(self, obj):
+        if isinstance(obj, numpy.ndarray) and not obj.dtype.hasobject:
+            self.array_size += obj.nbytes
+            return self.array_size
+        return None
+
+def _model_size(student):
+    tempdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tempdir, "model")
+        student.save(path)
+        return sum(os.path.getsize(os.path.join(tempdir, filename))
+                   for filename in os.listdir(tempdir))
+    finally:
+        shutil.rmtree(tempdir)
+
+def format_value(value):
+    if isinstance(value, (float, numpy.floating)):
+        return "%.6g" % value
+    if value is None:
+        return ""
+    return str(value)
+
+def print_results_table(results):
+    format = "%-40s%-4s%-10s%-14s%-14s%-12s%-12s%-12s%-10s"
+    print(format % ("args", "n", "fit (s)", "transform (s)", "inverse (s)",
+                    "train MSE", "valid. MSE", "params", "size"))
+    successful_results = [result for result in results if "error" not in result]
+    for result in sorted(successful_results,
+                         key=lambda result: (result["validation_error"] is None,
+                                             result["validation_error"] or result["training_error"])):
+        print(format % tuple(format_value(result[field]) for field in [
+            "args", "num_components", "fit_time", "transform_latency",
+            "inverse_transform_latency", "training_error", "validation_error",
+            "parameter_size", "model_size"]))
+    for result in results:
+        if "error" in result:
+            print("failed: %s %s (%s)" % (result["num_components"], result["args"], result["error"]))
+
+def run(configurations, training_split, validation_split, num_processes, output_path):
+    # Evaluates the configurations on a process pool, writing each result to the CSV file
+    # at output_path as soon as it is available, and returns the results
+    tempdir = tempfile.mkdtemp()
+    try:
+        training_data_path = os.path.join(tempdir, "training.npy")
+        validation_data_path = os.path.join(tempdir, "validation.npy")
+        numpy.save(training_data_path, training_split)
+        numpy.save(validation_data_path, validation_split)
+
+        context = multiprocessing.get_context("spawn")
+        with open(output_path, "w") as output_file:
+            writer = csv.DictWriter(output_file, RESULT_FIELDS)
+            writer.writeheader()
+            with context.Pool(num_processes, initialize_worker,
+                              (training_data_path, validation_data_path)) as pool:
+                results = []
+                for n, result in enumerate(pool.imap_unordered(evaluate, configurations)):
+                    results.append(result)
+                    writer.writerow({field: format_value(result.get(field)) for field in RESULT_FIELDS})
+                    output_file.flush()
+                    print("%d/%d %s" % (n + 1, len(configurations), " ".join(
+                        "%s=%s" % (field, format_value(result.get(field)))
+                        for field in RESULT_FIELDS if result.get(field) is not None)))
+        return results
+    finally:
+        shutil.rmtree(tempdir)
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("training_data", help="Training data file, e.g. profiles/dimensionality_reduction/<profile>.data")
+    parser.add_argument("--reduction-type", default="LinearPCA")
+    parser.add_argument("--num-components", "-n", type=int, nargs="+", default=[4])
+    parser.add_argument("--param", action="append", default=[],
+                        help="Model argument and comma-separated alternatives, e.g. pca-kernel=poly,rbf")
+    parser.add_argument("--fixed-args", default="",
+                        help="Model arguments used in all configurations")
+    parser.add_argument("--num-random-samples", type=int,
+                        help="Evaluate a random sample of this many configurations instead of the whole grid")
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--validation-fraction", type=float, default=0.2)
+    parser.add_argument("--cpu-budget", type=int, default=multiprocessing.cpu_count(),
+                        help="Total number of CPU cores to use")
+    parser.add_argument("--threads-per-process", type=int, default=1)
+    parser.add_argument("--output", "-o", default="sweep.csv")
+    args = parser.parse_args()
+
+    for variable in THREAD_ENVIRONMENT_VARIABLES:
+        os.environ[variable] = str(args.threads_per_process)
+    num_processes = max(1, args.cpu_budget // args.threads_per_process)
+
+    configurations = create_configurations(args)
+    training_data = numpy.array(storage.load(args.training_data), dtype=numpy.float32)
+    training_split, validation_split = split_training_data(
+        training_data, args.validation_fraction, args.random_seed)
+
+    print("evaluating %d configurations on %d processes..." % (len(configurations), num_processes))
+    results = run(configurations, training_split, validation_split, num_processes, args.output)
+    print("saved results to %s" % args.output)
+    print_results_table(results)
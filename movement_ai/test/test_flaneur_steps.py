@@ -0,0 +1,49 @@
+import unittest
+import numpy
+import sklearn.neighbors
+
+from flaneur import Flaneur, NUM_NEIGHBORS
+
+class FlaneurStepsTestCase(unittest.TestCase):
+    def setUp(self):
+        self._map_points = numpy.random.RandomState(0).uniform(0, 1, (3000, 4))
+
+    def test_trajectory_equals_sklearn_neighbor_search(self):
+        classifier = sklearn.neighbors.KNeighborsClassifier(n_neighbors=NUM_NEIGHBORS)
+        classifier.fit(self._map_points, list(range(len(self._map_points))))
+        numpy.random.seed(1)
+        reference_flaneur = Flaneur(self._map_points, neighbor_cache_size=None)
+        reference_flaneur._get_nearest_neighbor_indices = \
+            lambda position: classifier.kneighbors([position])[1][0]
+        expected_positions = self._proceed(reference_flaneur, 200)
+
+        for neighbor_cache_size in [None, 400]:
+            numpy.random.seed(1)
+            flaneur = Flaneur(self._map_points, neighbor_cache_size=neighbor_cache_size)
+            numpy.testing.assert_array_equal(expected_positions, self._proceed(flaneur, 200))
+
+    def test_proceed_steps_equals_single_steps(self):
+        numpy.random.seed(1)
+        expected_positions = self._proceed(Flaneur(self._map_points), 50)
+        numpy.random.seed(1)
+        flaneur = Flaneur(self._map_points)
+        positions = []
+        for n in range(5):
+            step_positions, neighbors_centers = flaneur.proceed_steps(0.02, 10)
+            positions += step_positions
+        numpy.testing.assert_array_equal(expected_positions, positions)
+        self.assertEqual(10, len(neighbors_centers))
+
+    def test_cache_is_invalidated_when_map_points_change(self):
+        flaneur = Flaneur(self._map_points)
+        flaneur.proceed(0.02)
+        flaneur.set_map_points(self._map_points + 0.5)
+        flaneur.proceed(0.02)
+        self.assertTrue(numpy.all(flaneur.get_neighbors() >= 0.5))
+
+    def _proceed(self, flaneur, num_steps):
+        positions = []
+        for n in range(num_steps):
+            flaneur.proceed(0.02)
+            positions.append(numpy.array(flaneur.get_position()))
+        return positions
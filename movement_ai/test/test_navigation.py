@@ -0,0 +1,90 @@
+import unittest
+import random
+import numpy
+
+from navigator import Navigator, PathFollower
+import dynamics as dynamics_module
+
+class NavigatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self._map_points = numpy.random.RandomState(0).uniform(0, 1, (200, 4))
+        self._navigator = Navigator(self._map_points)
+
+    def test_vectorized_scores_equal_scores_of_single_candidates(self):
+        self._set_path_parameters(
+            departure=self._map_points[0], extension=0.5, location_preference=0.7,
+            preferred_location=numpy.array([0.2, 0.4, 0.6, 0.8]))
+        candidates = self._navigator._generate_destinations(0.3, 100)
+        expected_scores = [
+            abs(numpy.linalg.norm(candidate - self._map_points[0]) - self._navigator._extension) +
+            0.7 * numpy.linalg.norm(candidate - numpy.array([0.2, 0.4, 0.6, 0.8]))
+            for candidate in candidates]
+        numpy.testing.assert_array_almost_equal(
+            expected_scores, self._navigator._score_destinations(candidates, self._map_points[0]))
+
+    def test_candidates_are_known_destinations_displaced_by_novelty(self):
+        candidates = self._navigator._generate_destinations(0.3, 1000)
+        self.assertEqual((1000, 4), candidates.shape)
+        distances_to_map = numpy.linalg.norm(
+            candidates[:,numpy.newaxis] - self._map_points[numpy.newaxis], axis=2).min(axis=1)
+        self.assertTrue(numpy.all(distances_to_map <= 0.3 + 1e-9))
+
+    def test_path_is_reproducible_with_seed(self):
+        self.assertEqual(
+            self._generate_path_with_seed(1, num_destination_candidates=5000),
+            self._generate_path_with_seed(1, num_destination_candidates=5000))
+
+    def _generate_path_with_seed(self, seed, **kwargs):
+        random.seed(seed)
+        path = self._navigator.generate_path(
+            departure=self._map_points[0], num_segments=5, novelty=0.2, extension=0.3,
+            location_preference=0, **kwargs)
+        return [list(point) for point in path]
+
+    def _set_path_parameters(self, departure, extension, location_preference, preferred_location):
+        self._navigator._departure = departure
+        self._navigator._extension = self._navigator._max_distance * extension
+        self._navigator._location_preference = location_preference
+        self._navigator.set_preferred_location(preferred_location)
+
+class PathFollowerTestCase(unittest.TestCase):
+    def setUp(self):
+        random_state = numpy.random.RandomState(0)
+        self._path = list(numpy.cumsum(random_state.uniform(-0.1, 0.1, (100, 3)), axis=0))
+        self._dynamics = dynamics_module.sine_dynamics(min_relative_velocity=0.3)
+
+    def test_velocity_correction_equals_simulated_estimate(self):
+        follower = PathFollower(self._path, self._dynamics)
+        simulated_correction = self._simulate_duration(dynamics_module.constant_dynamics()) / \
+            self._simulate_duration(self._dynamics)
+        self.assertAlmostEqual(simulated_correction, follower._velocity_correction)
+
+    def test_estimated_duration_equals_simulated_duration(self):
+        follower = PathFollower(self._path, self._dynamics)
+        self.assertAlmostEqual(follower.estimated_duration(), follower.proceed())
+
+    def test_position_at_distance(self):
+        follower = PathFollower(self._path, self._dynamics)
+        numpy.testing.assert_array_equal(self._path[0], follower.position_at_distance(0))
+        numpy.testing.assert_array_almost_equal(
+            self._path[-1], follower.position_at_distance(follower.total_distance()))
+        strip_distance = numpy.linalg.norm(self._path[11] - self._path[10])
+        numpy.testing.assert_array_almost_equal(
+            (self._path[10] + self._path[11]) / 2,
+            follower.position_at_distance(follower._cumulative_distances[10] + strip_distance / 2))
+
+    def test_remaining_distance(self):
+        follower = PathFollower(self._path, self._dynamics)
+        self.assertAlmostEqual(follower.total_distance(), follower.remaining_distance())
+        follower.proceed(follower.estimated_duration() / 2)
+        self.assertTrue(0 < follower.remaining_distance() < follower.total_distance())
+        follower.proceed()
+        self.assertEqual(0, follower.remaining_distance())
+
+    def _simulate_duration(self, dynamics):
+        # The duration estimate previously used, following the whole path without velocity
+        # correction.
+        follower = PathFollower(self._path, dynamics)
+        follower._velocity_correction = 1.
+        follower._restart()
+        return follower.proceed()
@@ -0,0 +1,76 @@
+import unittest
+import threading
+import numpy
+from event import Event
+from event_outbox import EventOutbox
+
+class EventOutboxTestCase(unittest.TestCase):
+    def setUp(self):
+        self._sent_events = []
+        self._outbox = EventOutbox(self._sent_events.append)
+
+    def test_unchanged_state_event_is_dropped(self):
+        self._outbox.put(Event(Event.OUTPUT, numpy.array([1., 2.])))
+        self._outbox.put(Event(Event.OUTPUT, numpy.array([1., 2.])))
+        self._outbox.put(Event(Event.OUTPUT, numpy.array([1., 3.])))
+        self._then_sent_contents_are([[1., 2.], [1., 3.]])
+        self.assertEqual(1, self._outbox.num_dropped_events)
+
+    def test_non_array_content_is_compared(self):
+        for count in [1, 1, 2]:
+            self._outbox.put(Event(Event.FRAME_COUNT, count))
+        self._then_sent_contents_are([1, 2])
+
+    def test_containers_of_arrays_are_compared(self):
+        for values in [[1, 2], [1, 2], [1, 3]]:
+            content = tuple(numpy.array([value], dtype=numpy.float32) for value in values)
+            self._outbox.put(Event(Event.REDUCTION, content))
+        self.assertEqual(2, len(self._sent_events))
+        self.assertEqual(1, self._outbox.num_dropped_events)
+
+    def test_numpy_scalars_in_dicts_are_compared(self):
+        for maximum in [1., 1., 2.]:
+            self._outbox.put(Event(Event.REDUCTION_RANGE, [
+                        {"min": numpy.float64(0.), "max": numpy.float64(maximum)}]))
+        self.assertEqual(2, len(self._sent_events))
+
+    def test_other_events_are_always_sent(self):
+        self._outbox.put(Event(Event.MODE, "improvise"))
+        self._outbox.put(Event(Event.MODE, "improvise"))
+        self._then_sent_contents_are(["improvise", "improvise"])
+
+    def test_state_events_are_coalesced_while_collecting(self):
+        with self._outbox.collecting():
+            self._outbox.put(Event(Event.FRAME_COUNT, 1))
+            self._outbox.put(Event(Event.MODE, "improvise"))
+            self._outbox.put(Event(Event.FRAME_COUNT, 2))
+            self._then_sent_contents_are(["improvise"])
+        self._then_sent_contents_are(["improvise", 2])
+
+    def test_nested_collecting_sends_at_outermost_end(self):
+        with self._outbox.collecting():
+            with self._outbox.collecting():
+                self._outbox.put(Event(Event.FRAME_COUNT, 1))
+            self._then_sent_contents_are([])
+        self._then_sent_contents_are([1])
+
+    def test_events_from_other_threads_are_not_collected(self):
+        with self._outbox.collecting():
+            self._outbox.put(Event(Event.FRAME_COUNT, 1))
+            thread = threading.Thread(
+                target=lambda: self._outbox.put(Event(Event.USER_INTENSITY, 0.5)))
+            thread.start()
+            thread.join()
+            self._then_sent_contents_are([0.5])
+        self._then_sent_contents_are([0.5, 1])
+
+    def test_forget_resends_unchanged_state(self):
+        self._outbox.put(Event(Event.FRAME_COUNT, 1))
+        self._outbox.forget()
+        self._outbox.put(Event(Event.FRAME_COUNT, 1))
+        self._then_sent_contents_are([1, 1])
+
+    def _then_sent_contents_are(self, expected_contents):
+        self.assertEqual(
+            expected_contents,
+            [numpy.asarray(event.content).tolist() for event in self._sent_events])
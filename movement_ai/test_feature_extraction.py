@@ -0,0 +1,30 @@
+import unittest
+import numpy
+from feature_extraction import FeatureExtractor
+
+class FeatureExtractorTestCase(unittest.TestCase):
+    def test_array_features_equal_features_of_each_pose(self):
+        for coordinate_up in [1, 2]:
+            feature_extractor = FeatureExtractor(coordinate_up)
+            poses = self._random_poses(1000, seed=coordinate_up)
+            expected_features = numpy.array([
+                    feature_extractor.extract_features(*positions) for positions in poses])
+            numpy.testing.assert_array_equal(
+                expected_features, feature_extractor.extract_features_from_positions(poses))
+
+    def test_single_pose(self):
+        feature_extractor = FeatureExtractor()
+        positions = self._random_poses(1)[0]
+        numpy.testing.assert_array_equal(
+            feature_extractor.extract_features(*positions),
+            feature_extractor.extract_features_from_positions(positions))
+
+    def test_shape_of_array_features(self):
+        feature_extractor = FeatureExtractor()
+        features = feature_extractor.extract_features_from_positions(
+            self._random_poses(6).reshape(2, 3, 15, 3))
+        self.assertEqual((2, 3, feature_extractor.get_num_features()), features.shape)
+
+    def _random_poses(self, num_poses, seed=0):
+        return numpy.random.RandomState(seed).uniform(
+            -1, 1, (num_poses, len(FeatureExtractor.INPUT_JOINTS), 3))
@@ -0,0 +1,45 @@
+import unittest
+import numpy
+from scipy.interpolate import InterpolatedUnivariateSpline
+
+import interpolation
+
+class InterpolationTestCase(unittest.TestCase):
+    def test_equivalent_to_univariate_splines_per_dimension(self):
+        random_state = numpy.random.RandomState(0)
+        for num_points in range(2, 15):
+            for num_dimensions in [1, 2, 7, 20]:
+                path = list(random_state.uniform(0, 1, (num_points, num_dimensions)))
+                expected = self._interpolate_per_dimension(path, resolution=100)
+                actual = interpolation.interpolate(path, resolution=100)
+                self.assertEqual(len(expected), len(actual))
+                numpy.testing.assert_array_almost_equal(expected, actual)
+
+    def test_interpolate_paths_equals_interpolate(self):
+        paths = numpy.random.RandomState(0).uniform(0, 1, (20, 10, 7))
+        for path, interpolated_path in zip(paths, interpolation.interpolate_paths(paths, 100)):
+            numpy.testing.assert_array_almost_equal(
+                interpolation.interpolate(list(path), 100), interpolated_path)
+
+    def test_single_point_cannot_be_interpolated(self):
+        with self.assertRaises(interpolation.InterpolationException):
+            interpolation.interpolate([numpy.array([0.5, 0.5])], resolution=100)
+
+    def test_nearest_index(self):
+        points = numpy.array([[0., 0.], [1., 1.], [2., 2.], [1., 1.]])
+        self.assertEqual(1, interpolation._nearest_index(points, numpy.array([1.1, 0.9])))
+
+    def _interpolate_per_dimension(self, path, resolution):
+        # The original implementation, with one spline per dimension and a linear search
+        # for the nearest interpolated points to the start and end of the path.
+        path = numpy.array(path)
+        x = numpy.arange(0., 1., 1./len(path))
+        x_new = numpy.arange(0., 1., 1./resolution)
+        k = min(3, len(path)-1)
+        interpolated_path = numpy.column_stack([
+            InterpolatedUnivariateSpline(x, path[:,n], k=k)(x_new)
+            for n in range(path.shape[1])])
+        def nearest_index(target):
+            return min(range(len(interpolated_path)),
+                       key=lambda i: numpy.linalg.norm(interpolated_path[i] - target))
+        return interpolated_path[nearest_index(path[0]):nearest_index(path[-1])]
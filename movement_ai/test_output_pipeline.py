@@ -0,0 +1,93 @@
+import unittest
+import numpy
+from argparse import ArgumentParser
+
+from bvh.bvh_reader import BvhReader
+from bvh.bvh_writer import BvhWriter
+from entities.hierarchical import Entity
+from transformations import euler_from_quaternion, euler_matrix, _AXES2TUPLE
+from output_pipeline import euler_from_quaternions, euler_matrices
+
+SKELETON = "scenes/pn-01.22_skeleton.bvh"
+
+class OutputPipelineTestCase(unittest.TestCase):
+    def test_frames_equal_those_of_processed_pose(self):
+        for entity_args in [
+                "-r quaternion --friction --translate --confinement",
+                "-r quaternion",
+                "-r vectors --friction --translate"]:
+            self._assert_frames_equal_those_of_processed_pose(entity_args)
+
+    def test_updates_pose_like_processed_pose(self):
+        pose_entity = self._create_entity("-r quaternion --friction --translate")
+        pipeline_entity = self._create_entity("-r quaternion --friction --translate")
+        pipeline = pipeline_entity.get_output_pipeline()
+        pose = pipeline_entity.bvh_reader.get_hierarchy().create_pose()
+        for parameters in self._random_parameters(pose_entity, 10):
+            pose_entity.parameters_to_processed_pose(parameters, pose_entity.pose)
+            pipeline.process(parameters)
+            pipeline.update_pose(pose)
+            numpy.testing.assert_allclose(
+                pose_entity.pose.get_vertices(), pose.get_vertices(), atol=1e-9)
+
+    def test_batch_vertices_equal_those_of_each_processed_frame(self):
+        for entity_args in ["-r quaternion --friction --translate --confinement", "-r vectors"]:
+            frame_pipeline = self._create_entity(entity_args).get_output_pipeline()
+            batch_pipeline = self._create_entity(entity_args).get_output_pipeline()
+            all_parameters = self._random_parameters(self._create_entity(entity_args), 20)
+            expected_vertices = []
+            for parameters in all_parameters:
+                frame_pipeline.process(parameters)
+                expected_vertices.append(frame_pipeline.vertices.copy())
+            numpy.testing.assert_allclose(
+                expected_vertices, batch_pipeline.process_batch(all_parameters), atol=1e-12)
+
+    def test_root_vertical_orientation_can_be_modified(self):
+        entity = self._create_entity("-r quaternion")
+        pipeline = entity.get_output_pipeline()
+        entity.modified_root_vertical_orientation = 0.5
+        pipeline.process(self._random_parameters(entity, 1)[0])
+        root_axes = entity.bvh_reader.get_hierarchy().get_root_joint_definition().axes
+        vertical_axis_index = root_axes.index("y") - 1
+        self.assertAlmostEqual(0.5, pipeline.angles[0][vertical_axis_index])
+
+    def _assert_frames_equal_those_of_processed_pose(self, entity_args):
+        pose_entity = self._create_entity(entity_args)
+        pipeline_entity = self._create_entity(entity_args)
+        bvh_writer = BvhWriter(pose_entity.bvh_reader.get_hierarchy(), 1. / 30)
+        pipeline = pipeline_entity.get_output_pipeline()
+        for parameters in self._random_parameters(pose_entity, 50):
+            pose_entity.parameters_to_processed_pose(parameters, pose_entity.pose)
+            pipeline.process(parameters)
+            numpy.testing.assert_allclose(
+                bvh_writer._pose_to_bvh_frame(pose_entity.pose), pipeline.bvh_frame, atol=1e-9)
+
+    def _create_entity(self, entity_args):
+        bvh_reader = BvhReader(SKELETON)
+        bvh_reader.read()
+        parser = ArgumentParser()
+        Entity.add_parser_arguments(parser)
+        args = parser.parse_args(entity_args.split())
+        pose = bvh_reader.get_hierarchy().create_pose()
+        return Entity(bvh_reader, pose, True, False, args)
+
+    def _random_parameters(self, entity, num_frames):
+        return numpy.random.RandomState(0).uniform(
+            -1, 1, (num_frames, entity.get_value_length()))
+
+class VectorizedTransformationsTestCase(unittest.TestCase):
+    def test_euler_from_quaternions_equals_euler_from_quaternion(self):
+        quaternions = numpy.random.RandomState(0).uniform(-1, 1, (100, 4))
+        for axes in _AXES2TUPLE.keys():
+            expected_angles = [
+                euler_from_quaternion(quaternion / numpy.linalg.norm(quaternion), axes)
+                for quaternion in quaternions]
+            numpy.testing.assert_allclose(
+                expected_angles, euler_from_quaternions(quaternions, axes), atol=1e-12)
+
+    def test_euler_matrices_equal_euler_matrix(self):
+        angles = numpy.random.RandomState(0).uniform(-numpy.pi, numpy.pi, (100, 3))
+        for axes in _AXES2TUPLE.keys():
+            expected_matrices = [euler_matrix(*joint_angles, axes=axes) for joint_angles in angles]
+            numpy.testing.assert_allclose(
+                expected_matrices, euler_matrices(angles, axes), atol=1e-12)
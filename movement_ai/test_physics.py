@@ -1,6 +1,7 @@
 import unittest
-from physics import FrictionConstrainer
+from physics import FrictionConstrainer, BalanceDetector, FloorConstrainer, Constrainers
 from numpy import array
+import numpy
 
 class MockBalanceDetector:
     def __init__(self):
@@ -196,3 +197,25 @@ class FrictionConstrainerTest(unittest.TestCase):
 
     def str_frame(self, frame):
         return "\n%s\n" % ("\n".join(["'%s'" % row for row in frame]))
+
+class VertexArrayTest(unittest.TestCase):
+    def test_balance_detector_picks_first_lowest_vertex(self):
+        vertices = array([[0., 2., 0.], [1., 0.5, 0.], [2., 0.5, 1.], [3., 1., 0.]])
+        self.assertEqual(1, BalanceDetector(coordinate_up=1).identify_supporting_vertex(vertices))
+        self.assertEqual(0, BalanceDetector(coordinate_up=2).identify_supporting_vertex(vertices))
+
+    def test_floor_constrainer_translates_vertices_in_place(self):
+        vertices = array([[0., 2., 0.], [1., 0.5, 0.], [2., 1., 1.]])
+        result = FloorConstrainer(coordinate_up=1).constrain(vertices)
+        self.assertIs(vertices, result)
+        numpy.testing.assert_array_equal([[0., 1.5, 0.], [1., 0., 0.], [2., .5, 1.]], result)
+
+    def test_constrainers_leave_input_vertices_unchanged(self):
+        vertices = [array([0., 2., 0., 1.]), array([1., 0.5, 0., 1.])]
+        constrainers = Constrainers(
+            1, enable_friction=True, enable_floor=True, enable_confinement=True,
+            confinement_rate=0.5)
+        result = constrainers.constrain(vertices)
+        numpy.testing.assert_array_equal([0., 2., 0., 1.], vertices[0])
+        self.assertEqual((2, 4), result.shape)
+        self.assertEqual(0., result[:,1].min())
@@ -0,0 +1,47 @@
+import unittest
+import os
+import tempfile
+import numpy
+from argparse import ArgumentParser
+
+import render_offline
+from bvh.bvh_reader import BvhReader
+from dimensionality_reduction.factory import DimensionalityReductionFactory
+
+class RenderOfflineTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        model_path = os.path.join(self._tempdir.name, "test.model")
+        parser = ArgumentParser()
+        render_offline.add_parser_arguments(parser)
+        self._args = parser.parse_args([
+                "--model", model_path, "--reduction-type", "LinearPCA", "-n", "4",
+                "--duration", "2", "--chunk-size", "25", "--output-dir", self._tempdir.name,
+                "--save-parameters"])
+        bvh_reader = BvhReader(self._args.skeleton)
+        bvh_reader.read()
+        entity = render_offline.create_entity(self._args, bvh_reader)
+        training_data = numpy.array([entity.get_random_value() for n in range(100)])
+        student = DimensionalityReductionFactory.create(
+            "LinearPCA", entity.get_value_length(), 4, "")
+        student.fit(training_data)
+        student.probe(training_data)
+        student.save(model_path)
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+
+    def test_renders_requested_number_of_frames(self):
+        output_path, _rendering_time = render_offline.render(self._args, 1)
+        with open(output_path + ".bvh") as f:
+            self.assertIn("Frames: 60\n", f.read())
+        self.assertEqual((60, 4), numpy.load(output_path + ".reductions.npy").shape)
+
+    def test_rendering_is_reproducible_with_seed(self):
+        first_reductions = self._render_reductions(1)
+        numpy.testing.assert_array_equal(first_reductions, self._render_reductions(1))
+        self.assertFalse(numpy.array_equal(first_reductions, self._render_reductions(2)))
+
+    def _render_reductions(self, seed):
+        output_path, _rendering_time = render_offline.render(self._args, seed)
+        return numpy.load(output_path + ".reductions.npy")
@@ -0,0 +1,55 @@
+import unittest
+from argparse import Namespace
+import numpy
+from scipy.spatial.distance import pdist
+
+import sampling
+
+class SamplingTestCase(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(0)
+        self._points = numpy.random.RandomState(1).uniform(0, 1, (2000, 3))
+
+    def test_farthest_point_sampling_equals_brute_force(self):
+        indices = sampling.farthest_point_indices(self._points, 50)
+        expected_indices = [indices[0]]
+        distances = numpy.linalg.norm(self._points - self._points[indices[0]], axis=1)
+        while len(expected_indices) < 50:
+            expected_indices.append(numpy.argmax(distances))
+            distances = numpy.minimum(distances, numpy.linalg.norm(
+                    self._points - self._points[expected_indices[-1]], axis=1))
+        numpy.testing.assert_array_equal(expected_indices, indices)
+
+    def test_poisson_disk_samples_are_separated_and_cover_points(self):
+        min_distance = 0.1
+        samples = self._sample("PoissonDisk", min_distance=min_distance)
+        self.assertGreaterEqual(pdist(samples).min(), min_distance)
+        for point in self._points:
+            self.assertLessEqual(numpy.linalg.norm(samples - point, axis=1).min(), min_distance)
+
+    def test_min_distance_sampling_equals_sequential_dropping(self):
+        min_distance = 0.05
+        expected_samples = []
+        for point in self._points:
+            if all(numpy.linalg.norm(sample - point) >= min_distance
+                   for sample in expected_samples):
+                expected_samples.append(point)
+        numpy.testing.assert_array_equal(
+            expected_samples, self._sample("MinDistance", min_distance=min_distance))
+
+    def test_distance_distribution_equalization_sampling(self):
+        nearest_neighbor_distances = [
+            numpy.sort(numpy.linalg.norm(self._points - point, axis=1))[1]
+            for point in self._points]
+        order = sorted(range(len(self._points)), key=lambda index: nearest_neighbor_distances[index])
+        expected_samples = [self._points[order[index]] for index in range(0, 2000, 20)]
+        numpy.testing.assert_array_equal(
+            expected_samples, self._sample("DistanceDistributionEqualization", num_samples=100))
+
+    def test_kmeans_sampling(self):
+        self.assertEqual((20, 3), numpy.array(self._sample("KMeans", num_samples=20)).shape)
+        self.assertEqual((20, 3), numpy.array(self._sample("MiniBatchKMeans", num_samples=20)).shape)
+
+    def _sample(self, sampler_name, **args):
+        sampler_class = getattr(sampling, "%sSampler" % sampler_name)
+        return sampler_class(self._points, Namespace(**args)).sample()
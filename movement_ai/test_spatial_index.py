@@ -0,0 +1,76 @@
+import unittest
+import numpy
+
+from spatial_index import SpatialIndex
+
+class SpatialIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self._random_state = numpy.random.RandomState(0)
+        self._points = self._random_state.uniform(0, 1, (500, 3))
+        self._positions = self._random_state.uniform(0, 1, (20, 3))
+        self._index = SpatialIndex(self._points)
+
+    def test_query_equals_brute_force(self):
+        self._assert_query_equals_brute_force(self._points, k=5)
+
+    def test_inserted_points_are_found_without_rebuild(self):
+        new_points = self._random_state.uniform(0, 1, (30, 3))
+        self._index.insert(new_points)
+        self.assertEqual(1, self._index.num_builds)
+        self._assert_query_equals_brute_force(numpy.concatenate([self._points, new_points]), k=5)
+
+    def test_rebuild_when_too_many_points_are_inserted(self):
+        self._index.insert(self._random_state.uniform(0, 1, (60, 3)))
+        self.assertEqual(2, self._index.num_builds)
+
+    def test_appended_points_are_found_without_rebuild(self):
+        points = numpy.concatenate([self._points, self._random_state.uniform(0, 1, (10, 3))])
+        self._index.set_points(points)
+        self.assertEqual(1, self._index.num_builds)
+        self._assert_query_equals_brute_force(points, k=5)
+
+    def test_evicted_points_are_skipped_without_rebuild(self):
+        new_points = self._random_state.uniform(0, 1, (20, 3))
+        self._index.insert(new_points, num_evicted=20)
+        self.assertEqual(1, self._index.num_builds)
+        points = numpy.concatenate([self._points[20:], new_points])
+        self._assert_query_equals_brute_force(points, k=5)
+        for position, indices in zip(self._positions, self._index.query_radius(self._positions, 0.1)):
+            expected_indices = numpy.flatnonzero(
+                numpy.linalg.norm(points - position, axis=1) <= 0.1)
+            numpy.testing.assert_array_equal(expected_indices, indices)
+
+    def test_rebuild_when_too_many_points_are_evicted(self):
+        self._index.insert(self._random_state.uniform(0, 1, (30, 3)), num_evicted=30)
+        self.assertEqual(2, self._index.num_builds)
+
+    def test_rebuild_when_points_have_moved_too_far(self):
+        self._index.set_points(self._points + 0.001)
+        self.assertEqual(1, self._index.num_builds)
+        self._index.set_points(self._points + 0.1)
+        self.assertEqual(2, self._index.num_builds)
+        self._assert_query_equals_brute_force(self._points + 0.1, k=5)
+
+    def test_radius_query_is_exact_for_moved_points(self):
+        points = self._points + self._random_state.uniform(-0.005, 0.005, self._points.shape)
+        self._index.set_points(points)
+        self.assertEqual(1, self._index.num_builds)
+        for position, indices in zip(self._positions, self._index.query_radius(self._positions, 0.1)):
+            expected_indices = numpy.flatnonzero(
+                numpy.linalg.norm(points - position, axis=1) <= 0.1)
+            numpy.testing.assert_array_equal(expected_indices, indices)
+
+    def test_nearest_points(self):
+        nearest_points = self._index.query_nearest_points(self._positions)
+        for position, nearest_point in zip(self._positions, nearest_points):
+            expected = self._points[numpy.argmin(numpy.linalg.norm(self._points - position, axis=1))]
+            numpy.testing.assert_array_equal(expected, nearest_point)
+
+    def _assert_query_equals_brute_force(self, points, k):
+        distances, indices = self._index.query(self._positions, k=k)
+        expected_distances = numpy.linalg.norm(
+            points[numpy.newaxis] - self._positions[:,numpy.newaxis], axis=2)
+        expected_indices = numpy.argsort(expected_distances, axis=1)[:,:k]
+        numpy.testing.assert_array_equal(expected_indices, indices)
+        numpy.testing.assert_array_almost_equal(
+            numpy.sort(expected_distances, axis=1)[:,:k], distances)
@@ -0,0 +1,34 @@
+import unittest
+import csv
+import os
+import tempfile
+import numpy
+
+import sweep
+
+class SweepTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        data_path = os.path.join(self._tempdir.name, "data.npy")
+        numpy.save(data_path, numpy.random.RandomState(0).randn(60, 8).astype(numpy.float32))
+        self._data = numpy.load(data_path, mmap_mode="r")
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+
+    def test_sweep_writes_one_row_per_configuration(self):
+        configurations = [("LinearPCA", 2, ""), ("LinearPCA", 3, "")]
+        training_split, validation_split = sweep.split_training_data(self._data, 0.2, 0)
+        output_path = os.path.join(self._tempdir.name, "sweep.csv")
+        sweep.run(configurations, training_split, validation_split, 1, output_path)
+
+        with open(output_path) as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+        self.assertEqual(sweep.RESULT_FIELDS, reader.fieldnames)
+        self.assertEqual(2, len(rows))
+        for row in rows:
+            self.assertEqual("", row["error"])
+            self.assertGreater(int(row["parameter_size"]), 0)
+            self.assertLess(int(row["parameter_size"]), int(row["model_size"]))
+        self.assertEqual(["2", "3"], sorted(row["num_components"] for row in rows))